@@ -3,16 +3,19 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from datetime import timedelta, datetime
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 
 from .. import database as db
 from ..models.user import UserCreate, UserLogin, UserResponse, Token
 from ..core.security import (
-    get_password_hash,
-    verify_password,
     create_access_token,
     get_current_user,
+    get_current_admin,
+    get_cached_user,
+    invalidate_user_cache,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
+from ..core.passwords import password_service
 
 router = APIRouter()
 
@@ -38,13 +41,19 @@ async def register(user_data: UserCreate):
         "email": user_data.email,
         "name": user_data.name,
         "role": user_data.role,
-        "hashed_password": get_password_hash(user_data.password),
+        "hashed_password": await password_service.hash(user_data.password),
         "is_active": True,
         "created_at": datetime.utcnow()
     }
 
-    # Insert into database
-    result = await db.db["users"].insert_one(user_dict)
+    # Insert into database (the unique index catches concurrent registrations)
+    try:
+        result = await db.db["users"].insert_one(user_dict)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El email ya está registrado"
+        )
     created_user = await db.db["users"].find_one({"_id": result.inserted_id})
 
     if not created_user:
@@ -78,7 +87,7 @@ async def login(credentials: UserLogin):
         )
 
     # Verify password
-    if not verify_password(credentials.password, user["hashed_password"]):
+    if not await password_service.verify(credentials.password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email o contraseña incorrectos",
@@ -107,7 +116,7 @@ async def login(credentials: UserLogin):
 @router.get("/me", response_model=UserResponse)
 async def get_me(current_user: dict = Depends(get_current_user)):
     """Get current authenticated user info."""
-    user = await db.db["users"].find_one({"_id": ObjectId(current_user["id"])})
+    user = await get_cached_user(current_user["id"])
 
     if not user:
         raise HTTPException(
@@ -115,15 +124,13 @@ async def get_me(current_user: dict = Depends(get_current_user)):
             detail="Usuario no encontrado"
         )
 
-    user = convert_document(user)
-
     return UserResponse(
-        id=user["_id"],
+        id=user["id"],
         email=user["email"],
         name=user["name"],
-        role=user.get("role", "user"),
-        is_active=user.get("is_active", True),
-        created_at=user.get("created_at") or datetime.utcnow()
+        role=user["role"],
+        is_active=user["is_active"],
+        created_at=user["created_at"] or datetime.utcnow()
     )
 
 @router.post("/change-password")
@@ -142,7 +149,7 @@ async def change_password(
         )
 
     # Verify old password
-    if not verify_password(old_password, user["hashed_password"]):
+    if not await password_service.verify(old_password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Contraseña actual incorrecta"
@@ -151,7 +158,13 @@ async def change_password(
     # Update password
     await db.db["users"].update_one(
         {"_id": ObjectId(current_user["id"])},
-        {"$set": {"hashed_password": get_password_hash(new_password)}}
+        {"$set": {"hashed_password": await password_service.hash(new_password)}}
     )
+    invalidate_user_cache(current_user["id"])
 
     return {"message": "Contraseña actualizada exitosamente"}
+
+@router.get("/password-pool")
+async def get_password_pool_stats(current_user: dict = Depends(get_current_admin)):
+    """Queue and timing stats of the bcrypt worker pool (admin only)."""
+    return password_service.stats()
@@ -1,6 +1,8 @@
 # backend/app/api/cycles.py
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from typing import List, Dict, Any
 from bson import ObjectId
 
@@ -8,9 +10,15 @@ from .. import database as db
 from ..models.cycle import CycleCreate, CycleInDB
 from ..models.trading_account import TradingAccountInDB
 from ..models.tiro import TiroInDB
+from ..core.columnar import COLUMNAR_MEDIA_TYPE, wants_columnar, to_columnar, tiros_to_columnar
 
 router = APIRouter()
 
+# Credenciales MT5: nunca salen en el dashboard
+DASHBOARD_ACCOUNT_PROJECTION = {"login": 0, "password": 0, "server": 0}
+CREDENTIAL_FIELDS = {"login", "password", "server"}
+ACCOUNT_DICTIONARY_FIELDS = ("phase", "status", "propFirm", "nombre_kyc", "kycId", "cycleId")
+
 def convert_document(document: dict):
     """Convierte el _id de ObjectId a string."""
     if "_id" in document and isinstance(document["_id"], ObjectId):
@@ -173,10 +181,13 @@ async def delete_cycle(cycle_id: str):
     return
 
 @router.get("/{cycle_id}/dashboard", response_model=Dict[str, Any])
-async def get_cycle_dashboard(cycle_id: str):
+async def get_cycle_dashboard(cycle_id: str, request: Request):
     """
     Obtiene una vista de dashboard completa para un ciclo específico,
     incluyendo resúmenes, cuentas y tiros.
+
+    Con ?format=columnar (o Accept: application/vnd.gtfunds.columnar+json)
+    cuentas y tiros se devuelven en formato columnar (ver core/columnar.py).
     """
     if not ObjectId.is_valid(cycle_id):
         raise HTTPException(status_code=400, detail="ID de ciclo no válido.")
@@ -186,46 +197,25 @@ async def get_cycle_dashboard(cycle_id: str):
     if not cycle_document:
         raise HTTPException(status_code=404, detail="Ciclo no encontrado.")
 
-    # 2. Obtener todas las cuentas asociadas a este ciclo
+    # 2. Obtener todas las cuentas asociadas a este ciclo (nombre_kyc ya viene
+    #    en la cuenta, ver services/display_labels.py)
     accounts_list = []
-    accounts_cursor = db.db["trading_accounts"].find({"cycleId": cycle_id})
+    accounts_cursor = db.db["trading_accounts"].find({"cycleId": cycle_id}, DASHBOARD_ACCOUNT_PROJECTION)
     async for acc_doc in accounts_cursor:
-        # Convertir el _id ANTES de poblar el KYC
         acc_doc = convert_document(acc_doc)
-        
-        # Poblamos la información del KYC para cada cuenta
-        kyc_info = await db.db["kycs"].find_one({"_id": ObjectId(acc_doc["kycId"])})
-        acc_doc["nombre_kyc"] = kyc_info.get("name", "N/A") if kyc_info else "N/A"
-        
-        # Validar con el modelo DESPUÉS de añadir el nombre del KYC
         validated_account = TradingAccountInDB.model_validate(acc_doc)
         accounts_list.append(validated_account)
     
-    # 3. Obtener todos los tiros asociados a este ciclo
+    # 3. Obtener todos los tiros asociados a este ciclo (con leg1/leg2_accountNumber
+    #    ya guardados en el tiro)
     tiros_list = []
     tiros_cursor = db.db["tiros"].find({"cycleId": cycle_id})
     async for tiro_doc in tiros_cursor:
-        # IMPORTANTE: Convertir el _id ANTES de poblar información adicional
         tiro_doc = convert_document(tiro_doc)
 
         # Migrar estructura antigua a nueva si es necesario
         tiro_doc = migrate_old_tiro_structure(tiro_doc)
 
-        # Añadir información adicional de las cuentas involucradas (primera cuenta de cada leg)
-        if tiro_doc["leg1"]["accounts"] and tiro_doc["leg1"]["accounts"][0]["accountId"]:
-            leg1_account_id = tiro_doc["leg1"]["accounts"][0]["accountId"]
-            if ObjectId.is_valid(leg1_account_id):
-                leg1_account = await db.db["trading_accounts"].find_one({"_id": ObjectId(leg1_account_id)})
-                if leg1_account:
-                    tiro_doc["leg1_accountNumber"] = leg1_account.get("accountNumber", "N/A")
-
-        if tiro_doc["leg2"]["accounts"] and tiro_doc["leg2"]["accounts"][0]["accountId"]:
-            leg2_account_id = tiro_doc["leg2"]["accounts"][0]["accountId"]
-            if ObjectId.is_valid(leg2_account_id):
-                leg2_account = await db.db["trading_accounts"].find_one({"_id": ObjectId(leg2_account_id)})
-                if leg2_account:
-                    tiro_doc["leg2_accountNumber"] = leg2_account.get("accountNumber", "N/A")
-
         tiros_list.append(TiroInDB.model_validate(tiro_doc))
 
     # 4. Calcular el resumen del ciclo
@@ -258,12 +248,11 @@ async def get_cycle_dashboard(cycle_id: str):
     # 6. Construir y devolver la respuesta completa
     
     # Serializar cuentas con el campo 'id' explícito
+    # (sin credenciales MT5)
     cuentas_serializadas = []
     for acc in accounts_list:
-        acc_dict = acc.model_dump()
-        # Asegurar que 'id' esté presente
-        if 'id' not in acc_dict and '_id' in acc_dict:
-            acc_dict['id'] = acc_dict['_id']
+        acc_dict = acc.model_dump(exclude=CREDENTIAL_FIELDS)
+        acc_dict["nombre_kyc"] = acc.nombre_kyc or "N/A"
         cuentas_serializadas.append(acc_dict)
     
     # Serializar tiros con el campo 'id' explícito
@@ -291,4 +280,14 @@ async def get_cycle_dashboard(cycle_id: str):
         "tiros": tiros_serializados
     }
 
+    if wants_columnar(request):
+        tables = tiros_to_columnar(tiros_serializados)
+        dashboard_data.update({
+            "encoding": "columnar",
+            "cuentas": to_columnar(cuentas_serializadas, ACCOUNT_DICTIONARY_FIELDS),
+            "tiros": tables["tiros"],
+            "operaciones": tables["operations"],
+        })
+        return JSONResponse(jsonable_encoder(dashboard_data), media_type=COLUMNAR_MEDIA_TYPE)
+
     return dashboard_data
\ No newline at end of file
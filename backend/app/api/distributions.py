@@ -0,0 +1,55 @@
+# backend/app/api/distributions.py
+
+from fastapi import APIRouter, HTTPException, status
+from typing import List
+from bson import ObjectId
+
+from .. import database as db
+from ..models.distribution import DistributionInDB, DistributionRunRequest, DistributionRunResult
+from ..services.distribution import run_distribution
+
+router = APIRouter()
+
+def convert_document(document: dict):
+    """Convierte el _id de ObjectId a string."""
+    if "_id" in document and isinstance(document["_id"], ObjectId):
+        document["_id"] = str(document["_id"])
+    return document
+
+@router.post("/run", response_model=DistributionRunResult)
+async def run_distributions(request: DistributionRunRequest):
+    """
+    Calcula (y persiste, salvo dryRun) la distribución de profits de varios ciclos.
+    Sin cycleIds se procesan todos los ciclos completados.
+    """
+    for cycle_id in request.cycleIds or []:
+        if not ObjectId.is_valid(cycle_id):
+            raise HTTPException(status_code=400, detail=f"ID de ciclo no válido: {cycle_id}")
+    return await run_distribution(request.cycleIds, dry_run=request.dryRun)
+
+@router.post("/cycle/{cycle_id}", response_model=DistributionRunResult)
+async def run_cycle_distribution(cycle_id: str, dry_run: bool = False):
+    """Calcula la distribución de profits de un ciclo."""
+    if not ObjectId.is_valid(cycle_id):
+        raise HTTPException(status_code=400, detail=f"ID de ciclo no válido: {cycle_id}")
+    if not await db.db["cycles"].find_one({"_id": ObjectId(cycle_id)}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail=f"Ciclo no encontrado: {cycle_id}")
+    return await run_distribution([cycle_id], dry_run=dry_run)
+
+@router.get("/cycle/{cycle_id}", response_model=List[DistributionInDB])
+async def list_cycle_distributions(cycle_id: str):
+    """Obtiene las distribuciones calculadas de un ciclo."""
+    if not ObjectId.is_valid(cycle_id):
+        raise HTTPException(status_code=400, detail=f"ID de ciclo no válido: {cycle_id}")
+
+    cursor = db.db["distributions"].find({"cycleId": cycle_id}).sort("investorProfit", -1)
+    return [DistributionInDB.model_validate(convert_document(doc)) async for doc in cursor]
+
+@router.get("/investor/{investor_id}", response_model=List[DistributionInDB])
+async def list_investor_distributions(investor_id: str):
+    """Obtiene las distribuciones calculadas de un inversor en todos sus ciclos."""
+    if not ObjectId.is_valid(investor_id):
+        raise HTTPException(status_code=400, detail=f"ID de inversor no válido: {investor_id}")
+
+    cursor = db.db["distributions"].find({"investorId": investor_id}).sort("calculatedAt", -1)
+    return [DistributionInDB.model_validate(convert_document(doc)) async for doc in cursor]
@@ -0,0 +1,52 @@
+# backend/app/api/exposure.py
+
+from fastapi import APIRouter, HTTPException
+from typing import List, Optional
+from bson import ObjectId
+
+from ..models.exposure import ExposureEntry, CycleExposure, ExposureRebuildResult
+from ..services import exposure
+
+router = APIRouter()
+
+def to_entry(document: dict) -> ExposureEntry:
+    entry = ExposureEntry.model_validate(document)
+    if entry.scope == "cycle":
+        entry.unbalanced = exposure.is_unbalanced(document)
+    return entry
+
+@router.get("/accounts/{account_id}", response_model=List[ExposureEntry])
+async def get_account_exposure(account_id: str, symbol: Optional[str] = None):
+    """Exposición neta abierta de una cuenta por símbolo (con ?symbol=, un único find por _id)."""
+    if not ObjectId.is_valid(account_id):
+        raise HTTPException(status_code=400, detail=f"ID de cuenta no válido: {account_id}")
+    return [to_entry(doc) for doc in await exposure.account_exposure(account_id, symbol)]
+
+@router.get("/cycles/{cycle_id}", response_model=CycleExposure)
+async def get_cycle_exposure(cycle_id: str):
+    """Roll-up por símbolo del ciclo, exposición por cuenta y coberturas desbalanceadas."""
+    if not ObjectId.is_valid(cycle_id):
+        raise HTTPException(status_code=400, detail=f"ID de ciclo no válido: {cycle_id}")
+    entries = [to_entry(doc) for doc in await exposure.cycle_exposure(cycle_id)]
+    symbols = [e for e in entries if e.scope == "cycle"]
+    return CycleExposure(
+        cycleId=cycle_id,
+        symbols=symbols,
+        accounts=[e for e in entries if e.scope == "account"],
+        unbalanced=[e for e in symbols if e.unbalanced],
+    )
+
+@router.get("/unbalanced", response_model=List[ExposureEntry])
+async def list_unbalanced_hedges(cycle_id: Optional[str] = None):
+    """Ciclo/símbolo cuyo volumen BUY y SELL abierto no se compensa (leg1 vs leg2)."""
+    if cycle_id is not None and not ObjectId.is_valid(cycle_id):
+        raise HTTPException(status_code=400, detail=f"ID de ciclo no válido: {cycle_id}")
+    return [to_entry(doc) for doc in await exposure.unbalanced_hedges(cycle_id)]
+
+@router.post("/rebuild", response_model=ExposureRebuildResult)
+async def rebuild_exposure_index():
+    """Reconstruye el índice desde los tiros abiertos (repara desfases sin replica set)."""
+    result = await exposure.rebuild_exposures()
+    if result is None:
+        raise HTTPException(status_code=409, detail="Ya hay una reconstrucción del índice de exposición en curso")
+    return result
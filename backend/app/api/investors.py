@@ -1,9 +1,11 @@
 # backend/app/api/investors.py
 
-from fastapi import APIRouter, HTTPException, status
-from typing import List
+import asyncio
+from fastapi import APIRouter, HTTPException, status, Query
+from typing import List, Optional, Dict, Any
 from bson import ObjectId
 from datetime import datetime
+from pymongo import ReturnDocument
 from pymongo.errors import DuplicateKeyError
 
 from .. import database as db
@@ -12,6 +14,7 @@ from ..models.investor import (
     InvestorInDB,
     InvestorUpdate,
     InvestmentCreate,
+    InvestmentInDB,
     InvestmentUpdate
 )
 
@@ -27,8 +30,9 @@ def convert_document(document: dict):
 async def create_investor(investor: InvestorCreate):
     """Crea un nuevo inversor."""
     investor_dict = investor.model_dump()
-    investor_dict["investments"] = []
     investor_dict["totalInvested"] = 0.0
+    investor_dict["investmentCount"] = 0
+    investor_dict["activeInvestmentCount"] = 0
 
     try:
         result = await db.db["investors"].insert_one(investor_dict)
@@ -100,6 +104,8 @@ async def delete_investor(investor_id: str):
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail=f"Inversor no encontrado: {investor_id}")
 
+    await db.db["investments"].delete_many({"investorId": investor_id})
+
     return
 
 # ============================================
@@ -108,63 +114,181 @@ async def delete_investor(investor_id: str):
 
 @router.post("/{investor_id}/investments", response_model=InvestorInDB)
 async def add_investment(investor_id: str, investment: InvestmentCreate):
-    """Agrega una inversión a un inversor."""
+    """
+    Agrega una inversión a un inversor.
+
+    La inversión se guarda en la colección `investments` y los totales del
+    inversor se actualizan con $inc, así que inversiones concurrentes no se pisan.
+    Ambas escrituras van en una transacción (database.run_in_transaction())
+    para que el insert y los totales confirmen o fallen juntos; inversiones
+    simultáneas del mismo inversor chocan en su documento y se reintentan.
+    """
     if not ObjectId.is_valid(investor_id):
         raise HTTPException(status_code=400, detail=f"ID de inversor no válido: {investor_id}")
 
-    # Validar que el inversor existe
-    investor = await db.db["investors"].find_one({"_id": ObjectId(investor_id)})
-    if not investor:
-        raise HTTPException(status_code=404, detail=f"Inversor no encontrado: {investor_id}")
-
-    # Validar que el ciclo existe
     if not ObjectId.is_valid(investment.cycleId):
         raise HTTPException(status_code=400, detail=f"ID de ciclo no válido: {investment.cycleId}")
 
-    cycle = await db.db["cycles"].find_one({"_id": ObjectId(investment.cycleId)})
+    # Validar que el inversor y el ciclo existen
+    investor, cycle = await asyncio.gather(
+        db.db["investors"].find_one({"_id": ObjectId(investor_id)}, {"_id": 1}),
+        db.db["cycles"].find_one({"_id": ObjectId(investment.cycleId)}, {"_id": 1}),
+    )
+    if not investor:
+        raise HTTPException(status_code=404, detail=f"Inversor no encontrado: {investor_id}")
     if not cycle:
         raise HTTPException(status_code=404, detail=f"Ciclo no encontrado: {investment.cycleId}")
 
     # Crear la inversión
     investment_dict = investment.model_dump()
+    investment_dict["investorId"] = investor_id
     investment_dict["investmentDate"] = datetime.utcnow()
     investment_dict["status"] = "Active"
+    async def write(session) -> dict:
+        await db.db["investments"].insert_one(investment_dict, session=session)
+
+        # Actualizar los totales del inversor de forma atómica
+        updated_doc = await db.db["investors"].find_one_and_update(
+            {"_id": ObjectId(investor_id)},
+            {"$inc": {
+                "totalInvested": investment.amount,
+                "investmentCount": 1,
+                "activeInvestmentCount": 1,
+            }},
+            return_document=ReturnDocument.AFTER,
+            session=session,
+        )
 
-    # Actualizar el inversor
-    new_total = investor.get("totalInvested", 0.0) + investment.amount
-
-    result = await db.db["investors"].update_one(
-        {"_id": ObjectId(investor_id)},
-        {
-            "$push": {"investments": investment_dict},
-            "$set": {"totalInvested": new_total}
-        }
-    )
+        # Dentro de la transacción: la excepción la aborta y deshace el insert
+        if not updated_doc:
+            raise HTTPException(status_code=500, detail="Error al agregar la inversión.")
+        return updated_doc
 
-    if result.modified_count == 0:
-        raise HTTPException(status_code=500, detail="Error al agregar la inversión.")
+    updated_doc = await db.run_in_transaction(write)
 
-    updated_doc = await db.db["investors"].find_one({"_id": ObjectId(investor_id)})
     return InvestorInDB.model_validate(convert_document(updated_doc))
 
-@router.get("/{investor_id}/investments")
-async def get_investor_investments(investor_id: str):
-    """Obtiene todas las inversiones de un inversor."""
+@router.put("/{investor_id}/investments/{investment_id}", response_model=InvestmentInDB)
+async def update_investment(investor_id: str, investment_id: str, investment_update: InvestmentUpdate):
+    """Actualiza una inversión y ajusta los totales del inversor con $inc."""
     if not ObjectId.is_valid(investor_id):
         raise HTTPException(status_code=400, detail=f"ID de inversor no válido: {investor_id}")
+    if not ObjectId.is_valid(investment_id):
+        raise HTTPException(status_code=400, detail=f"ID de inversión no válido: {investment_id}")
 
-    investor = await db.db["investors"].find_one({"_id": ObjectId(investor_id)})
-    if not investor:
-        raise HTTPException(status_code=404, detail=f"Inversor no encontrado: {investor_id}")
+    update_data = investment_update.model_dump(exclude_unset=True)
+    if not update_data:
+        raise HTTPException(status_code=400, detail="No se proporcionaron datos para actualizar.")
 
-    investments = investor.get("investments", [])
+    # Devuelve el documento ANTES del cambio para calcular los deltas
+    previous = await db.db["investments"].find_one_and_update(
+        {"_id": ObjectId(investment_id), "investorId": investor_id},
+        {"$set": update_data},
+        return_document=ReturnDocument.BEFORE
+    )
+    if not previous:
+        raise HTTPException(status_code=404, detail=f"Inversión no encontrada: {investment_id}")
+
+    increments = {}
+    if update_data.get("amount") is not None:
+        delta = update_data["amount"] - previous.get("amount", 0.0)
+        if delta:
+            increments["totalInvested"] = delta
+    if "status" in update_data:
+        was_active = previous.get("status") == "Active"
+        is_active = update_data["status"] == "Active"
+        if was_active != is_active:
+            increments["activeInvestmentCount"] = 1 if is_active else -1
+
+    if increments:
+        await db.db["investors"].update_one({"_id": ObjectId(investor_id)}, {"$inc": increments})
+
+    updated_doc = {**previous, **update_data}
+    return InvestmentInDB.model_validate(convert_document(updated_doc))
+
+async def _cycle_names(cycle_ids) -> Dict[str, str]:
+    """Nombres de varios ciclos con una sola consulta."""
+    object_ids = [ObjectId(c) for c in set(cycle_ids) if ObjectId.is_valid(c)]
+    if not object_ids:
+        return {}
+    cursor = db.db["cycles"].find({"_id": {"$in": object_ids}}, {"name": 1})
+    return {str(doc["_id"]): doc.get("name") async for doc in cursor}
+
+@router.get("/{investor_id}/investments", response_model=Dict[str, Any])
+async def get_investor_investments(
+    investor_id: str,
+    skip: int = Query(0, ge=0, description="Número de registros a saltar"),
+    limit: int = Query(100, ge=1, le=500, description="Número máximo de registros a retornar"),
+    cycleId: Optional[str] = Query(None, description="Filtrar por ciclo")
+):
+    """Obtiene las inversiones de un inversor, paginadas y con el nombre del ciclo."""
+    if not ObjectId.is_valid(investor_id):
+        raise HTTPException(status_code=400, detail=f"ID de inversor no válido: {investor_id}")
 
-    # Enriquecer con información de los ciclos
-    enriched_investments = []
-    for inv in investments:
-        cycle = await db.db["cycles"].find_one({"_id": ObjectId(inv["cycleId"])})
-        inv_copy = inv.copy()
-        inv_copy["cycleName"] = cycle.get("name") if cycle else "Ciclo no encontrado"
-        enriched_investments.append(inv_copy)
+    query_filter = {"investorId": investor_id}
+    if cycleId:
+        query_filter["cycleId"] = cycleId
 
-    return enriched_investments
+    cursor = db.db["investments"].find(query_filter).sort("investmentDate", -1).skip(skip).limit(limit)
+    total, documents = await asyncio.gather(
+        db.db["investments"].count_documents(query_filter),
+        cursor.to_list(length=limit),
+    )
+
+    # Enriquecer con información de los ciclos (una sola consulta)
+    cycle_names = await _cycle_names(doc["cycleId"] for doc in documents)
+    investments_list = []
+    for doc in documents:
+        doc["cycleName"] = cycle_names.get(doc["cycleId"], "Ciclo no encontrado")
+        investments_list.append(InvestmentInDB.model_validate(convert_document(doc)))
+
+    return {
+        "data": investments_list,
+        "total": total,
+        "skip": skip,
+        "limit": limit,
+        "hasMore": skip + len(investments_list) < total
+    }
+
+@router.get("/cycle/{cycle_id}/investments", response_model=Dict[str, Any])
+async def get_cycle_investments(
+    cycle_id: str,
+    skip: int = Query(0, ge=0, description="Número de registros a saltar"),
+    limit: int = Query(100, ge=1, le=500, description="Número máximo de registros a retornar")
+):
+    """Obtiene las inversiones de todos los inversores en un ciclo, paginadas."""
+    if not ObjectId.is_valid(cycle_id):
+        raise HTTPException(status_code=400, detail=f"ID de ciclo no válido: {cycle_id}")
+
+    query_filter = {"cycleId": cycle_id}
+    cursor = db.db["investments"].find(query_filter).sort("amount", -1).skip(skip).limit(limit)
+    totals_pipeline = [
+        {"$match": query_filter},
+        {"$group": {"_id": None, "total": {"$sum": 1}, "totalAmount": {"$sum": "$amount"}}},
+    ]
+    documents, totals = await asyncio.gather(
+        cursor.to_list(length=limit),
+        db.db["investments"].aggregate(totals_pipeline).to_list(length=1),
+    )
+    totals = totals[0] if totals else {"total": 0, "totalAmount": 0.0}
+
+    # Nombres de los inversores (una sola consulta)
+    investor_ids = [ObjectId(doc["investorId"]) for doc in documents if ObjectId.is_valid(doc["investorId"])]
+    investor_names = {}
+    if investor_ids:
+        async for inv in db.db["investors"].find({"_id": {"$in": investor_ids}}, {"name": 1}):
+            investor_names[str(inv["_id"])] = inv.get("name")
+
+    investments_list = []
+    for doc in documents:
+        doc["investorName"] = investor_names.get(doc["investorId"], "Inversor no encontrado")
+        investments_list.append(InvestmentInDB.model_validate(convert_document(doc)))
+
+    return {
+        "data": investments_list,
+        "total": totals["total"],
+        "totalAmount": round(totals["totalAmount"], 2),
+        "skip": skip,
+        "limit": limit,
+        "hasMore": skip + len(investments_list) < totals["total"]
+    }
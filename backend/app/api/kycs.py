@@ -1,12 +1,16 @@
 # backend/app/api/kycs.py
 
-from fastapi import APIRouter, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status, Query
 from typing import List, Optional, Dict, Any
 from bson import ObjectId
+from pydantic import ValidationError
 from pymongo.errors import DuplicateKeyError
 
 from .. import database as db
 from ..models.kyc import KycCreate, KycInDB
+from ..models.trading_account import TradingAccountInDB
+from ..models.payout import PayoutInDB
+from ..services import display_labels
 
 router = APIRouter()
 
@@ -80,9 +84,104 @@ async def get_kyc_record(kyc_id: str):
 
     raise HTTPException(status_code=404, detail=f"No se encontró el registro KYC con ID {kyc_id}.")
 
+OVERVIEW_SECTIONS = {"profile", "accounts", "payouts", "totals"}
+
+# --- Endpoint compuesto: perfil + cuentas + payouts + totales en una sola agregación ---
+@router.get("/{kyc_id}/overview", response_model=Dict[str, Any])
+async def get_kyc_overview(
+    kyc_id: str,
+    fields: Optional[str] = Query(
+        None,
+        description="Secciones a incluir separadas por coma: profile,accounts,payouts,totals (por defecto todas)"
+    )
+):
+    if not ObjectId.is_valid(kyc_id):
+        raise HTTPException(status_code=400, detail=f"El ID '{kyc_id}' no es válido.")
+
+    sections = OVERVIEW_SECTIONS
+    if fields:
+        sections = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = sections - OVERVIEW_SECTIONS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Secciones no válidas: {', '.join(sorted(unknown))}")
+
+    # Si no se piden las listas, el lookup solo trae lo necesario para los totales
+    account_fields = [] if "accounts" in sections else [{"$project": {"_id": 0, "cost": 1}}]
+    payout_fields = [] if "payouts" in sections else [{"$project": {"_id": 0, "amount": 1}}]
+
+    pipeline = [
+        {"$match": {"_id": ObjectId(kyc_id)}},
+        {"$addFields": {"kycIdStr": {"$toString": "$_id"}}},
+        {"$lookup": {
+            "from": "trading_accounts",
+            "localField": "kycIdStr",
+            "foreignField": "kycId",
+            "as": "accounts",
+            "pipeline": account_fields,
+        }},
+        {"$lookup": {
+            "from": "payouts",
+            "localField": "kycIdStr",
+            "foreignField": "kycId",
+            "as": "payouts",
+            "pipeline": [{"$sort": {"payoutDate": -1}}, *payout_fields],
+        }},
+        {"$addFields": {
+            "totals": {
+                "totalCost": {"$sum": "$accounts.cost"},
+                "totalPayouts": {"$sum": "$payouts.amount"},
+                "accountsCount": {"$size": "$accounts"},
+                "payoutsCount": {"$size": "$payouts"},
+            }
+        }},
+        {"$project": {"kycIdStr": 0}},
+    ]
+
+    documents = await db.db["kycs"].aggregate(pipeline).to_list(length=1)
+    if not documents:
+        raise HTTPException(status_code=404, detail=f"No se encontró el registro KYC con ID {kyc_id}.")
+
+    document = documents[0]
+    accounts = document.pop("accounts")
+    payouts = document.pop("payouts")
+    totals = document.pop("totals")
+
+    overview = {}
+    if "profile" in sections:
+        overview["profile"] = KycInDB.model_validate(convert_document(document))
+
+    if "accounts" in sections:
+        overview["accounts"] = []
+        for acc_doc in accounts:
+            try:
+                overview["accounts"].append(TradingAccountInDB.model_validate(convert_document(acc_doc)))
+            except ValidationError as e:
+                print(f"Documento de cuenta inválido omitido: {e}")
+
+    if "payouts" in sections:
+        overview["payouts"] = []
+        for payout_doc in payouts:
+            try:
+                overview["payouts"].append(PayoutInDB.model_validate(convert_document(payout_doc)))
+            except ValidationError as e:
+                print(f"Documento de payout inválido omitido para kyc_id {kyc_id}: {e}")
+
+    if "totals" in sections:
+        total_cost = totals["totalCost"] or 0.0
+        total_payouts = totals["totalPayouts"] or 0.0
+        overview["totals"] = {
+            "totalCost": round(total_cost, 2),
+            "totalPayouts": round(total_payouts, 2),
+            "netProfitability": round(total_payouts - total_cost, 2),
+            "accountsCount": totals["accountsCount"],
+            "payoutsCount": totals["payoutsCount"],
+        }
+
+    return overview
+
 # --- Endpoint para ACTUALIZAR un registro por ID ---
 @router.put("/{kyc_id}", response_model=KycInDB)
-async def update_kyc_record(kyc_id: str, kyc_update_data: KycCreate):
+async def update_kyc_record(kyc_id: str, kyc_update_data: KycCreate, background_tasks: BackgroundTasks):
     if not ObjectId.is_valid(kyc_id):
         raise HTTPException(status_code=400, detail=f"El ID '{kyc_id}' no es válido.")
 
@@ -98,6 +197,9 @@ async def update_kyc_record(kyc_id: str, kyc_update_data: KycCreate):
 
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail=f"No se encontró el registro KYC con ID {kyc_id}.")
+    if "name" in update_data_dict and result.modified_count:
+        # nombre_kyc de sus cuentas se reescribe tras responder
+        background_tasks.add_task(display_labels.propagate_kyc_name, kyc_id)
 
     updated_document = await db.db["kycs"].find_one({"_id": ObjectId(kyc_id)})
     converted_doc = convert_document(updated_document)
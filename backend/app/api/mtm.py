@@ -0,0 +1,86 @@
+# backend/app/api/mtm.py
+
+import json
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from bson import ObjectId
+
+from ..services.mark_to_market import mark_to_market
+
+router = APIRouter()
+
+def current_snapshot() -> dict:
+    if not mark_to_market.running:
+        raise HTTPException(status_code=503, detail="Mark-to-market deshabilitado (configura MTM_FEED)")
+    if mark_to_market.snapshot is None:
+        raise HTTPException(status_code=503, detail="Mark-to-market todavía sin datos", headers={"Retry-After": "1"})
+    return mark_to_market.snapshot
+
+def cycle_view(snapshot: dict, cycle_id: str) -> dict:
+    """P&L no realizado de un ciclo, por tiro y por cuenta."""
+    return {
+        "cycleId": cycle_id,
+        "asOf": snapshot["asOf"],
+        "unrealizedPnl": snapshot["cycles"].get(cycle_id, 0.0),
+        "tiros": [
+            {"tiroId": tiro_id, **{k: v for k, v in row.items() if k != "cycleId"}}
+            for tiro_id, row in snapshot["tiros"].items() if row["cycleId"] == cycle_id
+        ],
+        "accounts": [
+            {"accountId": account_id, "unrealizedPnl": row["unrealizedPnl"]}
+            for account_id, row in snapshot["accounts"].items() if row["cycleId"] == cycle_id
+        ],
+    }
+
+def summary_view(snapshot: dict) -> dict:
+    return {
+        "asOf": snapshot["asOf"],
+        "positions": snapshot["positions"],
+        "unpriced": snapshot["unpriced"],
+        "cycles": snapshot["cycles"],
+    }
+
+@router.get("/")
+async def get_mark_to_market_summary():
+    """P&L no realizado por ciclo y estado del feed."""
+    return {**summary_view(current_snapshot()), "feed": mark_to_market.stats()}
+
+@router.get("/cycles/{cycle_id}")
+async def get_cycle_unrealized_pnl(cycle_id: str):
+    """P&L no realizado de un ciclo, desglosado por tiro y por cuenta."""
+    if not ObjectId.is_valid(cycle_id):
+        raise HTTPException(status_code=400, detail=f"ID de ciclo no válido: {cycle_id}")
+    return cycle_view(current_snapshot(), cycle_id)
+
+@router.get("/tiros/{tiro_id}")
+async def get_tiro_unrealized_pnl(tiro_id: str):
+    """P&L no realizado de un tiro abierto."""
+    snapshot = current_snapshot()
+    row = snapshot["tiros"].get(tiro_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Tiro abierto no encontrado o sin operaciones abiertas: {tiro_id}")
+    return {"tiroId": tiro_id, "asOf": snapshot["asOf"], **row}
+
+@router.get("/stream")
+async def stream_unrealized_pnl(request: Request, cycle_id: Optional[str] = None):
+    """
+    Server-Sent Events con cada revaluación: totales por ciclo o, con
+    ?cycle_id=, el desglose de ese ciclo.
+    """
+    if cycle_id is not None and not ObjectId.is_valid(cycle_id):
+        raise HTTPException(status_code=400, detail=f"ID de ciclo no válido: {cycle_id}")
+    if not mark_to_market.running:
+        raise HTTPException(status_code=503, detail="Mark-to-market deshabilitado (configura MTM_FEED)")
+
+    async def events():
+        async for snapshot in mark_to_market.updates():
+            if await request.is_disconnected():
+                break
+            payload = cycle_view(snapshot, cycle_id) if cycle_id else summary_view(snapshot)
+            yield f"data: {json.dumps(jsonable_encoder(payload))}\n\n"
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
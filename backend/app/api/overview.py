@@ -0,0 +1,179 @@
+# backend/app/api/overview.py
+
+import asyncio
+from datetime import datetime
+from typing import Dict, Any, List
+
+from fastapi import APIRouter, Query
+from bson import ObjectId
+
+from .. import database as db
+from ..core.cache import TTLCache
+from ..models.cycle import CycleInDB
+
+router = APIRouter()
+
+# Cache del overview. Se vacía en cuanto una escritura toca alguna de las
+# colecciones de las que depende (ver invalidate_overview_on_write).
+overview_cache = TTLCache(maxsize=16, ttl=60.0)
+
+OVERVIEW_SOURCES = (
+    "/api/v1/cycles",
+    "/api/v1/kycs",
+    "/api/v1/accounts",
+    "/api/v1/payouts",
+    "/api/v1/tiros",
+)
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+def convert_document(document: dict):
+    """Convierte el _id de ObjectId a string."""
+    if "_id" in document and isinstance(document["_id"], ObjectId):
+        document["_id"] = str(document["_id"])
+    return document
+
+async def invalidate_overview_on_write(request, call_next):
+    """Middleware: invalida el overview tras una escritura exitosa en sus colecciones."""
+    response = await call_next(request)
+    if (
+        request.method in WRITE_METHODS
+        and response.status_code < 400
+        and request.url.path.startswith(OVERVIEW_SOURCES)
+    ):
+        overview_cache.clear()
+    return response
+
+async def _platform_totals() -> Dict[str, Any]:
+    """Totales globales de la plataforma con una agregación por colección."""
+    accounts_pipeline = [
+        {"$group": {
+            "_id": None,
+            "totalAccounts": {"$sum": 1},
+            "activeAccounts": {"$sum": {"$cond": [{"$eq": ["$status", "Active"]}, 1, 0]}},
+            "totalAUM": {"$sum": "$accountSize"},
+            "totalCost": {"$sum": "$cost"},
+        }},
+    ]
+    payouts_pipeline = [
+        {"$group": {"_id": None, "totalPayouts": {"$sum": "$amount"}, "payoutsCount": {"$sum": 1}}},
+    ]
+    cycles_pipeline = [
+        {"$group": {
+            "_id": None,
+            "totalCycles": {"$sum": 1},
+            "activeCycles": {"$sum": {"$cond": [{"$eq": ["$status", "Activo"]}, 1, 0]}},
+        }},
+    ]
+
+    total_kycs, accounts, payouts, cycles = await asyncio.gather(
+        db.db["kycs"].count_documents({}),
+        db.db["trading_accounts"].aggregate(accounts_pipeline).to_list(length=1),
+        db.db["payouts"].aggregate(payouts_pipeline).to_list(length=1),
+        db.db["cycles"].aggregate(cycles_pipeline).to_list(length=1),
+    )
+    accounts = accounts[0] if accounts else {}
+    payouts = payouts[0] if payouts else {}
+    cycles = cycles[0] if cycles else {}
+
+    return {
+        "totalKycs": total_kycs,
+        "totalAccounts": accounts.get("totalAccounts", 0),
+        "activeAccounts": accounts.get("activeAccounts", 0),
+        "totalAUM": round(accounts.get("totalAUM", 0.0), 2),
+        "totalCost": round(accounts.get("totalCost", 0.0), 2),
+        "totalPayouts": round(payouts.get("totalPayouts", 0.0), 2),
+        "payoutsCount": payouts.get("payoutsCount", 0),
+        "totalCycles": cycles.get("totalCycles", 0),
+        "activeCycles": cycles.get("activeCycles", 0),
+    }
+
+async def _cycle_summaries(cycle_docs: List[dict]) -> List[Dict[str, Any]]:
+    """
+    Mismo `resumen` que /cycles/{id}/dashboard, pero para varios ciclos
+    con dos agregaciones en total (cuentas por fase y tiros por estado).
+    """
+    cycle_ids = [str(doc["_id"]) for doc in cycle_docs]
+
+    accounts_pipeline = [
+        {"$match": {"cycleId": {"$in": cycle_ids}}},
+        {"$group": {"_id": {"cycleId": "$cycleId", "phase": "$phase"}, "count": {"$sum": 1}}},
+    ]
+    tiros_pipeline = [
+        {"$match": {"cycleId": {"$in": cycle_ids}}},
+        {"$group": {
+            "_id": {"cycleId": "$cycleId", "status": "$status"},
+            "count": {"$sum": 1},
+            "result": {"$sum": {"$ifNull": ["$result", 0]}},
+        }},
+    ]
+    account_rows, tiro_rows = await asyncio.gather(
+        db.db["trading_accounts"].aggregate(accounts_pipeline).to_list(length=None),
+        db.db["tiros"].aggregate(tiros_pipeline).to_list(length=None),
+    )
+
+    phases = {cycle_id: {"fase1": 0, "fase2": 0, "real": 0, "quemada": 0} for cycle_id in cycle_ids}
+    totals = {cycle_id: 0 for cycle_id in cycle_ids}
+    for row in account_rows:
+        cycle_id, phase = row["_id"]["cycleId"], row["_id"].get("phase")
+        totals[cycle_id] += row["count"]
+        if phase in phases[cycle_id]:
+            phases[cycle_id][phase] += row["count"]
+
+    tiros = {cycle_id: {"total": 0, "Abierto": 0, "Cerrado": 0, "result": 0.0} for cycle_id in cycle_ids}
+    for row in tiro_rows:
+        stats = tiros[row["_id"]["cycleId"]]
+        stats["total"] += row["count"]
+        stats["result"] += row["result"]
+        if row["_id"].get("status") in ("Abierto", "Cerrado"):
+            stats[row["_id"]["status"]] += row["count"]
+
+    summaries = []
+    for doc in cycle_docs:
+        cycle_id = str(doc["_id"])
+        total_cuentas = totals[cycle_id]
+        cuentas_en_real = phases[cycle_id]["real"]
+        tasa_conversion = (cuentas_en_real / total_cuentas * 100) if total_cuentas > 0 else 0
+        summaries.append({
+            "metadata": CycleInDB.model_validate(convert_document(doc)),
+            "resumen": {
+                "totalCuentas": total_cuentas,
+                "cuentasPorFase": phases[cycle_id],
+                "cuentasEnReal": cuentas_en_real,
+                "tasaConversion": round(tasa_conversion, 2),
+                "totalTiros": tiros[cycle_id]["total"],
+                "tirosAbiertos": tiros[cycle_id]["Abierto"],
+                "tirosCerrados": tiros[cycle_id]["Cerrado"],
+                "resultadoTotalTiros": round(tiros[cycle_id]["result"], 2),
+            },
+        })
+    return summaries
+
+@router.get("/", response_model=Dict[str, Any])
+async def get_platform_overview(
+    cycles: int = Query(5, ge=1, le=50, description="Número de ciclos recientes a resumir")
+):
+    """
+    Vista general de la plataforma: totales globales y resumen de los N ciclos
+    más recientes. Se calcula con agregaciones y se cachea hasta la próxima escritura.
+    """
+    cache_key = ("overview", cycles)
+    cached = overview_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    generation = overview_cache.generation
+    recent_cycles = await db.db["cycles"].find().sort("startDate", -1).limit(cycles).to_list(length=cycles)
+    totals, summaries = await asyncio.gather(
+        _platform_totals(),
+        _cycle_summaries(recent_cycles),
+    )
+
+    overview = {
+        "totals": totals,
+        "recentCycles": summaries,
+        "generatedAt": datetime.utcnow(),
+    }
+    # Si hubo una escritura mientras calculábamos, no cachear un resultado viejo
+    if overview_cache.generation == generation:
+        overview_cache.set(cache_key, overview)
+    return overview
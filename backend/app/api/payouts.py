@@ -1,12 +1,16 @@
 # backend/app/api/payouts.py
 
-from fastapi import APIRouter, HTTPException, status
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Query
+from typing import List, Optional, Dict, Any
+from datetime import datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import re
 from bson import ObjectId
 from pydantic import ValidationError
 
 from .. import database as db
 from ..models.payout import PayoutCreate, PayoutInDB
+from ..services.distribution import payout_cycle_stages
 
 nested_router = APIRouter()
 direct_router = APIRouter()
@@ -16,6 +20,36 @@ def convert_document(document: dict):
         document["_id"] = str(document["_id"])
     return document
 
+def date_range_filter(date_from: Optional[datetime], date_to: Optional[datetime]) -> dict:
+    """Construye el filtro sobre payoutDate (rango semiabierto [from, to))."""
+    if date_from and date_to and date_from >= date_to:
+        raise HTTPException(status_code=400, detail="'from' debe ser anterior a 'to'.")
+    date_filter = {}
+    if date_from:
+        date_filter["$gte"] = date_from
+    if date_to:
+        date_filter["$lt"] = date_to
+    return {"payoutDate": date_filter} if date_filter else {}
+
+UTC_OFFSET = re.compile(r'^[+-]\d{2}(:?\d{2})?$')
+
+def validate_timezone(timezone: str) -> str:
+    """Zona IANA (Europe/Madrid) o desplazamiento (+02:00), como acepta $dateTrunc."""
+    if UTC_OFFSET.match(timezone):
+        return timezone
+    try:
+        ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Zona horaria no válida: {timezone}")
+    return timezone
+
+async def validate_payout_account(kyc_id: str, account_id: Optional[str]):
+    """Si el payout indica una cuenta, debe pertenecer al mismo KYC."""
+    if account_id and not await db.db["trading_accounts"].find_one(
+        {"_id": ObjectId(account_id), "kycId": kyc_id}, {"_id": 1}
+    ):
+        raise HTTPException(status_code=404, detail=f"La cuenta {account_id} no pertenece al KYC {kyc_id}")
+
 # --- Operaciones en el Router ANIDADO ---
 
 @nested_router.post("/", response_model=PayoutInDB, status_code=status.HTTP_201_CREATED)
@@ -23,7 +57,8 @@ async def create_payout(kyc_id: str, payout: PayoutCreate):
     """Crea un nuevo payout asociado a un KYC."""
     if not await db.db["kycs"].find_one({"_id": ObjectId(kyc_id)}):
         raise HTTPException(status_code=404, detail=f"No se encontró el KYC con ID {kyc_id}")
-        
+    await validate_payout_account(kyc_id, payout.accountId)
+
     payout_dict = payout.model_dump()
     payout_dict["kycId"] = kyc_id
     
@@ -37,10 +72,14 @@ async def create_payout(kyc_id: str, payout: PayoutCreate):
     raise HTTPException(status_code=500, detail="Error al crear el payout.")
 
 @nested_router.get("/", response_model=List[PayoutInDB])
-@nested_router.get("/", response_model=List[PayoutInDB])
-async def list_payouts_for_kyc(kyc_id: str):
+async def list_payouts_for_kyc(
+    kyc_id: str,
+    date_from: Optional[datetime] = Query(None, alias="from", description="Fecha inicial (incluida)"),
+    date_to: Optional[datetime] = Query(None, alias="to", description="Fecha final (excluida)")
+):
     payouts_list = []
-    payouts_cursor = db.db["payouts"].find({"kycId": kyc_id})
+    query_filter = {"kycId": kyc_id, **date_range_filter(date_from, date_to)}
+    payouts_cursor = db.db["payouts"].find(query_filter).sort("payoutDate", -1)
     
     async for document in payouts_cursor:
         try:
@@ -52,6 +91,190 @@ async def list_payouts_for_kyc(kyc_id: str):
             
     return payouts_list
 
+# --- Analítica de payouts (agregaciones en la base de datos) ---
+
+@direct_router.get("/analytics/summary", response_model=Dict[str, Any])
+async def payouts_summary(
+    date_from: Optional[datetime] = Query(None, alias="from", description="Fecha inicial (incluida)"),
+    date_to: Optional[datetime] = Query(None, alias="to", description="Fecha final (excluida)"),
+    kycId: Optional[str] = Query(None, description="Filtrar por KYC")
+):
+    """Total, cantidad y promedio de payouts en un rango de fechas."""
+    match = date_range_filter(date_from, date_to)
+    if kycId:
+        match["kycId"] = kycId
+
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": None,
+            "total": {"$sum": "$amount"},
+            "count": {"$sum": 1},
+            "first": {"$min": "$payoutDate"},
+            "last": {"$max": "$payoutDate"},
+        }},
+    ]
+    rows = await db.db["payouts"].aggregate(pipeline).to_list(length=1)
+    row = rows[0] if rows else {"total": 0.0, "count": 0, "first": None, "last": None}
+
+    return {
+        "from": date_from,
+        "to": date_to,
+        "total": round(row["total"], 2),
+        "count": row["count"],
+        "average": round(row["total"] / row["count"], 2) if row["count"] else 0.0,
+        "firstPayoutDate": row["first"],
+        "lastPayoutDate": row["last"],
+    }
+
+@direct_router.get("/analytics/timeseries", response_model=Dict[str, Any])
+async def payouts_timeseries(
+    granularity: str = Query("month", pattern=r'^(week|month)$', description="Agrupar por semana o mes"),
+    date_from: Optional[datetime] = Query(None, alias="from", description="Fecha inicial (incluida)"),
+    date_to: Optional[datetime] = Query(None, alias="to", description="Fecha final (excluida)"),
+    kycId: Optional[str] = Query(None, description="Filtrar por KYC"),
+    timezone: str = Query("UTC", description="Zona horaria para cortar los periodos")
+):
+    """Totales de payouts por semana o mes ($dateTrunc)."""
+    match = date_range_filter(date_from, date_to)
+    if kycId:
+        match["kycId"] = kycId
+
+    date_trunc = {"date": "$payoutDate", "unit": granularity, "timezone": validate_timezone(timezone)}
+    if granularity == "week":
+        date_trunc["startOfWeek"] = "monday"
+
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {"$dateTrunc": date_trunc},
+            "total": {"$sum": "$amount"},
+            "count": {"$sum": 1},
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+
+    buckets = []
+    async for row in db.db["payouts"].aggregate(pipeline):
+        buckets.append({"period": row["_id"], "total": round(row["total"], 2), "count": row["count"]})
+
+    return {
+        "granularity": granularity,
+        "from": date_from,
+        "to": date_to,
+        "buckets": buckets,
+        "total": round(sum(b["total"] for b in buckets), 2),
+        "count": sum(b["count"] for b in buckets),
+    }
+
+@direct_router.get("/analytics/by-kyc", response_model=List[Dict[str, Any]])
+async def payouts_by_kyc(
+    date_from: Optional[datetime] = Query(None, alias="from", description="Fecha inicial (incluida)"),
+    date_to: Optional[datetime] = Query(None, alias="to", description="Fecha final (excluida)"),
+    limit: int = Query(50, ge=1, le=500, description="Número máximo de KYCs")
+):
+    """Totales de payouts por KYC, de mayor a menor."""
+    pipeline = [
+        {"$match": date_range_filter(date_from, date_to)},
+        {"$group": {
+            "_id": "$kycId",
+            "total": {"$sum": "$amount"},
+            "count": {"$sum": 1},
+            "lastPayoutDate": {"$max": "$payoutDate"},
+        }},
+        {"$sort": {"total": -1}},
+        {"$limit": limit},
+        {"$lookup": {
+            "from": "kycs",
+            "let": {"kycId": {"$convert": {"input": "$_id", "to": "objectId", "onError": None, "onNull": None}}},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$_id", "$$kycId"]}}},
+                {"$project": {"_id": 0, "name": 1}},
+            ],
+            "as": "kyc",
+        }},
+        {"$project": {
+            "_id": 0,
+            "kycId": "$_id",
+            "nombre_kyc": {"$ifNull": [{"$first": "$kyc.name"}, "N/A"]},
+            "total": {"$round": ["$total", 2]},
+            "count": 1,
+            "lastPayoutDate": 1,
+        }},
+    ]
+    return [row async for row in db.db["payouts"].aggregate(pipeline)]
+
+@direct_router.get("/analytics/by-prop-firm", response_model=List[Dict[str, Any]])
+async def payouts_by_prop_firm(
+    date_from: Optional[datetime] = Query(None, alias="from", description="Fecha inicial (incluida)"),
+    date_to: Optional[datetime] = Query(None, alias="to", description="Fecha final (excluida)")
+):
+    """Totales de payouts por prop firm (a través de la cuenta del payout)."""
+    pipeline = [
+        {"$match": date_range_filter(date_from, date_to)},
+        {"$group": {"_id": "$accountId", "total": {"$sum": "$amount"}, "count": {"$sum": 1}}},
+        {"$lookup": {
+            "from": "trading_accounts",
+            "let": {"accountId": {"$convert": {"input": "$_id", "to": "objectId", "onError": None, "onNull": None}}},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$_id", "$$accountId"]}}},
+                {"$project": {"_id": 0, "propFirm": 1}},
+            ],
+            "as": "account",
+        }},
+        {"$group": {
+            "_id": {"$ifNull": [{"$first": "$account.propFirm"}, "Sin cuenta"]},
+            "total": {"$sum": "$total"},
+            "count": {"$sum": "$count"},
+        }},
+        {"$sort": {"total": -1}},
+        {"$project": {"_id": 0, "propFirm": "$_id", "total": {"$round": ["$total", 2]}, "count": 1}},
+    ]
+    return [row async for row in db.db["payouts"].aggregate(pipeline)]
+
+@direct_router.get("/analytics/by-cycle", response_model=List[Dict[str, Any]])
+async def payouts_by_cycle(
+    date_from: Optional[datetime] = Query(None, alias="from", description="Fecha inicial (incluida)"),
+    date_to: Optional[datetime] = Query(None, alias="to", description="Fecha final (excluida)")
+):
+    """
+    Totales de payouts por ciclo. El ciclo se toma de la cuenta del payout
+    y, si no tiene cuenta, del KYC.
+    """
+    pipeline = [
+        {"$match": date_range_filter(date_from, date_to)},
+        # Reducir primero a (kycId, accountId) para hacer menos lookups
+        {"$group": {
+            "_id": {"kycId": "$kycId", "accountId": "$accountId"},
+            "total": {"$sum": "$amount"},
+            "count": {"$sum": 1},
+        }},
+        *payout_cycle_stages(),
+        {"$group": {
+            "_id": "$cycleId",
+            "total": {"$sum": "$total"},
+            "count": {"$sum": "$count"},
+        }},
+        {"$lookup": {
+            "from": "cycles",
+            "let": {"cycleId": {"$convert": {"input": "$_id", "to": "objectId", "onError": None, "onNull": None}}},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$_id", "$$cycleId"]}}},
+                {"$project": {"_id": 0, "name": 1}},
+            ],
+            "as": "cycle",
+        }},
+        {"$sort": {"total": -1}},
+        {"$project": {
+            "_id": 0,
+            "cycleId": "$_id",
+            "cycleName": {"$ifNull": [{"$first": "$cycle.name"}, "Sin ciclo"]},
+            "total": {"$round": ["$total", 2]},
+            "count": 1,
+        }},
+    ]
+    return [row async for row in db.db["payouts"].aggregate(pipeline)]
+
 # --- Operaciones en el Router DIRECTO ---
 
 @direct_router.get("/{payout_id}", response_model=PayoutInDB)
@@ -71,6 +294,11 @@ async def update_payout(payout_id: str, payout_update: PayoutCreate):
     if not ObjectId.is_valid(payout_id):
         raise HTTPException(status_code=400, detail=f"ID de payout no válido: {payout_id}")
     update_data = payout_update.model_dump(exclude_unset=True)
+    if update_data.get("accountId"):
+        existing = await db.db["payouts"].find_one({"_id": ObjectId(payout_id)}, {"kycId": 1})
+        if not existing:
+            raise HTTPException(status_code=404, detail=f"Payout no encontrado: {payout_id}")
+        await validate_payout_account(existing["kycId"], update_data["accountId"])
     result = await db.db["payouts"].update_one({"_id": ObjectId(payout_id)}, {"$set": update_data})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail=f"Payout no encontrado: {payout_id}")
@@ -0,0 +1,24 @@
+# backend/app/api/profiles.py
+
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+
+from ..core.profiling import list_profiles, profile_dir
+from ..core.security import get_current_admin
+
+router = APIRouter()
+
+@router.get("/", response_model=List[dict])
+async def get_profiles(current_user: dict = Depends(get_current_admin)):
+    """Perfiles guardados por el profiler (X-Profile: 1), del más reciente al más antiguo."""
+    return list_profiles()
+
+@router.get("/{name}")
+async def download_profile(name: str, current_user: dict = Depends(get_current_admin)):
+    """Descarga un perfil (.prof para snakeviz/flameprof o .txt con el resumen)."""
+    path = profile_dir() / name
+    if "/" in name or "\\" in name or path.suffix not in (".prof", ".txt") or not path.is_file():
+        raise HTTPException(status_code=404, detail=f"Perfil {name} no encontrado")
+    return FileResponse(path, filename=name)
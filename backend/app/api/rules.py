@@ -0,0 +1,90 @@
+# backend/app/api/rules.py
+
+from fastapi import APIRouter, HTTPException
+from typing import Dict, List, Optional
+from bson import ObjectId
+from collections import Counter
+import time
+
+from .. import database as db
+from ..models.rules import PhaseRulesOut, RuleEvaluation, RuleEvaluationRun
+from ..services import prop_rules
+
+router = APIRouter()
+
+STATUSES = ("ok", "near_breach", "breached", "ready_for_promotion")
+
+def account_filter(prop_firm: Optional[str], phase: Optional[str], cycle_id: Optional[str]) -> dict:
+    query = {}
+    if prop_firm:
+        query["propFirm"] = prop_firm
+    if phase:
+        if phase not in prop_rules.EVALUATED_PHASES:
+            raise HTTPException(status_code=400, detail=f"Fase no evaluable: {phase}")
+        query["phase"] = phase
+    if cycle_id:
+        if not ObjectId.is_valid(cycle_id):
+            raise HTTPException(status_code=400, detail=f"ID de ciclo no válido: {cycle_id}")
+        query["cycleId"] = cycle_id
+    return query
+
+def check_status(status: Optional[str]):
+    if status is not None and status not in STATUSES:
+        raise HTTPException(status_code=400, detail=f"Estado no válido: {status}")
+
+@router.get("/definitions", response_model=Dict[str, Dict[str, PhaseRulesOut]])
+async def get_rule_definitions():
+    """Reglas por prop firm y fase ("default" para las firmas sin reglas propias)."""
+    return {
+        firm: {
+            phase: PhaseRulesOut(
+                profitTarget=r.profit_target, maxDailyLoss=r.max_daily_loss, maxTotalLoss=r.max_total_loss,
+                minTradingDays=r.min_trading_days, trailing=r.trailing,
+            )
+            for phase, r in phases.items()
+        }
+        for firm, phases in prop_rules.PROP_FIRM_RULES.items()
+    }
+
+@router.get("/evaluate", response_model=List[RuleEvaluation])
+async def evaluate_rules(
+    propFirm: Optional[str] = None,
+    phase: Optional[str] = None,
+    cycleId: Optional[str] = None,
+    status: Optional[str] = None,
+):
+    """Evalúa ahora las cuentas filtradas (sin guardar). Con ?status= solo devuelve ese estado."""
+    check_status(status)
+    results = await prop_rules.evaluate_accounts(account_filter(propFirm, phase, cycleId))
+    return [r for r in results if status is None or r["status"] == status]
+
+@router.post("/evaluate", response_model=RuleEvaluationRun)
+async def run_rule_evaluation():
+    """Evalúa todas las cuentas y guarda el resultado (lo mismo que evaluate_rules.py)."""
+    started = time.perf_counter()
+    results = await prop_rules.evaluate_accounts()
+    saved = await prop_rules.save_evaluations(results, full_run=True)
+    return RuleEvaluationRun(
+        accounts=len(results),
+        counts=dict(Counter(r["status"] for r in results)),
+        elapsedMs=round((time.perf_counter() - started) * 1000, 1),
+        saved=saved,
+    )
+
+@router.get("/evaluations", response_model=List[RuleEvaluation])
+async def list_saved_evaluations(status: Optional[str] = None, cycleId: Optional[str] = None):
+    """Última evaluación guardada; por defecto solo las cuentas señaladas (todo menos "ok")."""
+    check_status(status)
+    query = {"status": status} if status else {"status": {"$ne": "ok"}}
+    if cycleId:
+        query["cycleId"] = cycleId
+    return await db.db[prop_rules.COLLECTION].find(query).sort("accountNumber", 1).to_list(None)
+
+@router.get("/evaluations/{account_id}", response_model=RuleEvaluation)
+async def get_saved_evaluation(account_id: str):
+    if not ObjectId.is_valid(account_id):
+        raise HTTPException(status_code=400, detail=f"ID de cuenta no válido: {account_id}")
+    evaluation = await db.db[prop_rules.COLLECTION].find_one({"_id": account_id})
+    if evaluation is None:
+        raise HTTPException(status_code=404, detail="La cuenta no tiene evaluación guardada")
+    return evaluation
@@ -1,12 +1,16 @@
 # backend/app/api/tiros.py
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from typing import List
 from bson import ObjectId
 from datetime import datetime
 
 from .. import database as db
 from ..models.tiro import TiroCreate, TiroInDB, TiroUpdate
+from ..core.columnar import COLUMNAR_MEDIA_TYPE, wants_columnar, tiros_to_columnar
+from ..services import tiro_writes
 
 router = APIRouter()
 
@@ -72,61 +76,18 @@ async def create_tiro(tiro: TiroCreate):
     """
     Crea un nuevo Tiro.
 
-    Validaciones:
+    Validaciones (services/tiro_writes.py, en 2 round trips):
     - El cycleId debe existir
-    - Todas las cuentas en leg1 y leg2 deben existir
+    - Todas las cuentas en leg1 y leg2 deben existir y pertenecer al ciclo
+    - Ninguna cuenta puede estar ya en otro tiro abierto del mismo símbolo (409)
     - leg1 y leg2 deben tener direcciones opuestas (BUY/SELL)
-    - Cada pata debe tener exactamente 2 cuentas
+    - Cada pata debe tener entre 1 y 2 cuentas, sin repetir
     - Cada cuenta debe tener al menos 1 operación
     """
-    # Validar que el cycle existe
-    if not ObjectId.is_valid(tiro.cycleId):
-        raise HTTPException(status_code=400, detail=f"ID de ciclo no válido: {tiro.cycleId}")
-
-    cycle = await db.db["cycles"].find_one({"_id": ObjectId(tiro.cycleId)})
-    if not cycle:
-        raise HTTPException(status_code=404, detail=f"Ciclo no encontrado: {tiro.cycleId}")
-
-    # Recopilar todos los accountIds únicos de ambas patas
-    all_account_ids = set()
-
-    for account_in_leg in tiro.leg1.accounts:
-        all_account_ids.add(account_in_leg.accountId)
-
-    for account_in_leg in tiro.leg2.accounts:
-        all_account_ids.add(account_in_leg.accountId)
-
-    # Validar que no haya accountIds duplicados dentro de la misma pata
-    leg1_ids = [acc.accountId for acc in tiro.leg1.accounts]
-    leg2_ids = [acc.accountId for acc in tiro.leg2.accounts]
-
-    if len(leg1_ids) != len(set(leg1_ids)):
-        raise HTTPException(status_code=400, detail="No se pueden usar cuentas duplicadas en leg1")
-
-    if len(leg2_ids) != len(set(leg2_ids)):
-        raise HTTPException(status_code=400, detail="No se pueden usar cuentas duplicadas en leg2")
-
-    # Validar que todas las cuentas existen en la base de datos
-    for account_id in all_account_ids:
-        if not ObjectId.is_valid(account_id):
-            raise HTTPException(status_code=400, detail=f"ID de cuenta no válido: {account_id}")
-
-        account = await db.db["trading_accounts"].find_one({"_id": ObjectId(account_id)})
-        if not account:
-            raise HTTPException(status_code=404, detail=f"Cuenta no encontrada: {account_id}")
-
-    # Nota: Las validaciones de direcciones opuestas, cantidad de cuentas,
-    # y cantidad de operaciones ya se manejan en el modelo Pydantic (tiro.py)
-
-    # Crear el tiro
-    tiro_dict = tiro.model_dump()
-    result = await db.db["tiros"].insert_one(tiro_dict)
-    created_document = await db.db["tiros"].find_one({"_id": result.inserted_id})
-
-    if created_document:
-        return TiroInDB.model_validate(convert_document(created_document))
-
-    raise HTTPException(status_code=500, detail="Error al crear el tiro.")
+    # Las direcciones opuestas, cantidad de cuentas y de operaciones ya se
+    # validan en el modelo Pydantic (tiro.py)
+    created_document = await tiro_writes.create_tiro(tiro.model_dump())
+    return TiroInDB.model_validate(convert_document(created_document))
 
 @router.get("/", response_model=List[TiroInDB])
 async def list_all_tiros():
@@ -140,8 +101,11 @@ async def list_all_tiros():
     return tiros_list
 
 @router.get("/cycle/{cycle_id}", response_model=List[TiroInDB])
-async def list_tiros_by_cycle(cycle_id: str):
-    """Obtiene todos los tiros de un ciclo específico."""
+async def list_tiros_by_cycle(cycle_id: str, request: Request):
+    """
+    Obtiene todos los tiros de un ciclo específico.
+    Con ?format=columnar devuelve las tablas `tiros` y `operations` en formato columnar.
+    """
     if not ObjectId.is_valid(cycle_id):
         raise HTTPException(status_code=400, detail=f"ID de ciclo no válido: {cycle_id}")
 
@@ -151,6 +115,10 @@ async def list_tiros_by_cycle(cycle_id: str):
         document = convert_document(document)
         document = migrate_old_tiro_structure(document)
         tiros_list.append(TiroInDB.model_validate(document))
+
+    if wants_columnar(request):
+        tables = tiros_to_columnar([tiro.model_dump() for tiro in tiros_list])
+        return JSONResponse(jsonable_encoder({"encoding": "columnar", **tables}), media_type=COLUMNAR_MEDIA_TYPE)
     return tiros_list
 
 @router.get("/{tiro_id}", response_model=TiroInDB)
@@ -189,15 +157,11 @@ async def update_tiro(tiro_id: str, tiro_update: TiroUpdate):
     if not update_data:
         raise HTTPException(status_code=400, detail="No se proporcionaron datos para actualizar.")
     
-    result = await db.db["tiros"].update_one(
-        {"_id": ObjectId(tiro_id)},
-        {"$set": update_data}
-    )
-    
-    if result.matched_count == 0:
+    # Cambios en las patas o reaperturas se revalidan (cuentas, ciclo, conflictos)
+    updated_doc = await tiro_writes.update_tiro(ObjectId(tiro_id), update_data)
+    if updated_doc is None:
         raise HTTPException(status_code=404, detail=f"Tiro no encontrado: {tiro_id}")
 
-    updated_doc = await db.db["tiros"].find_one({"_id": ObjectId(tiro_id)})
     updated_doc = convert_document(updated_doc)
     updated_doc = migrate_old_tiro_structure(updated_doc)
     return TiroInDB.model_validate(updated_doc)
@@ -208,9 +172,7 @@ async def delete_tiro(tiro_id: str):
     if not ObjectId.is_valid(tiro_id):
         raise HTTPException(status_code=400, detail=f"ID de tiro no válido: {tiro_id}")
     
-    result = await db.db["tiros"].delete_one({"_id": ObjectId(tiro_id)})
-    
-    if result.deleted_count == 0:
+    if not await tiro_writes.delete_tiro(ObjectId(tiro_id)):
         raise HTTPException(status_code=404, detail=f"Tiro no encontrado: {tiro_id}")
     
     return
\ No newline at end of file
@@ -1,12 +1,23 @@
 # backend/app/api/trading_accounts.py
 
-from fastapi import APIRouter, HTTPException, status
-from typing import List
+import asyncio
+import base64
+import json
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from typing import List, Dict, Any, Optional
+from datetime import datetime
 from bson import ObjectId
 from pydantic import ValidationError
+from pymongo.errors import DuplicateKeyError
 from .. import database as db
+from ..core.columnar import COLUMNAR_MEDIA_TYPE, wants_columnar, to_columnar
 # Importamos solo los modelos que necesitamos
 from ..models.trading_account import TradingAccountCreate, TradingAccountInDB
+from ..models.tiro import AccountTiroEntry
+from .tiros import migrate_old_tiro_structure
+from ..services import account_numbers, display_labels
 
 nested_router = APIRouter()
 direct_router = APIRouter()
@@ -21,7 +32,8 @@ def convert_document(document: dict):
 @nested_router.post("/", response_model=TradingAccountInDB, status_code=status.HTTP_201_CREATED)
 async def create_trading_account(kyc_id: str, account: TradingAccountCreate):
     """Crea una nueva cuenta de trading asociada a un KYC."""
-    if not ObjectId.is_valid(kyc_id) or not await db.db["kycs"].find_one({"_id": ObjectId(kyc_id)}):
+    kyc = await db.db["kycs"].find_one({"_id": ObjectId(kyc_id)}, {"name": 1}) if ObjectId.is_valid(kyc_id) else None
+    if not kyc:
         raise HTTPException(status_code=404, detail=f"No se encontró el KYC con ID {kyc_id}")
 
     if account.cycleId and (not ObjectId.is_valid(account.cycleId) or not await db.db["cycles"].find_one({"_id": ObjectId(account.cycleId)})):
@@ -29,8 +41,10 @@ async def create_trading_account(kyc_id: str, account: TradingAccountCreate):
 
     account_dict = account.model_dump()
     account_dict["kycId"] = kyc_id
+    account_dict["nombre_kyc"] = kyc.get("name", display_labels.MISSING)
+    account_dict["phaseStartedAt"] = datetime.utcnow()
 
-    result = await db.db["trading_accounts"].insert_one(account_dict)
+    result = await _insert_with_account_number(account_dict)
     created_document = await db.db["trading_accounts"].find_one({"_id": result.inserted_id})
     
     if created_document:
@@ -40,6 +54,26 @@ async def create_trading_account(kyc_id: str, account: TradingAccountCreate):
         
     raise HTTPException(status_code=500, detail="Error al crear la cuenta de trading.")
 
+def _duplicate_number(account_number) -> HTTPException:
+    return HTTPException(status_code=409, detail=f"El número de cuenta {account_number} ya existe")
+
+async def _insert_with_account_number(account_dict: dict):
+    """Inserta la cuenta; sin accountNumber se toma el siguiente de la secuencia."""
+    if account_dict.get("accountNumber"):
+        try:
+            return await db.db["trading_accounts"].insert_one(account_dict)
+        except DuplicateKeyError:
+            raise _duplicate_number(account_dict["accountNumber"])
+
+    for _ in range(3):
+        account_dict["accountNumber"] = await account_numbers.allocate_account_number()
+        try:
+            return await db.db["trading_accounts"].insert_one(account_dict)
+        except DuplicateKeyError:
+            # Alguien escribió a mano un número por delante del contador
+            await account_numbers.resync()
+    raise _duplicate_number(account_dict["accountNumber"])
+
 # (La función list_accounts_for_kyc es correcta, no necesita cambios)
 @nested_router.get("/", response_model=List[TradingAccountInDB])
 async def list_accounts_for_kyc(kyc_id: str):
@@ -60,6 +94,142 @@ async def list_accounts_for_kyc(kyc_id: str):
 
 # --- Operaciones en el Router DIRECTO ---
 
+SORT_FIELDS = {"_id", "accountNumber", "cost", "accountSize", "propFirm", "status", "phase"}
+ACCOUNT_DICTIONARY_FIELDS = ("phase", "status", "propFirm", "cycleId", "kycId", "kycName")
+
+def encode_cursor(value: Any, last_id: ObjectId) -> str:
+    """Cursor opaco con el valor de ordenación y el _id de la última fila."""
+    raw = json.dumps([value, str(last_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return value, ObjectId(last_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor de paginación no válido")
+
+def keyset_filter(sort: str, direction: int, value: Any, last_id: ObjectId) -> dict:
+    """Filas estrictamente después de (value, last_id) en el orden (sort, _id)."""
+    op = "$gt" if direction == 1 else "$lt"
+    if sort == "_id":
+        return {"_id": {op: last_id}}
+    return {"$or": [{sort: {op: value}}, {sort: value, "_id": {op: last_id}}]}
+
+@direct_router.get("/", response_model=Dict[str, Any])
+async def list_accounts(
+    request: Request,
+    status_: Optional[List[str]] = Query(None, alias="status", description="Active, Pending, Burned (repetible)"),
+    phase: Optional[List[str]] = Query(None, description="fase1, fase2, real, quemada (repetible)"),
+    propFirm: Optional[List[str]] = Query(None, description="Prop firm (repetible)"),
+    cycleId: Optional[str] = Query(None, pattern=r'^[0-9a-fA-F]{24}$'),
+    kycId: Optional[str] = Query(None, pattern=r'^[0-9a-fA-F]{24}$'),
+    minCost: Optional[float] = Query(None, ge=0),
+    maxCost: Optional[float] = Query(None, ge=0),
+    minSize: Optional[float] = Query(None, ge=0),
+    maxSize: Optional[float] = Query(None, ge=0),
+    sort: str = Query("_id", description=f"Campo de orden: {', '.join(sorted(SORT_FIELDS))}"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="nextCursor de la página anterior"),
+    includeKyc: bool = Query(False, description="Añadir kycName y kycEmail a cada cuenta"),
+    includeTotals: bool = Query(False, description="Totales del filtro completo (solo en la primera página)"),
+):
+    """
+    Lista todas las cuentas de trading con filtros, orden en el servidor y
+    paginación por cursor (keyset): cada página es una consulta acotada por
+    `limit`, sin skip. `nextCursor` es null en la última página.
+    """
+    if sort not in SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"No se puede ordenar por '{sort}'")
+
+    query_filter: Dict[str, Any] = {}
+    if status_:
+        query_filter["status"] = {"$in": status_}
+    if phase:
+        query_filter["phase"] = {"$in": phase}
+    if propFirm:
+        query_filter["propFirm"] = {"$in": propFirm}
+    if cycleId:
+        query_filter["cycleId"] = cycleId
+    if kycId:
+        query_filter["kycId"] = kycId
+    for field, low, high in (("cost", minCost, maxCost), ("accountSize", minSize, maxSize)):
+        if low is not None or high is not None:
+            query_filter[field] = {
+                **({"$gte": low} if low is not None else {}),
+                **({"$lte": high} if high is not None else {}),
+            }
+
+    direction = 1 if order == "asc" else -1
+    page_filter = query_filter
+    if cursor:
+        value, last_id = decode_cursor(cursor)
+        page_filter = {"$and": [query_filter, keyset_filter(sort, direction, value, last_id)]} if query_filter \
+            else keyset_filter(sort, direction, value, last_id)
+
+    sort_spec = [("_id", direction)] if sort == "_id" else [(sort, direction), ("_id", direction)]
+    find = db.db["trading_accounts"].find(page_filter).sort(sort_spec).limit(limit + 1).to_list(length=limit + 1)
+
+    totals = None
+    if includeTotals and not cursor:
+        totals_pipeline = [
+            {"$match": query_filter},
+            {"$group": {
+                "_id": None,
+                "count": {"$sum": 1},
+                "activeCount": {"$sum": {"$cond": [{"$eq": ["$status", "Active"]}, 1, 0]}},
+                "realCount": {"$sum": {"$cond": [{"$eq": ["$phase", "real"]}, 1, 0]}},
+                "totalAccountSize": {"$sum": "$accountSize"},
+                "totalCost": {"$sum": "$cost"},
+            }},
+            {"$project": {"_id": 0}},
+        ]
+        documents, totals_rows = await asyncio.gather(
+            find, db.db["trading_accounts"].aggregate(totals_pipeline).to_list(length=1)
+        )
+        totals = totals_rows[0] if totals_rows else {
+            "count": 0, "activeCount": 0, "realCount": 0, "totalAccountSize": 0, "totalCost": 0,
+        }
+    else:
+        documents = await find
+
+    has_more = len(documents) > limit
+    documents = documents[:limit]
+    next_cursor = None
+    if has_more:
+        last = documents[-1]
+        next_cursor = encode_cursor(None if sort == "_id" else last.get(sort), last["_id"])
+
+    kycs = {}
+    if includeKyc:
+        kyc_ids = {ObjectId(doc["kycId"]) for doc in documents if ObjectId.is_valid(doc.get("kycId", ""))}
+        async for kyc in db.db["kycs"].find({"_id": {"$in": list(kyc_ids)}}, {"name": 1, "email": 1}):
+            kycs[str(kyc["_id"])] = kyc
+
+    accounts = []
+    for document in documents:
+        try:
+            account = TradingAccountInDB.model_validate(convert_document(document)).model_dump()
+        except ValidationError as e:
+            print(f"Documento de cuenta inválido omitido: {e}")
+            continue
+        if includeKyc:
+            kyc = kycs.get(account["kycId"], {})
+            account["kycName"] = kyc.get("name", "N/A")
+            account["kycEmail"] = kyc.get("email")
+        accounts.append(account)
+
+    result = {"data": accounts, "limit": limit, "nextCursor": next_cursor, "hasMore": has_more}
+    if totals is not None:
+        result["totals"] = totals
+
+    if wants_columnar(request):
+        result["data"] = to_columnar(accounts, ACCOUNT_DICTIONARY_FIELDS)
+        result["encoding"] = "columnar"
+        return JSONResponse(jsonable_encoder(result), media_type=COLUMNAR_MEDIA_TYPE)
+    return result
+
 # (La función get_trading_account es correcta, no necesita cambios)
 @direct_router.get("/{account_id}", response_model=TradingAccountInDB)
 async def get_trading_account(account_id: str):
@@ -78,8 +248,114 @@ async def get_trading_account(account_id: str):
 
     raise HTTPException(status_code=404, detail=f"No se encontró la cuenta con ID {account_id}.")
 
+def account_tiro_entry(tiro_doc: dict, account_id: str) -> Optional[dict]:
+    """La pata y las operaciones de la cuenta dentro del tiro."""
+    tiro_doc = migrate_old_tiro_structure(tiro_doc)
+    for leg_name in ("leg1", "leg2"):
+        leg = tiro_doc.get(leg_name) or {}
+        for account in leg.get("accounts", []):
+            if account.get("accountId") != account_id:
+                continue
+            operations = account.get("operations", [])
+            results = [op["result"] for op in operations if op.get("result") is not None]
+            return AccountTiroEntry(
+                tiroId=str(tiro_doc["_id"]),
+                cycleId=tiro_doc.get("cycleId", ""),
+                symbol=tiro_doc.get("symbol", ""),
+                status=tiro_doc.get("status", ""),
+                openDate=tiro_doc.get("openDate"),
+                closeDate=tiro_doc.get("closeDate"),
+                leg=leg_name,
+                direction=leg.get("direction", ""),
+                operations=operations,
+                volume=sum(float(op.get("volume") or 0.0) for op in operations),
+                result=sum(results) if results else None,
+                tiroResult=tiro_doc.get("result"),
+            ).model_dump()
+    return None
+
+@direct_router.get("/{account_id}/tiros", response_model=Dict[str, Any])
+async def list_account_tiros(
+    account_id: str,
+    status_: Optional[str] = Query(None, alias="status", pattern="^(Abierto|Cerrado)$"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="nextCursor de la página anterior"),
+    includeTotals: bool = Query(False, description="Resultado acumulado de la cuenta (solo en la primera página)"),
+):
+    """
+    Historial de tiros de una cuenta, del más reciente al más antiguo, con
+    sus operaciones y su resultado en cada tiro. Búsqueda por el índice
+    multikey `accountIds` y paginación por cursor sobre (openDate, _id).
+    """
+    if not ObjectId.is_valid(account_id):
+        raise HTTPException(status_code=400, detail=f"El ID de cuenta '{account_id}' no es válido.")
+
+    query_filter: Dict[str, Any] = {"accountIds": account_id}
+    if status_:
+        query_filter["status"] = status_
+    page_filter = query_filter
+    if cursor:
+        value, last_id = decode_cursor(cursor)
+        try:
+            value = datetime.fromisoformat(value) if value is not None else None
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Cursor de paginación no válido")
+        page_filter = {"$and": [query_filter, keyset_filter("openDate", -1, value, last_id)]}
+
+    find = db.db["tiros"].find(page_filter).sort([("openDate", -1), ("_id", -1)]).limit(limit + 1).to_list(length=limit + 1)
+
+    totals = None
+    if includeTotals and not cursor:
+        totals_pipeline = [
+            {"$match": query_filter},
+            # Estructura antigua (leg.accountId, sin operaciones): cuenta como tiro sin resultado
+            {"$project": {"status": 1, "accounts": {"$concatArrays": [
+                {"$ifNull": ["$leg1.accounts", [{"accountId": "$leg1.accountId"}]]},
+                {"$ifNull": ["$leg2.accounts", [{"accountId": "$leg2.accountId"}]]},
+            ]}}},
+            {"$unwind": "$accounts"},
+            {"$match": {"accounts.accountId": account_id}},
+            {"$group": {
+                "_id": None,
+                "tiros": {"$sum": 1},
+                "openTiros": {"$sum": {"$cond": [{"$eq": ["$status", "Abierto"]}, 1, 0]}},
+                "operations": {"$sum": {"$size": {"$ifNull": ["$accounts.operations", []]}}},
+                "totalResult": {"$sum": {"$sum": "$accounts.operations.result"}},
+            }},
+            {"$project": {"_id": 0}},
+        ]
+        documents, totals_rows = await asyncio.gather(
+            find, db.db["tiros"].aggregate(totals_pipeline).to_list(length=1)
+        )
+        totals = totals_rows[0] if totals_rows else {"tiros": 0, "openTiros": 0, "operations": 0, "totalResult": 0}
+    else:
+        documents = await find
+
+    has_more = len(documents) > limit
+    documents = documents[:limit]
+    next_cursor = None
+    if has_more:
+        last = documents[-1]
+        open_date = last.get("openDate")
+        next_cursor = encode_cursor(open_date.isoformat() if open_date else None, last["_id"])
+
+    entries = []
+    for document in documents:
+        try:
+            entry = account_tiro_entry(document, account_id)
+        except ValidationError as e:
+            print(f"Tiro inválido omitido: {e}")
+            continue
+        if entry is not None:
+            entries.append(entry)
+
+    result = {"data": entries, "limit": limit, "nextCursor": next_cursor, "hasMore": has_more}
+    if totals is not None:
+        result["totals"] = totals
+    return result
+
 @direct_router.put("/{account_id}", response_model=TradingAccountInDB)
-async def update_trading_account(account_id: str, account_update: TradingAccountCreate):
+async def update_trading_account(account_id: str, account_update: TradingAccountCreate, background_tasks: BackgroundTasks):
     """Actualiza una cuenta de trading por su ID."""
     if not ObjectId.is_valid(account_id):
         raise HTTPException(status_code=400, detail=f"El ID de cuenta '{account_id}' no es válido.")
@@ -95,17 +371,34 @@ async def update_trading_account(account_id: str, account_update: TradingAccount
     # IMPORTANTE: Nos aseguramos de que kycId NO se pueda actualizar
     if 'kycId' in update_data_dict:
         del update_data_dict['kycId']
+    # Un accountNumber nulo no borra el existente
+    if update_data_dict.get('accountNumber') is None:
+        update_data_dict.pop('accountNumber', None)
             
     if not update_data_dict:
         raise HTTPException(status_code=400, detail="No se proporcionaron datos para actualizar.")
 
-    result = await db.db["trading_accounts"].update_one(
-        {"_id": ObjectId(account_id)},
-        {"$set": update_data_dict}
-    )
+    update = {"$set": update_data_dict}
+    if "phase" in update_data_dict:
+        # phaseStartedAt solo se mueve si la fase cambia de verdad (la compara
+        # con la guardada en la misma escritura); las reglas evalúan desde ahí
+        update = [
+            {"$set": {"phaseStartedAt": {"$cond": [
+                {"$eq": ["$phase", update_data_dict["phase"]]}, "$phaseStartedAt", datetime.utcnow(),
+            ]}}},
+            {"$set": {field: {"$literal": value} for field, value in update_data_dict.items()}},
+        ]
+
+    try:
+        result = await db.db["trading_accounts"].update_one({"_id": ObjectId(account_id)}, update)
+    except DuplicateKeyError:
+        raise _duplicate_number(update_data_dict.get("accountNumber"))
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail=f"No se encontró la cuenta con ID {account_id}.")
+    if "accountNumber" in update_data_dict and result.modified_count:
+        # Las etiquetas leg1/leg2_accountNumber de sus tiros se reescriben tras responder
+        background_tasks.add_task(display_labels.propagate_account_numbers, [account_id])
         
     updated_document = await db.db["trading_accounts"].find_one({"_id": ObjectId(account_id)})
     return TradingAccountInDB.model_validate(convert_document(updated_document))
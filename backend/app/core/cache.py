@@ -0,0 +1,60 @@
+# backend/app/core/cache.py
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    Small in-process LRU cache with per-entry expiry.
+
+    Entries are evicted least-recently-used once `maxsize` is reached and are
+    treated as missing after `ttl` seconds. Callers invalidate explicitly when
+    the underlying data changes; the TTL only bounds staleness across worker
+    processes, which do not share this cache.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Bumped on every clear(); lets callers detect a write that raced
+        # with a recomputation and skip caching the stale result.
+        self.generation = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.generation += 1
+
+    def __len__(self) -> int:
+        return len(self._data)
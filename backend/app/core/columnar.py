@@ -0,0 +1,80 @@
+# backend/app/core/columnar.py
+
+"""
+Opt-in columnar encoding for large table responses.
+
+A client asks for it with `?format=columnar` or with
+`Accept: application/vnd.gtfunds.columnar+json`. A table of N row objects is
+sent as one array per field instead of repeating every key N times:
+
+    {"length": 2,
+     "columns": {"id": ["a", "b"], "phase": [0, 1], "cost": [100.0, 250.0]},
+     "dictionaries": {"phase": ["fase1", "real"]}}
+
+Fields in `dictionary_fields` (phase, status, propFirm, symbol...) are
+dictionary-encoded: the column holds indexes into `dictionaries[field]`.
+Tiro leg trees are normalized into a child `operations` table that points
+back to its tiro by row index. Tables are decoded in frontend/src/services/api.js.
+"""
+
+from typing import Any, Dict, Iterable, List, Sequence
+
+from fastapi import Request
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.gtfunds.columnar+json"
+
+def wants_columnar(request: Request) -> bool:
+    return (
+        request.query_params.get("format") == "columnar"
+        or COLUMNAR_MEDIA_TYPE in request.headers.get("accept", "")
+    )
+
+def to_columnar(rows: Sequence[dict], dictionary_fields: Iterable[str] = ()) -> Dict[str, Any]:
+    """Row objects -> {length, columns, dictionaries}. Missing fields become null."""
+    fields: Dict[str, None] = {}
+    for row in rows:
+        for key in row:
+            fields.setdefault(key, None)
+
+    columns = {field: [row.get(field) for row in rows] for field in fields}
+    dictionaries = {}
+    for field in dictionary_fields:
+        values = columns.get(field)
+        if values is None:
+            continue
+        codes: Dict[Any, int] = {}
+        columns[field] = [codes.setdefault(value, len(codes)) for value in values]
+        dictionaries[field] = list(codes)
+
+    return {"length": len(rows), "columns": columns, "dictionaries": dictionaries}
+
+TIRO_DICTIONARY_FIELDS = ("symbol", "status", "cycleId", "leg1Direction", "leg2Direction")
+OPERATION_DICTIONARY_FIELDS = ("accountId",)
+
+def tiros_to_columnar(tiros: List[dict]) -> Dict[str, Any]:
+    """
+    Tiro dicts (new leg structure) -> a tiros table plus an operations table.
+    Each operation row carries `tiro` (row index), `leg` (1|2) and `account`
+    (position of the account within its leg).
+    """
+    tiro_rows, operation_rows = [], []
+    for index, tiro in enumerate(tiros):
+        row = {key: value for key, value in tiro.items() if key not in ("leg1", "leg2")}
+        for leg_number in (1, 2):
+            leg = tiro[f"leg{leg_number}"]
+            row[f"leg{leg_number}Direction"] = leg["direction"]
+            for position, account in enumerate(leg["accounts"]):
+                for operation in account["operations"]:
+                    operation_rows.append({
+                        "tiro": index,
+                        "leg": leg_number,
+                        "account": position,
+                        "accountId": account["accountId"],
+                        **operation,
+                    })
+        tiro_rows.append(row)
+
+    return {
+        "tiros": to_columnar(tiro_rows, TIRO_DICTIONARY_FIELDS),
+        "operations": to_columnar(operation_rows, OPERATION_DICTIONARY_FIELDS),
+    }
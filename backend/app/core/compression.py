@@ -0,0 +1,84 @@
+# backend/app/core/compression.py
+
+"""
+Negotiated response compression: brotli when the client accepts it and the
+`brotli` package is installed, gzip otherwise. Only complete (non-streamed)
+responses of a compressible type and at least COMPRESSION_MIN_SIZE bytes are
+compressed; everything else passes through untouched.
+"""
+
+import gzip
+
+from .config import settings
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+COMPRESSIBLE_TYPES = (b"application/json", b"application/vnd.gtfunds.columnar+json", b"text/")
+
+def _accepted_encoding(scope) -> str:
+    for name, value in scope.get("headers", []):
+        if name == b"accept-encoding":
+            accepted = {part.split(b";")[0].strip() for part in value.lower().split(b",")}
+            if brotli is not None and b"br" in accepted:
+                return "br"
+            if b"gzip" in accepted:
+                return "gzip"
+    return ""
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL)
+
+class CompressionMiddleware:
+    """Pure ASGI middleware; buffers single-message responses and compresses them."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            return await self.app(scope, receive, send)
+        encoding = _accepted_encoding(scope)
+        if not encoding:
+            return await self.app(scope, receive, send)
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers", []))
+                content_type = headers.get(b"content-type", b"")
+                if b"content-encoding" in headers or not content_type.startswith(COMPRESSIBLE_TYPES):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            if passthrough:
+                return await send(message)
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or start_message is None:
+                # Streaming response: send as is
+                passthrough = True
+                if start_message is not None:
+                    await send(start_message)
+                return await send(message)
+
+            headers = [(k, v) for k, v in start_message.get("headers", []) if k != b"content-length"]
+            if len(body) >= settings.COMPRESSION_MIN_SIZE:
+                body = compress(body, encoding)
+                headers.append((b"content-encoding", encoding.encode()))
+            headers.append((b"vary", b"Accept-Encoding"))
+            headers.append((b"content-length", str(len(body)).encode()))
+            await send({**start_message, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
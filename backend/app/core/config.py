@@ -1,10 +1,68 @@
 # app/core/config.py
+from typing import Dict
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     MONGO_URL: str = "mongodb://localhost:27017"
     DATABASE_NAME: str = "gt_funds"
 
+    # Motor pool, per worker process (see database.connect and serve.py)
+    MONGO_MAX_POOL_SIZE: int = 50
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = 5000  # Fail instead of waiting forever for a pooled connection
+
+    # bcrypt thread pool (see core/passwords.py)
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+
+    # Admission control (see core/rate_limit.py)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per process) or "mongo" (shared by workers)
+    RATE_LIMIT_DEFAULT: str = "100/minute"
+    RATE_LIMIT_MAX_KEYS: int = 50_000
+    TRUST_FORWARDED_FOR: bool = False
+    HEAVY_ROUTE_CONCURRENCY: int = 4
+    DEFAULT_ROUTE_CONCURRENCY: int = 64
+    ADMISSION_QUEUE_SIZE: int = 32
+    ADMISSION_QUEUE_TIMEOUT: float = 2.0
+
+    # Metrics (see core/metrics.py)
+    METRICS_ENABLED: bool = True
+    METRICS_QUERY_HEADER: bool = False  # Adds X-DB-Queries / X-DB-Time-Ms to every response
+
+    # Slow-query log (see core/slow_queries.py)
+    SLOW_QUERY_MS: int = 100
+    SLOW_QUERY_EXPLAIN: bool = True
+    SLOW_QUERY_SAMPLE_RATE: float = 1.0  # Fraction of slow queries that get an explain()
+    SLOW_QUERY_EXPLAINS_PER_MINUTE: int = 6
+    SLOW_QUERY_SHAPE_COOLDOWN: float = 300.0  # Seconds before the same query shape is explained again
+
+    # Response compression (see core/compression.py); brotli needs `pip install brotli`
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # bytes
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # Per-request profiler for admins (see core/profiling.py)
+    PROFILING_ENABLED: bool = True
+    PROFILE_DIR: str = "profiles"
+    PROFILE_KEEP: int = 50
+
+    # Exposure index (see services/exposure.py)
+    HEDGE_IMBALANCE_TOLERANCE: float = 0.001  # lots of net volume before a cycle/symbol hedge is flagged
+
+    # Mark-to-market of open tiros (see services/mark_to_market.py). Disabled while MTM_FEED is empty;
+    # file:///path/quotes.log, tcp://host:port or replay:///path/quotes.csv
+    MTM_FEED: str = ""
+    MTM_INTERVAL: float = 0.5  # seconds between revaluations
+    MTM_POSITIONS_REFRESH: float = 5.0  # seconds before open tiros are reloaded (other workers' writes)
+    MTM_CONTRACT_SIZE: float = 100_000.0  # units per lot
+    MTM_CONTRACT_SIZES: Dict[str, float] = {"XAUUSD": 100.0, "XAGUSD": 5000.0}
+
+    # Prop firm rules engine (see services/prop_rules.py)
+    RULES_NEAR_BREACH: float = 0.8  # fraction of a loss limit already used before an account is flagged
+
     class Config:
         case_sensitive = True
         env_file = ".env"
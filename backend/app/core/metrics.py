@@ -0,0 +1,293 @@
+# backend/app/core/metrics.py
+
+"""
+Per-request MongoDB accounting and Prometheus metrics.
+
+A pymongo CommandListener attributes every command (count, round-trip time,
+documents returned) to the request that issued it through a contextvar.
+Motor runs pymongo calls on its executor with a copy of the caller's context,
+so the listener sees the right request even though it runs in another thread.
+
+MetricsMiddleware opens that per-request scope, records route latency and
+query counts, and can add an `X-DB-Queries` header (METRICS_QUERY_HEADER).
+`render_prometheus()` produces the text exposition format served on /metrics.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from pymongo import monitoring
+
+from .config import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+# ------------------------------------------------------------
+# Minimal metric types (no prometheus_client dependency)
+# ------------------------------------------------------------
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name, self.help = name, help_text
+        self.values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple = (), amount: float = 1.0):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Tuple):
+        self.name, self.help = name, help_text
+        self.buckets = buckets
+        self.values: Dict[Tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Tuple = ()):
+        with self._lock:
+            data = self.values.get(labels)
+            if data is None:
+                data = self.values[labels] = [0] * len(self.buckets) + [0.0, 0]
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                data[index] += 1
+            data[-2] += value
+            data[-1] += 1
+
+class Gauge:
+    def __init__(self, name: str, help_text: str):
+        self.name, self.help = name, help_text
+        self.values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple = (), amount: float = 1.0):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def set(self, value: float, labels: Tuple = ()):
+        with self._lock:
+            self.values[labels] = value
+
+http_requests = Counter("gtfunds_http_requests_total", "HTTP requests by route and status")
+http_latency = Histogram("gtfunds_http_request_duration_seconds", "HTTP request latency by route", LATENCY_BUCKETS)
+queries_per_request = Histogram("gtfunds_mongo_queries_per_request", "MongoDB commands issued per HTTP request", QUERY_BUCKETS)
+mongo_commands = Counter("gtfunds_mongo_commands_total", "MongoDB commands by route and command name")
+mongo_failures = Counter("gtfunds_mongo_command_failures_total", "Failed MongoDB commands by command name")
+mongo_latency = Histogram("gtfunds_mongo_command_duration_seconds", "MongoDB command round-trip time", LATENCY_BUCKETS)
+mongo_documents = Counter("gtfunds_mongo_documents_returned_total", "Documents returned by MongoDB by route")
+pool_connections = Gauge("gtfunds_mongo_pool_connections", "Open connections in the MongoDB pool")
+pool_checked_out = Gauge("gtfunds_mongo_pool_checked_out", "Connections currently checked out of the MongoDB pool")
+
+METRICS = [
+    http_requests, http_latency, queries_per_request, mongo_commands, mongo_failures,
+    mongo_latency, mongo_documents, pool_connections, pool_checked_out,
+]
+
+# ------------------------------------------------------------
+# Per-request accounting
+# ------------------------------------------------------------
+
+class RequestStats:
+    """Mongo work attributed to one HTTP request."""
+
+    __slots__ = ("scope", "queries", "db_seconds", "documents", "_lock")
+
+    def __init__(self, scope: dict):
+        # The router fills scope["route"] in place before the endpoint runs
+        self.scope = scope
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.documents = 0
+        self._lock = threading.Lock()
+
+    @property
+    def route(self) -> str:
+        return getattr(self.scope.get("route"), "path", "unmatched")
+
+    def record(self, seconds: float, documents: int):
+        with self._lock:
+            self.queries += 1
+            self.db_seconds += seconds
+            self.documents += documents
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+def _documents_in_reply(reply: dict) -> int:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        batch = cursor.get("firstBatch", cursor.get("nextBatch"))
+        if batch is not None:
+            return len(batch)
+    if "n" in reply and isinstance(reply["n"], int):
+        return reply["n"]
+    return 0
+
+class CommandAccountingListener(monitoring.CommandListener):
+    """Attributes each MongoDB command to the current request."""
+
+    IGNORED = {"hello", "isMaster", "ismaster", "ping", "saslStart", "saslContinue", "endSessions", "killCursors"}
+
+    def __init__(self):
+        self._started: Dict[int, RequestStats] = {}
+
+    def started(self, event):
+        if event.command_name in self.IGNORED:
+            return
+        stats = current_request.get()
+        if stats is not None:
+            self._started[event.request_id] = stats
+
+    def succeeded(self, event):
+        if event.command_name in self.IGNORED:
+            return
+        seconds = event.duration_micros / 1e6
+        stats = self._started.pop(event.request_id, None)
+        route = stats.route if stats else "background"
+        documents = _documents_in_reply(event.reply)
+
+        mongo_latency.observe(seconds, (event.command_name,))
+        mongo_commands.inc((route, event.command_name))
+        mongo_documents.inc((route,), documents)
+        if stats is not None:
+            stats.record(seconds, documents)
+
+    def failed(self, event):
+        if event.command_name in self.IGNORED:
+            return
+        stats = self._started.pop(event.request_id, None)
+        mongo_failures.inc((event.command_name,))
+        if stats is not None:
+            stats.record(event.duration_micros / 1e6, 0)
+
+class PoolUsageListener(monitoring.ConnectionPoolListener):
+    """Tracks open and checked-out connections per server."""
+
+    def _server(self, event) -> Tuple:
+        return ("%s:%s" % event.address,)
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_check_out_started(self, event): pass
+    def connection_check_out_failed(self, event): pass
+
+    def connection_created(self, event):
+        pool_connections.inc(self._server(event))
+
+    def connection_closed(self, event):
+        pool_connections.inc(self._server(event), -1)
+
+    def connection_checked_out(self, event):
+        pool_checked_out.inc(self._server(event))
+
+    def connection_checked_in(self, event):
+        pool_checked_out.inc(self._server(event), -1)
+
+def event_listeners() -> list:
+    """Listeners to pass to the Motor client."""
+    return [CommandAccountingListener(), PoolUsageListener()]
+
+# ------------------------------------------------------------
+# Middleware
+# ------------------------------------------------------------
+
+class MetricsMiddleware:
+    """Pure ASGI middleware that opens the per-request accounting scope."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.METRICS_QUERY_HEADER:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-queries", str(stats.queries).encode()))
+                    headers.append((b"x-db-time-ms", f"{stats.db_seconds * 1000:.1f}".encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            route = stats.route
+            elapsed = time.perf_counter() - started
+            http_requests.inc((scope["method"], route, str(status_code)))
+            http_latency.observe(elapsed, (scope["method"], route))
+            queries_per_request.observe(stats.queries, (route,))
+
+# ------------------------------------------------------------
+# Exposition
+# ------------------------------------------------------------
+
+LABEL_NAMES = {
+    "gtfunds_http_requests_total": ("method", "route", "status"),
+    "gtfunds_http_request_duration_seconds": ("method", "route"),
+    "gtfunds_mongo_queries_per_request": ("route",),
+    "gtfunds_mongo_commands_total": ("route", "command"),
+    "gtfunds_mongo_command_failures_total": ("command",),
+    "gtfunds_mongo_command_duration_seconds": ("command",),
+    "gtfunds_mongo_documents_returned_total": ("route",),
+    "gtfunds_mongo_pool_connections": ("server",),
+    "gtfunds_mongo_pool_checked_out": ("server",),
+}
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Tuple, values: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+def render_prometheus(extra_gauges: Optional[Dict[str, Tuple[str, float]]] = None) -> str:
+    """Render every metric (plus optional name -> (help, value) gauges) as Prometheus text."""
+    lines = []
+    for metric in METRICS:
+        names = LABEL_NAMES[metric.name]
+        kind = "counter" if isinstance(metric, Counter) else "histogram" if isinstance(metric, Histogram) else "gauge"
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {kind}")
+        with metric._lock:
+            items = list(metric.values.items())
+        for labels, value in items:
+            if isinstance(metric, Histogram):
+                cumulative = 0
+                for bound, count in zip(metric.buckets, value):
+                    cumulative += count
+                    bucket_labels = _labels(names, labels, 'le="%s"' % bound)
+                    lines.append(f"{metric.name}_bucket{bucket_labels} {cumulative}")
+                inf_labels = _labels(names, labels, 'le="+Inf"')
+                lines.append(f"{metric.name}_bucket{inf_labels} {value[-1]}")
+                lines.append(f"{metric.name}_sum{_labels(names, labels)} {_format(value[-2])}")
+                lines.append(f"{metric.name}_count{_labels(names, labels)} {value[-1]}")
+            else:
+                lines.append(f"{metric.name}{_labels(names, labels)} {_format(value)}")
+
+    for name, (help_text, value) in (extra_gauges or {}).items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {_format(value)}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,90 @@
+# backend/app/core/passwords.py
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+from .config import settings
+from .security import verify_password, get_password_hash
+
+class PasswordService:
+    """
+    Runs bcrypt on a bounded thread pool so hashing never blocks the event loop.
+
+    bcrypt releases the GIL while it works, so threads give real parallelism.
+    At most `max_workers` hashes run at once and at most `max_queue` more may
+    wait; beyond that requests are rejected with 503 instead of piling up.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _ensure_started(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="bcrypt"
+            )
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_queue)
+
+    async def _run(self, func, *args):
+        self._ensure_started()
+        if self._slots.locked():
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servicio de autenticación saturado, intenta de nuevo",
+                headers={"Retry-After": "1"},
+            )
+
+        async with self._slots:
+            self.in_flight += 1
+            started = time.perf_counter()
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, func, *args)
+            finally:
+                elapsed = time.perf_counter() - started
+                self.in_flight -= 1
+                self.completed += 1
+                self.total_seconds += elapsed
+                self.max_seconds = max(self.max_seconds, elapsed)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "maxQueue": self.max_queue,
+            "inFlight": self.in_flight,
+            "queued": max(0, self.in_flight - self.max_workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avgSeconds": round(self.total_seconds / self.completed, 4) if self.completed else 0.0,
+            "maxSeconds": round(self.max_seconds, 4),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._slots = None
+
+password_service = PasswordService(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
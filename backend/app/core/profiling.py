@@ -0,0 +1,139 @@
+# backend/app/core/profiling.py
+
+"""
+Opt-in per-request profiler.
+
+An admin adds `X-Profile: 1` (or `?__profile=1`) to a request and that one
+request runs under cProfile. The stats are written to PROFILE_DIR as a
+`.prof` file (open with snakeviz, or turn into a flamegraph with flameprof)
+plus a `.txt` summary sorted by cumulative time, and the response carries an
+`X-Profile-File` header with the file name.
+
+Requests without the flag only pay for a header/query-string scan. Only one
+request is profiled at a time: cProfile is per thread, so while it runs it
+also sees other coroutines sharing the event loop.
+"""
+
+import asyncio
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import time
+from pathlib import Path
+from typing import List
+
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from .config import settings
+from .security import get_current_user, get_current_admin
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY = re.compile(rb"(^|&)__profile=(1|true)(&|$)")
+
+def _wants_profile(scope) -> bool:
+    if PROFILE_QUERY.search(scope.get("query_string", b"")):
+        return True
+    for name, value in scope.get("headers", []):
+        if name == PROFILE_HEADER:
+            return value.lower() in (b"1", b"true")
+    return False
+
+def _bearer_token(scope) -> str:
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer":
+                return token.strip()
+    return ""
+
+def profile_dir() -> Path:
+    return Path(settings.PROFILE_DIR)
+
+def list_profiles() -> List[dict]:
+    """Stored profiles, newest first."""
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+    files = sorted(directory.glob("*.prof"), key=lambda p: p.stat().st_mtime, reverse=True)
+    return [{"name": p.name, "size": p.stat().st_size, "createdAt": p.stat().st_mtime} for p in files]
+
+def _save(profiler: cProfile.Profile, method: str, path: str, elapsed: float) -> str:
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", path).strip("-")[:80] or "root"
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{method}-{slug}-{int(elapsed * 1000)}ms"
+
+    profiler.dump_stats(directory / f"{name}.prof")
+    summary = io.StringIO()
+    summary.write(f"{method} {path} {elapsed * 1000:.1f} ms\n\n")
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(60)
+    (directory / f"{name}.txt").write_text(summary.getvalue())
+
+    # Keep only the newest PROFILE_KEEP profiles
+    for old in sorted(directory.glob("*.prof"), key=os.path.getmtime)[:-settings.PROFILE_KEEP]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".txt").unlink(missing_ok=True)
+    return f"{name}.prof"
+
+class ProfilerMiddleware:
+    """Pure ASGI middleware that profiles flagged requests from admins."""
+
+    def __init__(self, app):
+        self.app = app
+        self._lock = asyncio.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.PROFILING_ENABLED or not _wants_profile(scope):
+            return await self.app(scope, receive, send)
+
+        try:
+            user = await get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=_bearer_token(scope)))
+            await get_current_admin(user)
+        except HTTPException as e:
+            return await self.reject(send, e.status_code, e.detail)
+
+        if self._lock.locked():
+            return await self.reject(send, 409, "Ya hay un perfilado en curso, intenta de nuevo")
+
+        async with self._lock:
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            body = []
+            start_message = None
+
+            # The response is held until the profile is saved so the file
+            # name can go in a header.
+            async def buffered_send(message):
+                nonlocal start_message
+                if message["type"] == "http.response.start":
+                    start_message = message
+                else:
+                    body.append(message)
+
+            profiler.enable()
+            try:
+                await self.app(scope, receive, buffered_send)
+            finally:
+                profiler.disable()
+
+            elapsed = time.perf_counter() - started
+            name = await asyncio.to_thread(_save, profiler, scope["method"], scope["path"], elapsed)
+
+        headers = list(start_message.get("headers", [])) + [(b"x-profile-file", name.encode())]
+        await send({**start_message, "headers": headers})
+        for message in body:
+            await send(message)
+
+    @staticmethod
+    async def reject(send, status_code: int, detail: str):
+        payload = json.dumps({"detail": detail}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())],
+        })
+        await send({"type": "http.response.body", "body": payload})
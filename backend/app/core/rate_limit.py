@@ -0,0 +1,285 @@
+# backend/app/core/rate_limit.py
+
+"""
+Admission control for the API: per-client rate limits and per-route-group
+concurrency caps.
+
+Rate limits are token buckets keyed by (client, rule). A request must pass the
+bucket of the most specific matching rule (e.g. login 5/min) and the general
+per-client bucket (100/min by default); otherwise it gets 429 + Retry-After.
+
+Concurrency caps keep expensive routes (cycle dashboard, historical stats,
+analytics) in their own pool so a spike there cannot starve CRUD traffic.
+When a group is full, requests wait in a short bounded queue; beyond that
+they get 503 + Retry-After.
+
+The memory backend is per process. With several workers, RATE_LIMIT_BACKEND
+= "mongo" shares the rate-limit counters through a TTL-indexed collection
+(fixed window instead of token bucket). If MongoDB is unreachable the
+backend fails open: requests are admitted and the error is logged, so a
+database outage does not turn every route into a 500. Concurrency caps always
+stay per process, since they protect that process's own event loop and pool.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional, Pattern, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+from .. import database as db
+from .config import settings
+
+logger = logging.getLogger("gtfunds.rate_limit")
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """'5/minute' -> (5, 60)."""
+    amount, _, period = rate.partition("/")
+    return int(amount), _PERIODS[period.strip().rstrip("s")]
+
+@dataclass
+class RateRule:
+    name: str
+    pattern: Pattern
+    limit: int
+    period: int
+    methods: Optional[frozenset] = None
+
+    def matches(self, method: str, path: str) -> bool:
+        return (self.methods is None or method in self.methods) and bool(self.pattern.match(path))
+
+def rule(name: str, pattern: str, rate: str, methods: Optional[set] = None) -> RateRule:
+    limit, period = parse_rate(rate)
+    return RateRule(name, re.compile(pattern), limit, period, frozenset(methods) if methods else None)
+
+# Most specific first; the first match applies in addition to the general budget.
+RATE_RULES: List[RateRule] = [
+    rule("login", r"^/api/v1/auth/login/?$", "5/minute", {"POST"}),
+    rule("register", r"^/api/v1/auth/register/?$", "3/minute", {"POST"}),
+    rule("change-password", r"^/api/v1/auth/change-password/?$", "5/minute", {"POST"}),
+    rule(
+        "heavy",
+        r"^/api/v1/(cycles/[^/]+/dashboard|cycles/statistics/historical|payouts/analytics/.*|distributions/run)/?$",
+        "30/minute",
+    ),
+]
+
+HEAVY_ROUTES = re.compile(
+    r"^/api/v1/(cycles/[^/]+/dashboard|cycles/statistics/historical|overview|payouts/analytics/.*|distributions/.*)/?$"
+)
+
+EXEMPT_PATHS = re.compile(r"^/(docs|redoc|openapi\.json|metrics)?/?$")
+
+# Long-lived streams: rate limited on connect, but they would hold a
+# concurrency slot for as long as the client stays connected.
+STREAM_ROUTES = re.compile(r"^/api/v1/mtm/stream/?$")
+
+# ------------------------------------------------------------
+# Rate-limit backends
+# ------------------------------------------------------------
+
+class MemoryRateLimitBackend:
+    """Token buckets in an LRU-bounded dict (oldest clients are forgotten first)."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[tuple, list]" = OrderedDict()
+
+    async def hit(self, key: tuple, limit: int, period: int) -> Tuple[bool, float]:
+        now = time.monotonic()
+        rate = limit / period
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [float(limit), now]
+            self._buckets[key] = bucket
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(float(limit), bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            return True, 0.0
+        return False, (1.0 - bucket[0]) / rate
+
+class MongoRateLimitBackend:
+    """Fixed-window counters shared by all workers through MongoDB."""
+
+    collection = "rate_limits"
+
+    async def hit(self, key: tuple, limit: int, period: int) -> Tuple[bool, float]:
+        now = time.time()
+        window = int(now // period)
+        window_end = (window + 1) * period
+        try:
+            doc = await db.db[self.collection].find_one_and_update(
+                {"_id": f"{'|'.join(key)}|{window}"},
+                {
+                    "$inc": {"count": 1},
+                    "$setOnInsert": {"expireAt": datetime.utcfromtimestamp(window_end) + timedelta(seconds=period)},
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except PyMongoError:
+            # Fail open: an unreachable counter store must not reject traffic
+            logger.exception("Rate-limit counter %s unavailable; admitting request", key[1])
+            return True, 0.0
+        if doc["count"] <= limit:
+            return True, 0.0
+        return False, window_end - now
+
+def make_backend():
+    if settings.RATE_LIMIT_BACKEND == "mongo":
+        return MongoRateLimitBackend()
+    return MemoryRateLimitBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+
+# ------------------------------------------------------------
+# Concurrency groups
+# ------------------------------------------------------------
+
+class ConcurrencyGroup:
+    """At most `limit` requests in flight and at most `queue` waiting."""
+
+    def __init__(self, name: str, limit: int, queue: int, timeout: float):
+        self.name = name
+        self.limit = limit
+        self.queue = queue
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def acquire(self) -> bool:
+        if self.active < self.limit and not self.waiting:
+            await self._semaphore.acquire()
+            self.active += 1
+            return True
+        if self.waiting >= self.queue:
+            self.rejected += 1
+            return False
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            return False
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        return True
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "queue": self.queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+        }
+
+# ------------------------------------------------------------
+# Middleware
+# ------------------------------------------------------------
+
+class AdmissionControlMiddleware:
+    """Pure ASGI middleware: rate limits first, then the route group's concurrency cap."""
+
+    # Last instance built by Starlette, for stats/metrics endpoints
+    instance: Optional["AdmissionControlMiddleware"] = None
+
+    def __init__(self, app):
+        self.app = app
+        self.backend = make_backend()
+        self.default_limit, self.default_period = parse_rate(settings.RATE_LIMIT_DEFAULT)
+        self.groups = {
+            "heavy": ConcurrencyGroup(
+                "heavy", settings.HEAVY_ROUTE_CONCURRENCY, settings.ADMISSION_QUEUE_SIZE,
+                settings.ADMISSION_QUEUE_TIMEOUT,
+            ),
+            "default": ConcurrencyGroup(
+                "default", settings.DEFAULT_ROUTE_CONCURRENCY, settings.ADMISSION_QUEUE_SIZE,
+                settings.ADMISSION_QUEUE_TIMEOUT,
+            ),
+        }
+        self.throttled = 0
+        AdmissionControlMiddleware.instance = self
+
+    def client_key(self, scope) -> str:
+        if settings.TRUST_FORWARDED_FOR:
+            for name, value in scope.get("headers", []):
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            return await self.app(scope, receive, send)
+
+        method, path = scope["method"], scope["path"]
+        if method == "OPTIONS" or EXEMPT_PATHS.match(path):
+            return await self.app(scope, receive, send)
+
+        client = self.client_key(scope)
+        route_rule = next((r for r in RATE_RULES if r.matches(method, path)), None)
+
+        checks = [((client, "general"), self.default_limit, self.default_period)]
+        if route_rule is not None:
+            checks.insert(0, ((client, route_rule.name), route_rule.limit, route_rule.period))
+
+        for key, limit, period in checks:
+            allowed, retry_after = await self.backend.hit(key, limit, period)
+            if not allowed:
+                self.throttled += 1
+                return await self.reject(send, 429, "Demasiadas solicitudes, intenta más tarde", retry_after)
+
+        if STREAM_ROUTES.match(path):
+            return await self.app(scope, receive, send)
+
+        group = self.groups["heavy" if HEAVY_ROUTES.match(path) else "default"]
+        if not await group.acquire():
+            return await self.reject(send, 503, "Servidor ocupado, intenta de nuevo en unos segundos", 1)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            group.release()
+
+    @staticmethod
+    async def reject(send, status_code: int, detail: str, retry_after: float):
+        body = json.dumps({"detail": detail}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "throttled": self.throttled,
+            "groups": {name: group.stats() for name, group in self.groups.items()},
+        }
@@ -1,17 +1,33 @@
 # backend/app/core/security.py
 
+import hashlib
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 import bcrypt
+from bson import ObjectId
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
+from .. import database as db
+from .cache import TTLCache
+
 # Configuration
 SECRET_KEY = "your-secret-key-change-in-production"  # TODO: Move to environment variable
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
+# Verified token claims, keyed by SHA-256 of the token. Entries never outlive
+# the token's own `exp`, so a cached token expires exactly when it would have.
+TOKEN_CACHE_MAX_TTL = 300  # seconds
+token_cache = TTLCache(maxsize=10_000, ttl=TOKEN_CACHE_MAX_TTL)
+
+# Public user profile (role, is_active, ...) so authenticated routes don't hit
+# Mongo on every request. Invalidate with invalidate_user_cache() on updates.
+USER_CACHE_TTL = 30  # seconds
+user_cache = TTLCache(maxsize=10_000, ttl=USER_CACHE_TTL)
+
 # Bearer token security
 security = HTTPBearer()
 
@@ -43,10 +59,14 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 def decode_token(token: str) -> dict:
-    """Decode and verify a JWT token."""
+    """Decode and verify a JWT token, reusing previously verified claims."""
+    cache_key = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = token_cache.get(cache_key)
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -54,6 +74,44 @@ def decode_token(token: str) -> dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    ttl = TOKEN_CACHE_MAX_TTL
+    if "exp" in payload:
+        ttl = min(ttl, float(payload["exp"]) - time.time())
+    if ttl > 0:
+        token_cache.set(cache_key, payload, ttl=ttl)
+    return payload
+
+async def get_cached_user(user_id: str) -> Optional[dict]:
+    """Public profile of a user, served from user_cache when fresh."""
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+
+    if not ObjectId.is_valid(user_id):
+        return None
+
+    document = await db.db["users"].find_one(
+        {"_id": ObjectId(user_id)},
+        {"email": 1, "name": 1, "role": 1, "is_active": 1, "created_at": 1}
+    )
+    if not document:
+        return None
+
+    user = {
+        "id": str(document["_id"]),
+        "email": document.get("email"),
+        "name": document.get("name"),
+        "role": document.get("role", "user"),
+        "is_active": document.get("is_active", True),
+        "created_at": document.get("created_at"),
+    }
+    user_cache.set(user_id, user)
+    return user
+
+def invalidate_user_cache(user_id: str):
+    """Drop a user's cached profile; call after any write to that user."""
+    user_cache.invalidate(user_id)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     """Dependency to get current authenticated user from token."""
     token = credentials.credentials
@@ -67,10 +125,20 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Role and active flag come from the (cached) user, so a deactivation or
+    # role change applies within USER_CACHE_TTL instead of at token expiry.
+    user = await get_cached_user(user_id)
+    if user is None or not user["is_active"]:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuario no encontrado o desactivado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
     return {
         "id": user_id,
-        "email": payload.get("email"),
-        "role": payload.get("role", "user")
+        "email": user["email"],
+        "role": user["role"]
     }
 
 async def get_current_admin(current_user: dict = Depends(get_current_user)) -> dict:
@@ -0,0 +1,225 @@
+# backend/app/core/slow_queries.py
+
+"""
+Slow-query log for MongoDB with automatic explain() capture.
+
+SlowQueryListener watches `find` and `aggregate` commands on the Motor
+client. Any command slower than SLOW_QUERY_MS is logged to the
+"gtfunds.slow_query" logger with its filter shape (values redacted), the
+route that issued it and its timings. A sample of those is then re-run as
+`explain` (executionStats) by a background task, rate limited globally and
+per query shape. The explain summary shows the winning plan (COLLSCAN vs
+IXSCAN), the index used and keys/docs examined, so missing indexes show up
+in the logs alone.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import time
+from typing import Any, Dict, Optional
+
+from pymongo import monitoring
+
+from .config import settings
+from .metrics import Counter, METRICS, LABEL_NAMES, current_request
+
+logger = logging.getLogger("gtfunds.slow_query")
+
+slow_queries = Counter("gtfunds_mongo_slow_queries_total", "MongoDB commands slower than SLOW_QUERY_MS")
+METRICS.append(slow_queries)
+LABEL_NAMES[slow_queries.name] = ("collection", "command", "plan")
+
+WATCHED_COMMANDS = {"find", "aggregate"}
+
+# Fields of the original command that explain() needs; everything else
+# (lsid, $clusterTime, $db, readPreference...) is dropped.
+EXPLAINABLE_FIELDS = {
+    "find": ("find", "filter", "sort", "projection", "skip", "limit", "hint", "collation"),
+    "aggregate": ("aggregate", "pipeline", "hint", "collation"),
+}
+
+def redact(value: Any) -> Any:
+    """Keep the structure and operators of a filter, replace literal values by their type."""
+    if isinstance(value, dict):
+        return {key: redact(val) for key, val in value.items()}
+    if isinstance(value, list):
+        # $in lists etc. collapse to one representative element
+        if value and not isinstance(value[0], (dict, list)):
+            return [f"<{type(value[0]).__name__}>", f"x{len(value)}"]
+        return [redact(item) for item in value]
+    if value is None:
+        return None
+    return f"<{type(value).__name__}>"
+
+def query_shape(command_name: str, command: dict) -> dict:
+    if command_name == "find":
+        return {"filter": redact(command.get("filter", {})), "sort": command.get("sort")}
+    return {"pipeline": redact(command.get("pipeline", []))}
+
+def _plan_stages(plan: Optional[dict]) -> list:
+    """Flatten a winning plan tree into its stage names, leaf first."""
+    stages = []
+    while plan:
+        stage = plan.get("stage")
+        if stage == "IXSCAN":
+            stages.append(f"IXSCAN({plan.get('indexName')})")
+        elif stage:
+            stages.append(stage)
+        child = plan.get("inputStage") or (plan.get("inputStages") or [None])[0] or plan.get("queryPlan")
+        plan = child
+    return list(reversed(stages))
+
+def summarize_explain(explain: dict) -> dict:
+    """Winning plan, scan type and examined counts from find or aggregate explain output."""
+    planner = explain.get("queryPlanner")
+    stats = explain.get("executionStats")
+    if planner is None:
+        # Aggregations wrap the query part inside their first $cursor stage
+        for stage in explain.get("stages", []):
+            if "$cursor" in stage:
+                planner = stage["$cursor"].get("queryPlanner")
+                stats = stage["$cursor"].get("executionStats")
+                break
+    planner = planner or {}
+    stats = stats or {}
+
+    stages = _plan_stages(planner.get("winningPlan"))
+    return {
+        "plan": " > ".join(stages) or "unknown",
+        "collscan": any(s == "COLLSCAN" for s in stages),
+        "indexes": [s[7:-1] for s in stages if s.startswith("IXSCAN(")],
+        "keysExamined": stats.get("totalKeysExamined"),
+        "docsExamined": stats.get("totalDocsExamined"),
+        "nReturned": stats.get("nReturned"),
+        "executionTimeMillis": stats.get("executionTimeMillis"),
+    }
+
+class SlowQueryListener(monitoring.CommandListener):
+    """Captures slow find/aggregate commands and hands them to the explainer."""
+
+    def __init__(self):
+        self._pending: Dict[int, tuple] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._client = None
+        self._task: Optional[asyncio.Task] = None
+        self._explain_tokens = 0.0
+        self._explain_refill = time.monotonic()
+        self._shape_seen: Dict[str, float] = {}
+
+    # --- lifecycle -------------------------------------------------
+
+    def start(self, client):
+        """Start the explain worker on the running loop (called from the app lifespan)."""
+        self._client = client
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=100)
+        self._task = asyncio.create_task(self._explain_worker())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._queue = None
+        self._loop = None
+
+    # --- listener callbacks (run on Motor's executor threads) -----
+
+    def started(self, event):
+        if event.command_name not in WATCHED_COMMANDS:
+            return
+        stats = current_request.get()
+        route = stats.route if stats is not None else "background"
+        self._pending[event.request_id] = (event.database_name, event.command, route)
+
+    def succeeded(self, event):
+        pending = self._pending.pop(event.request_id, None)
+        if pending is None:
+            return
+        elapsed_ms = event.duration_micros / 1000
+        if elapsed_ms < settings.SLOW_QUERY_MS:
+            return
+        self._report(event.command_name, pending, elapsed_ms)
+
+    def failed(self, event):
+        self._pending.pop(event.request_id, None)
+
+    # --- reporting ------------------------------------------------
+
+    def _report(self, command_name: str, pending: tuple, elapsed_ms: float):
+        database, command, route = pending
+        collection = command.get(command_name)
+        shape = query_shape(command_name, command)
+        entry = {
+            "command": command_name,
+            "collection": collection,
+            "route": route,
+            "durationMs": round(elapsed_ms, 1),
+            "shape": shape,
+        }
+
+        if random.random() > settings.SLOW_QUERY_SAMPLE_RATE or self._loop is None or not settings.SLOW_QUERY_EXPLAIN:
+            slow_queries.inc((str(collection), command_name, "not-explained"))
+            logger.warning("slow query %s", json.dumps(entry, default=str))
+            return
+
+        explain_cmd = {k: command[k] for k in EXPLAINABLE_FIELDS[command_name] if k in command}
+        if command_name == "aggregate":
+            if any("$out" in stage or "$merge" in stage for stage in explain_cmd.get("pipeline", [])):
+                logger.warning("slow query %s", json.dumps(entry, default=str))
+                return
+            explain_cmd["cursor"] = {}
+        self._loop.call_soon_threadsafe(self._enqueue, database, explain_cmd, entry)
+
+    def _enqueue(self, database: str, explain_cmd: dict, entry: dict):
+        if self._queue is None:
+            return
+        try:
+            self._queue.put_nowait((database, explain_cmd, entry))
+        except asyncio.QueueFull:
+            logger.warning("slow query %s", json.dumps(entry, default=str))
+
+    def _may_explain(self, shape_key: str) -> bool:
+        """Global token bucket plus a cooldown per query shape."""
+        now = time.monotonic()
+        last = self._shape_seen.get(shape_key)
+        if last is not None and now - last < settings.SLOW_QUERY_SHAPE_COOLDOWN:
+            return False
+
+        rate = settings.SLOW_QUERY_EXPLAINS_PER_MINUTE / 60.0
+        capacity = max(1.0, float(settings.SLOW_QUERY_EXPLAINS_PER_MINUTE))
+        self._explain_tokens = min(capacity, self._explain_tokens + (now - self._explain_refill) * rate)
+        self._explain_refill = now
+        if self._explain_tokens < 1.0:
+            return False
+
+        self._explain_tokens -= 1.0
+        self._shape_seen[shape_key] = now
+        if len(self._shape_seen) > 10_000:
+            self._shape_seen.clear()
+        return True
+
+    async def _explain_worker(self):
+        while True:
+            database, explain_cmd, entry = await self._queue.get()
+            shape_key = json.dumps([entry["collection"], entry["shape"]], sort_keys=True, default=str)
+            plan_label = "not-explained"
+            if self._may_explain(shape_key):
+                try:
+                    explain = await self._client[database].command(
+                        {"explain": explain_cmd, "verbosity": "executionStats"}
+                    )
+                    entry["explain"] = summarize_explain(explain)
+                    plan_label = "COLLSCAN" if entry["explain"]["collscan"] else "IXSCAN"
+                except Exception as e:  # explain is best effort
+                    entry["explainError"] = str(e)
+            slow_queries.inc((str(entry["collection"]), entry["command"], plan_label))
+            logger.warning("slow query %s", json.dumps(entry, default=str))
+
+slow_query_listener = SlowQueryListener()
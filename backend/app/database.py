@@ -1,35 +1,241 @@
 # app/database.py
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, Dict, List, Optional, TypeVar
+
 import motor.motor_asyncio
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
 from .core.config import settings
+from .core.metrics import event_listeners
+from .core.slow_queries import slow_query_listener
+
+logger = logging.getLogger("gtfunds.db")
+
+T = TypeVar("T")
+
+# The client is created by the app lifespan (connect), i.e. inside each worker
+# after the process manager forks, and closed on shutdown. Code reads the
+# module attributes at call time (`database.db[...]`) or uses get_database().
+client: Optional[motor.motor_asyncio.AsyncIOMotorClient] = None
+db: Optional[motor.motor_asyncio.AsyncIOMotorDatabase] = None
+
+def connect() -> motor.motor_asyncio.AsyncIOMotorDatabase:
+    """Create this process's Motor client (idempotent)."""
+    global client, db
+    if client is None:
+        client = motor.motor_asyncio.AsyncIOMotorClient(
+            settings.MONGO_URL,
+            maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+            minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+            waitQueueTimeoutMS=settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            event_listeners=event_listeners() + [slow_query_listener],
+        )
+        db = client[settings.DATABASE_NAME]
+        logger.info("MongoDB client created (pid %s, maxPoolSize %s)", os.getpid(), settings.MONGO_MAX_POOL_SIZE)
+    return db
+
+def close():
+    global client, db
+    if client is not None:
+        client.close()
+    client = None
+    db = None
+
+def get_database() -> motor.motor_asyncio.AsyncIOMotorDatabase:
+    """Dependency: the database handle of this process."""
+    if db is None:
+        raise RuntimeError("MongoDB client not initialized; database.connect() runs in the app lifespan")
+    return db
+
+def supports_transactions() -> bool:
+    """Multi-document transactions need a replica set or a sharded cluster."""
+    if client is None:
+        return False
+    return client.topology_description.topology_type_name in ("ReplicaSetWithPrimary", "Sharded")
+
+async def run_in_transaction(
+    callback: Callable[[Optional[motor.motor_asyncio.AsyncIOMotorClientSession]], Awaitable[T]],
+) -> T:
+    """
+    Run `callback(session)` inside a transaction and return its result.
+
+    Uses session.with_transaction(), which re-runs the callback on
+    TransientTransactionError (e.g. a WriteConflict when two requests touch
+    the same document) and retries the commit on
+    UnknownTransactionCommitResult, so concurrent writers queue instead of
+    failing. The callback may therefore run more than once: it must only
+    write through `session` and not mutate state it reads. Exceptions it
+    raises abort the transaction and propagate.
+
+    On a standalone server the callback runs once with session=None and the
+    writes go one by one, so callers pass `session=` through unconditionally.
+    """
+    if not supports_transactions():
+        return await callback(None)
+    async with await client.start_session() as session:
+        return await session.with_transaction(callback)
+
+# Declarative index registry: collection -> indexes the API's queries rely on.
+# audit_indexes.py checks the router query shapes against these.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "trading_accounts": [
+        # Respaldo de la secuencia FT-NNNNN (services/account_numbers.py)
+        IndexModel([("accountNumber", ASCENDING)], unique=True),
+        IndexModel([("cycleId", ASCENDING)]),
+        IndexModel([("kycId", ASCENDING)]),
+        IndexModel([("status", ASCENDING)]),
+        IndexModel([("cycleId", ASCENDING), ("phase", ASCENDING)]),
+        # GET /accounts: filtros de igualdad + _id como desempate del keyset
+        IndexModel([("phase", ASCENDING), ("status", ASCENDING), ("_id", DESCENDING)]),
+        IndexModel([("propFirm", ASCENDING), ("phase", ASCENDING), ("_id", DESCENDING)]),
+        IndexModel([("accountSize", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("cost", ASCENDING), ("_id", ASCENDING)]),
+    ],
+    "payouts": [
+        IndexModel([("kycId", ASCENDING), ("payoutDate", ASCENDING)]),
+        IndexModel([("payoutDate", ASCENDING)]),
+        IndexModel([("accountId", ASCENDING)], sparse=True),
+    ],
+    "tiros": [
+        IndexModel([("cycleId", ASCENDING)]),
+        IndexModel([("status", ASCENDING)]),
+        # accountIds: cuentas de ambas patas, escrito por services/tiro_writes.py.
+        # Multikey; con openDate/_id sirve también el historial paginado de una cuenta
+        IndexModel([("accountIds", ASCENDING), ("openDate", DESCENDING), ("_id", DESCENDING)]),
+        # Conflictos de exposición: cuentas ya usadas en un tiro abierto del símbolo
+        IndexModel(
+            [("symbol", ASCENDING), ("accountIds", ASCENDING)],
+            name="open_tiros_symbol_accountIds",
+            partialFilterExpression={"status": "Abierto"},
+        ),
+    ],
+    # Índice de exposición (services/exposure.py); las cuentas por símbolo van por _id
+    "exposures": [
+        IndexModel([("accountId", ASCENDING), ("scope", ASCENDING)]),
+        IndexModel([("cycleId", ASCENDING), ("scope", ASCENDING)]),
+        IndexModel([("scope", ASCENDING), ("netVolume", ASCENDING)]),
+    ],
+    # Última evaluación de reglas por cuenta (_id = accountId, services/prop_rules.py)
+    "rule_evaluations": [
+        IndexModel([("status", ASCENDING), ("accountNumber", ASCENDING)]),
+        IndexModel([("cycleId", ASCENDING), ("status", ASCENDING)]),
+    ],
+    "cycles": [
+        IndexModel([("status", ASCENDING)]),
+        IndexModel([("startDate", DESCENDING)]),
+    ],
+    "kycs": [
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("name", ASCENDING)]),
+        IndexModel([("name", TEXT), ("email", TEXT)]),
+    ],
+    # Rate limit counters (only used with RATE_LIMIT_BACKEND=mongo)
+    "rate_limits": [
+        IndexModel([("expireAt", ASCENDING)], expireAfterSeconds=0),
+    ],
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True),
+    ],
+    "investors": [
+        IndexModel([("email", ASCENDING)], unique=True),
+    ],
+    "investments": [
+        IndexModel([("investorId", ASCENDING), ("cycleId", ASCENDING)]),
+        IndexModel([("cycleId", ASCENDING)]),
+    ],
+    "distributions": [
+        IndexModel([("cycleId", ASCENDING), ("investorId", ASCENDING)], unique=True),
+        IndexModel([("investorId", ASCENDING)]),
+    ],
+}
+
+# Indexes replaced by a registry entry; init_indexes drops them once the
+# replacement exists so they stop costing a write on every insert/update.
+SUPERSEDED_INDEXES: Dict[str, List[str]] = {
+    # (accountIds, openDate, _id) covers every accountIds lookup
+    "tiros": ["accountIds_1"],
+}
+
+async def _existing_indexes(collection: str) -> Dict[str, tuple]:
+    return {index["name"]: tuple(index["key"].items()) async for index in db[collection].list_indexes()}
 
-client = motor.motor_asyncio.AsyncIOMotorClient(settings.MONGO_URL)
-db = client[settings.DATABASE_NAME]
+async def missing_indexes(collection: str, existing: Optional[Dict[str, tuple]] = None) -> List[IndexModel]:
+    """Registry indexes of `collection` that don't exist yet (matched by name or key)."""
+    if existing is None:
+        existing = await _existing_indexes(collection)
+    existing_names, existing_keys = set(existing), set(existing.values())
 
-async def init_indexes():
-    """Initialize database indexes for better query performance."""
+    missing = []
+    for model in INDEXES[collection]:
+        spec = model.document
+        if spec["name"] in existing_names or tuple(spec["key"].items()) in existing_keys:
+            continue
+        missing.append(model)
+    return missing
 
-    # Trading accounts indexes
-    await db["trading_accounts"].create_index("cycleId")
-    await db["trading_accounts"].create_index("kycId")
-    await db["trading_accounts"].create_index("status")
-    await db["trading_accounts"].create_index([("cycleId", 1), ("phase", 1)])
+async def unregistered_indexes(collection: str) -> List[str]:
+    """Indexes of `collection` that are not in the registry (besides _id_)."""
+    registered_names = {model.document["name"] for model in INDEXES.get(collection, [])}
+    registered_keys = {tuple(model.document["key"].items()) for model in INDEXES.get(collection, [])}
+    return [
+        name for name, key in (await _existing_indexes(collection)).items()
+        if name != "_id_" and name not in registered_names and key not in registered_keys
+    ]
 
-    # Payouts indexes
-    await db["payouts"].create_index("kycId")
+async def _drop_superseded(collection: str, existing: Dict[str, tuple]):
+    for name in SUPERSEDED_INDEXES.get(collection, []):
+        if name not in existing:
+            continue
+        try:
+            await db[collection].drop_index(name)
+            logger.info("Dropped superseded index %s on %s", name, collection)
+        except OperationFailure as e:
+            logger.warning("Could not drop superseded index %s on %s: %s", name, collection, e)
 
-    # Tiros indexes
-    await db["tiros"].create_index("cycleId")
-    await db["tiros"].create_index("status")
+async def _ensure_collection_indexes(collection: str) -> List[str]:
+    existing = await _existing_indexes(collection)
+    created = await _create_missing(collection, existing)
+    # Only once the whole registry exists, so the replacement is already built
+    if any(name in existing for name in SUPERSEDED_INDEXES.get(collection, [])):
+        if not await missing_indexes(collection):
+            await _drop_superseded(collection, existing)
+    return created
 
-    # Cycles indexes
-    await db["cycles"].create_index("status")
+async def _create_missing(collection: str, existing: Dict[str, tuple]) -> List[str]:
+    missing = await missing_indexes(collection, existing)
+    if not missing:
+        return []
+    try:
+        return await db[collection].create_indexes(missing)
+    except (DuplicateKeyError, OperationFailure) as e:
+        logger.warning("create_indexes on %s failed (%s), retrying one by one", collection, e)
 
-    # KYCs indexes
-    await db["kycs"].create_index("email", unique=True)
-    await db["kycs"].create_index("name")
-    await db["kycs"].create_index([("name", "text"), ("email", "text")])
+    # A unique index over existing duplicates (e.g. repeated accountNumbers)
+    # fails the whole batch; create the rest and log that one so startup
+    # still succeeds and audit_indexes.py keeps reporting it as missing.
+    created = []
+    for model in missing:
+        try:
+            created += await db[collection].create_indexes([model])
+        except (DuplicateKeyError, OperationFailure) as e:
+            logger.error("Could not create index %s on %s: %s", model.document["name"], collection, e)
+    return created
 
-    # Investors indexes
-    await db["investors"].create_index("email", unique=True)
+async def init_indexes() -> Dict[str, List[str]]:
+    """
+    Create the registry indexes that are missing. Each collection is diffed
+    against list_indexes() and gets at most one create_indexes call; all
+    collections run concurrently, so a warm start is one round trip each.
+    """
+    collections = list(INDEXES)
+    results = await asyncio.gather(*(_ensure_collection_indexes(name) for name in collections))
+    created = {name: names for name, names in zip(collections, results) if names}
 
-    print("Database indexes initialized successfully")
\ No newline at end of file
+    if created:
+        logger.info("Created indexes: %s", created)
+    else:
+        logger.info("Database indexes up to date")
+    return created
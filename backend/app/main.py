@@ -1,23 +1,49 @@
 # backend/app/main.py
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 
 # Importar todos los routers
-from .api import kycs, cycles, tiros, investors, auth
+from .api import kycs, cycles, tiros, investors, auth, distributions, overview, profiles, exposure, mtm, rules
 from .api.trading_accounts import nested_router as nested_accounts_router
 from .api.trading_accounts import direct_router as direct_accounts_router
 from .api.payouts import nested_router as nested_payouts_router
 from .api.payouts import direct_router as direct_payouts_router
-from .database import init_indexes
+from . import database
+from .core.passwords import password_service
+from .core.rate_limit import AdmissionControlMiddleware
+from .core.config import settings
+from .core.metrics import MetricsMiddleware, render_prometheus
+from .core.slow_queries import slow_query_listener
+from .core.profiling import ProfilerMiddleware
+from .core.compression import CompressionMiddleware
+from .services import account_numbers, display_labels, prop_rules, tiro_writes
+from .services.exposure import ensure_exposures
+from .services.mark_to_market import mark_to_market
+from .services.quotes import make_feed
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Initialize database indexes
-    await init_indexes()
+    # Startup: el cliente de Mongo se crea aquí, ya dentro del worker
+    database.connect()
+    await database.init_indexes()
+    await tiro_writes.backfill_account_ids()
+    await ensure_exposures()
+    await prop_rules.backfill_phase_started_at()
+    await display_labels.ensure_labels()
+    slow_query_listener.start(database.client)
+    quote_feed = make_feed(settings.MTM_FEED)
+    if quote_feed is not None:
+        mark_to_market.start(quote_feed)
     yield
-    # Shutdown: Cleanup (if needed)
+    # Shutdown: Cleanup
+    await mark_to_market.stop()
+    await display_labels.stop()
+    await slow_query_listener.stop()
+    password_service.shutdown()
+    database.close()
 
 app = FastAPI(
     title="GT Funds API",
@@ -31,6 +57,14 @@ origins = [
     "http://127.0.0.1:5173",
 ]
 
+# Profiler por request para admins (X-Profile: 1). Va por dentro de todo para
+# medir solo el router y el endpoint.
+app.add_middleware(ProfilerMiddleware)
+
+# Rate limiting y límites de concurrencia. Se registra antes que CORS para
+# que las respuestas 429/503 también lleven las cabeceras CORS.
+app.add_middleware(AdmissionControlMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -39,18 +73,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compresión gzip/brotli negociada para respuestas grandes
+app.add_middleware(CompressionMiddleware)
+
+# Métricas por request (latencia, consultas a Mongo). Va por fuera de todo
+# para medir también el tiempo de admisión y CORS.
+app.add_middleware(MetricsMiddleware)
+
+# Invalida el cache del overview tras escrituras en sus colecciones
+app.middleware("http")(overview.invalidate_overview_on_write)
+
 # --- REGISTRO DE ROUTERS ---
 
 # 0. Auth routes (no prefix needed for /auth)
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 
 # 1. Rutas "Top-Level" (generales)
+app.include_router(overview.router, prefix="/api/v1/overview", tags=["Overview"])
 app.include_router(cycles.router, prefix="/api/v1/cycles", tags=["Cycles"])
 app.include_router(kycs.router, prefix="/api/v1/kycs", tags=["KYC"])
 app.include_router(direct_accounts_router, prefix="/api/v1/accounts", tags=["Trading Accounts"])
 app.include_router(direct_payouts_router, prefix="/api/v1/payouts", tags=["Payouts"])
 app.include_router(tiros.router, prefix="/api/v1/tiros", tags=["Tiros"])
 app.include_router(investors.router, prefix="/api/v1/investors", tags=["Investors"])
+app.include_router(distributions.router, prefix="/api/v1/distributions", tags=["Distributions"])
+app.include_router(profiles.router, prefix="/api/v1/profiles", tags=["Profiling"])
+app.include_router(exposure.router, prefix="/api/v1/exposure", tags=["Exposure"])
+app.include_router(mtm.router, prefix="/api/v1/mtm", tags=["Mark-to-market"])
+app.include_router(rules.router, prefix="/api/v1/rules", tags=["Prop firm rules"])
 
 # 2. Rutas "Anidadas" (específicas)
 app.include_router(nested_accounts_router, prefix="/api/v1/kycs/{kyc_id}/accounts", tags=["Trading Accounts (Anidado)"])
@@ -60,14 +110,34 @@ app.include_router(nested_payouts_router, prefix="/api/v1/kycs/{kyc_id}/payouts"
 def read_root():
     return {"message": "Bienvenido a la API de GT Funds", "version": "0.3.0"}
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Métricas en formato de texto de Prometheus."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    pool = password_service.stats()
+    extra = {
+        "gtfunds_password_pool_in_flight": ("bcrypt jobs running or queued", pool["inFlight"]),
+        "gtfunds_password_pool_rejected": ("bcrypt jobs rejected because the queue was full", pool["rejected"]),
+    }
+    admission = AdmissionControlMiddleware.instance
+    if admission is not None:
+        extra["gtfunds_rate_limited_total"] = ("Requests rejected with 429", admission.throttled)
+        for name, group in admission.groups.items():
+            extra[f"gtfunds_admission_{name}_active"] = (f"Requests in flight in the {name} group", group.active)
+            extra[f"gtfunds_admission_{name}_waiting"] = (f"Requests queued in the {name} group", group.waiting)
+            extra[f"gtfunds_admission_{name}_rejected"] = (f"Requests shed with 503 in the {name} group", group.rejected)
+
+    return render_prometheus(extra)
+
 @app.get("/api/v1/helper/ids")
-async def get_sample_ids():
+async def get_sample_ids(db=Depends(database.get_database)):
     """
     Endpoint helper para obtener IDs de ejemplo para crear un Tiro.
     Este endpoint es temporal y solo para desarrollo.
     """
-    from .database import db
-    
+
     # Obtener un ciclo activo
     cycle = await db["cycles"].find_one({"status": "Activo"})
     
@@ -116,37 +186,37 @@ async def get_sample_ids():
     }
 
 @app.get("/api/v1/helper/fix-account-numbers")
-async def fix_invalid_account_numbers():
+async def fix_invalid_account_numbers(db=Depends(database.get_database)):
     """
     Endpoint helper para identificar y sugerir correcciones para accountNumbers inválidos.
     SOLO lectura - no modifica nada.
     """
-    from .database import db
     from bson import ObjectId
-    import re
     
-    def is_mongodb_id(value: str) -> bool:
-        if not value:
-            return False
-        return bool(re.match(r'^[0-9a-fA-F]{24}$', value))
+    # Filtro evaluado en el servidor sobre el índice de accountNumber
+    accounts = await db["trading_accounts"].find(
+        account_numbers.INVALID_NUMBER_FILTER,
+        {"accountNumber": 1, "kycId": 1, "propFirm": 1, "phase": 1, "status": 1},
+    ).to_list(None)
     
-    problematic_accounts = []
-    accounts_cursor = db["trading_accounts"].find()
+    # Nombres de KYC en una sola consulta
+    kyc_ids = {a.get("kycId") for a in accounts if ObjectId.is_valid(a.get("kycId") or "")}
+    kyc_names = {}
+    if kyc_ids:
+        async for kyc in db["kycs"].find({"_id": {"$in": [ObjectId(k) for k in kyc_ids]}}, {"name": 1}):
+            kyc_names[str(kyc["_id"])] = kyc.get("name")
     
-    async for account in accounts_cursor:
-        account_number = account.get("accountNumber", "")
-        
-        if is_mongodb_id(account_number):
-            kyc = await db["kycs"].find_one({"_id": ObjectId(account.get("kycId"))})
-            
-            problematic_accounts.append({
-                "id": str(account["_id"]),
-                "current_accountNumber": account_number,
-                "propFirm": account.get("propFirm"),
-                "kycName": kyc.get("name") if kyc else "Unknown",
-                "phase": account.get("phase"),
-                "status": account.get("status")
-            })
+    problematic_accounts = [
+        {
+            "id": str(account["_id"]),
+            "current_accountNumber": account.get("accountNumber"),
+            "propFirm": account.get("propFirm"),
+            "kycName": kyc_names.get(account.get("kycId"), "Unknown"),
+            "phase": account.get("phase"),
+            "status": account.get("status")
+        }
+        for account in accounts
+    ]
     
     if not problematic_accounts:
         return {
@@ -155,22 +225,11 @@ async def fix_invalid_account_numbers():
             "count": 0
         }
     
-    # Generar sugerencias de números automáticos
-    all_accounts = db["trading_accounts"].find()
-    max_number = 0
-    async for acc in all_accounts:
-        acc_num = acc.get("accountNumber", "")
-        if acc_num.startswith("FT-"):
-            try:
-                num = int(acc_num.replace("FT-", ""))
-                max_number = max(max_number, num)
-            except:
-                pass
-    
-    next_number = max_number + 1
+    # Sugerencias a partir del contador de la secuencia (no reserva números)
+    next_number = await account_numbers.peek_next_number()
     
     for acc in problematic_accounts:
-        acc["suggested_new_number"] = f"FT-{next_number:05d}"
+        acc["suggested_new_number"] = account_numbers.format_account_number(next_number)
         next_number += 1
     
     return {
@@ -178,5 +237,5 @@ async def fix_invalid_account_numbers():
         "message": f"⚠️  Encontradas {len(problematic_accounts)} cuentas con accountNumbers inválidos",
         "count": len(problematic_accounts),
         "accounts": problematic_accounts,
-        "instructions": "Usa el script fix_account_numbers.py o corrige manualmente desde la interfaz de KYC"
+        "instructions": "Usa el script fix_account_numbers.py (--auto --dry-run para revisar el diff) o corrige manualmente desde la interfaz de KYC"
     }
\ No newline at end of file
@@ -0,0 +1,44 @@
+# backend/app/models/distribution.py
+
+from pydantic import BaseModel, Field, ConfigDict
+from typing import List, Optional
+from datetime import datetime
+
+class CyclePnL(BaseModel):
+    """P&L realizado de un ciclo, desglosado por origen."""
+    cycleId: str
+    resultadoTiros: float = 0.0  # Suma de results de los tiros cerrados
+    costoCuentas: float = 0.0  # Suma del costo de las cuentas del ciclo
+    totalPayouts: float = 0.0  # Payouts de los KYC del ciclo
+    pnl: float = 0.0  # resultadoTiros - costoCuentas + totalPayouts
+
+class DistributionInDB(BaseModel):
+    """Lo que le corresponde a un inversor al cerrar un ciclo."""
+    id: str = Field(alias="_id")
+    cycleId: str
+    investorId: str
+    amountInvested: float  # Capital aportado al ciclo
+    capitalShare: float  # Fracción del capital total del ciclo (0-1)
+    profitPercentage: float  # Porcentaje acordado (ponderado si hay varias inversiones)
+    grossPnl: float  # P&L del ciclo proporcional al capital aportado
+    investorProfit: float  # Lo que finalmente se le asigna al inversor
+    cyclePnl: float  # P&L total del ciclo al momento del cálculo
+    calculatedAt: datetime
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True
+    )
+
+class DistributionRunRequest(BaseModel):
+    """Ciclos a distribuir. Si no se indican, se usan todos los ciclos completados."""
+    cycleIds: Optional[List[str]] = None
+    dryRun: bool = False  # Calcula sin persistir
+
+class DistributionRunResult(BaseModel):
+    """Resumen de una ejecución del motor de distribución."""
+    cycles: List[CyclePnL]
+    totalDistributions: int
+    upserted: int = 0
+    modified: int = 0
+    dryRun: bool = False
@@ -0,0 +1,27 @@
+# backend/app/models/exposure.py
+
+from pydantic import BaseModel
+from typing import List, Optional
+
+class ExposureEntry(BaseModel):
+    """Volumen abierto de una cuenta (o de un ciclo entero) en un símbolo."""
+    scope: str  # "account" o "cycle"
+    symbol: str
+    cycleId: Optional[str] = None
+    accountId: Optional[str] = None  # Solo en scope "account"
+    buyVolume: float = 0.0
+    sellVolume: float = 0.0
+    netVolume: float = 0.0  # buyVolume - sellVolume
+    openTiros: int = 0
+    unbalanced: bool = False  # Solo en scope "cycle": |netVolume| supera la tolerancia
+
+class CycleExposure(BaseModel):
+    """Roll-up por símbolo de un ciclo y exposición de cada una de sus cuentas."""
+    cycleId: str
+    symbols: List[ExposureEntry]
+    accounts: List[ExposureEntry]
+    unbalanced: List[ExposureEntry]  # Coberturas desbalanceadas entre leg1 y leg2
+
+class ExposureRebuildResult(BaseModel):
+    openTiros: int
+    entries: int
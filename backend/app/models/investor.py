@@ -29,8 +29,10 @@ class InvestorInDB(InvestorBase):
     """Modelo que representa un inversor en la base de datos."""
     id: str = Field(alias="_id")
     registrationDate: datetime = Field(default_factory=datetime.utcnow)
-    totalInvested: float = 0.0  # Total histórico invertido
-    investments: List[InvestmentSubModel] = []  # Lista de inversiones por ciclo
+    totalInvested: float = 0.0  # Total histórico invertido (mantenido con $inc)
+    investmentCount: int = 0  # Número de inversiones en la colección `investments`
+    activeInvestmentCount: int = 0  # Inversiones con status "Active"
+    investments: List[InvestmentSubModel] = []  # Legacy: inversiones embebidas antes de la colección `investments`
     
     model_config = ConfigDict(
         populate_by_name=True,
@@ -57,6 +59,18 @@ class InvestmentCreate(BaseModel):
     amount: float
     profitPercentage: float = 0.0
     
+class InvestmentInDB(InvestmentSubModel):
+    """Inversión almacenada en su propia colección `investments`."""
+    id: str = Field(alias="_id")
+    investorId: str
+    cycleName: Optional[str] = None  # Se añade al leer, no se persiste
+    investorName: Optional[str] = None  # Se añade al leer, no se persiste
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True
+    )
+
 class InvestmentUpdate(BaseModel):
     """Modelo para actualizar una inversión."""
     amount: Optional[float] = None
@@ -1,15 +1,15 @@
 # backend/app/models/payout.py
 
 from pydantic import BaseModel, Field, ConfigDict
+from typing import Optional
 from datetime import datetime
 
 class PayoutBase(BaseModel):
     """Campos comunes de un payout."""
     amount: float
     payoutDate: datetime = Field(default_factory=datetime.utcnow)
-    # Puedes añadir otros campos que mencionaste aquí si pertenecen al payout individual
-    # Por ejemplo: propFirm, a qué cuenta se asocia el retiro, etc.
-    # Por ahora lo mantenemos simple con solo el monto y la fecha.
+    # Opcional: la prop firm y el ciclo se obtienen a través de la cuenta
+    accountId: Optional[str] = Field(None, pattern=r'^[0-9a-fA-F]{24}$', description="Cuenta de trading que generó el payout")
 
 class PayoutCreate(PayoutBase):
     """Modelo para recibir datos al crear un payout."""
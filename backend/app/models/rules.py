@@ -0,0 +1,36 @@
+# backend/app/models/rules.py
+
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+from datetime import datetime
+
+class PhaseRulesOut(BaseModel):
+    profitTarget: Optional[float] = None  # Fracción de accountSize; None en real
+    maxDailyLoss: float
+    maxTotalLoss: float
+    minTradingDays: int = 0
+    trailing: bool = False
+
+class RuleEvaluation(BaseModel):
+    """Estado de una cuenta frente a las reglas de su prop firm y fase."""
+    accountId: str
+    accountNumber: Optional[str] = None
+    propFirm: Optional[str] = None
+    phase: str
+    cycleId: Optional[str] = None
+    accountSize: float
+    profitPct: float
+    worstDailyLossPct: float
+    maxDrawdownPct: float
+    currentDrawdownPct: float
+    tradingDays: int
+    status: str  # "ok", "near_breach", "breached" o "ready_for_promotion"
+    nextPhase: Optional[str] = None  # Solo si status == "ready_for_promotion"
+    reasons: List[str] = []
+    evaluatedAt: Optional[datetime] = None
+
+class RuleEvaluationRun(BaseModel):
+    accounts: int
+    counts: Dict[str, int]
+    elapsedMs: float
+    saved: int = 0
@@ -70,6 +70,9 @@ class TiroInDB(TiroBase):
     id: str = Field(alias="_id")
     openDate: datetime
     closeDate: Optional[datetime] = None  # Se llena cuando se cierra el tiro
+    # Número de la primera cuenta de cada pata, desnormalizado (services/display_labels.py)
+    leg1_accountNumber: Optional[str] = None
+    leg2_accountNumber: Optional[str] = None
 
     model_config = ConfigDict(
         populate_by_name=True,
@@ -88,4 +91,19 @@ class TiroUpdate(BaseModel):
     model_config = ConfigDict(
         populate_by_name=True,
         arbitrary_types_allowed=True
-    )
\ No newline at end of file
+    )
+
+class AccountTiroEntry(BaseModel):
+    """Participación de una cuenta en un tiro: su pata, sus operaciones y su resultado."""
+    tiroId: str
+    cycleId: str
+    symbol: str
+    status: str
+    openDate: Optional[datetime] = None
+    closeDate: Optional[datetime] = None
+    leg: str  # "leg1" o "leg2"
+    direction: str
+    operations: List[OperationSubModel]
+    volume: float  # Suma del lotaje de las operaciones de la cuenta
+    result: Optional[float] = None  # Suma de los results de las operaciones de la cuenta (None si ninguna tiene)
+    tiroResult: Optional[float] = None  # Resultado total del tiro
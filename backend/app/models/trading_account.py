@@ -2,6 +2,7 @@
 
 from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional
+from datetime import datetime
 
 class TradingAccountBase(BaseModel):
     """Campos comunes de una cuenta de trading."""
@@ -18,11 +19,14 @@ class TradingAccountBase(BaseModel):
 
 class TradingAccountCreate(TradingAccountBase):
     """Modelo para recibir datos al crear una cuenta."""
-    pass
+    # Si se omite, se asigna el siguiente FT-NNNNN de la secuencia
+    accountNumber: Optional[str] = Field(None, min_length=1, max_length=50, description="Número de cuenta")
 
 class TradingAccountInDB(TradingAccountBase):
     id: str = Field(alias="_id")
     kycId: str
+    nombre_kyc: Optional[str] = None  # Nombre del KYC, desnormalizado (services/display_labels.py)
+    phaseStartedAt: Optional[datetime] = None  # Inicio de la fase actual (reglas de la prop firm)
 
     model_config = ConfigDict(
         populate_by_name=True,
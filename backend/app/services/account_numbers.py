@@ -0,0 +1,100 @@
+# backend/app/services/account_numbers.py
+
+"""
+Secuencia de números de cuenta FT-NNNNN.
+
+El último número asignado vive en un documento contador
+(`counters` / _id "accountNumber"). Cada asignación es un único
+find_one_and_update con $inc, así que es O(1) y atómica entre requests y
+workers; `reserve_account_numbers(n)` reserva un bloque contiguo de una vez
+para altas masivas y scripts de reparación.
+
+El contador se siembra la primera vez con el mayor FT-NNNNN existente. Como
+una cuenta todavía puede crearse con un número escrito a mano, el índice
+único sobre trading_accounts.accountNumber es la garantía final: si una
+inserción choca, `resync()` sube el contador por encima del máximo en uso
+y se vuelve a intentar.
+"""
+
+import re
+from typing import List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from .. import database as db
+
+COUNTERS = "counters"
+SEQUENCE_ID = "accountNumber"
+PREFIX = "FT-"
+
+_FT_NUMBER = re.compile(r"^FT-(\d+)$")
+
+# Cuentas cuyo accountNumber quedó como un ObjectId (24 hex). Se evalúa en el
+# servidor sobre las claves del índice único, sin traer cada documento.
+INVALID_NUMBER_FILTER = {"accountNumber": {"$regex": r"^[0-9a-fA-F]{24}$"}}
+
+def format_account_number(number: int) -> str:
+    return f"{PREFIX}{number:05d}"
+
+def parse_account_number(value) -> Optional[int]:
+    """'FT-00042' -> 42; None si no sigue el formato FT-NNNNN."""
+    match = _FT_NUMBER.match(value or "") if isinstance(value, str) else None
+    return int(match.group(1)) if match else None
+
+async def _max_existing_number() -> int:
+    """Mayor FT-NNNNN en uso (solo lee accountNumber, prefijo anclado sobre el índice)."""
+    highest = 0
+    cursor = db.db["trading_accounts"].find(
+        {"accountNumber": {"$regex": r"^FT-\d+$"}}, {"_id": 0, "accountNumber": 1}
+    )
+    async for doc in cursor:
+        number = parse_account_number(doc.get("accountNumber"))
+        if number is not None and number > highest:
+            highest = number
+    return highest
+
+async def resync() -> int:
+    """Sube el contador al mayor número en uso ($max: nunca retrocede). Devuelve el valor final."""
+    highest = await _max_existing_number()
+    try:
+        doc = await db.db[COUNTERS].find_one_and_update(
+            {"_id": SEQUENCE_ID},
+            {"$max": {"value": highest}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        # Otro worker creó el contador a la vez; basta con repetir sin upsert
+        doc = await db.db[COUNTERS].find_one_and_update(
+            {"_id": SEQUENCE_ID},
+            {"$max": {"value": highest}},
+            return_document=ReturnDocument.AFTER,
+        )
+    return doc["value"]
+
+async def reserve_account_numbers(count: int) -> List[str]:
+    """Reserva `count` números consecutivos con un solo $inc."""
+    if count < 1:
+        return []
+    for _ in range(2):
+        doc = await db.db[COUNTERS].find_one_and_update(
+            {"_id": SEQUENCE_ID},
+            {"$inc": {"value": count}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is not None:
+            last = doc["value"]
+            return [format_account_number(n) for n in range(last - count + 1, last + 1)]
+        # Primera asignación en esta base de datos: sembrar desde los datos existentes
+        await resync()
+    raise RuntimeError("No se pudo inicializar el contador de números de cuenta")
+
+async def allocate_account_number() -> str:
+    return (await reserve_account_numbers(1))[0]
+
+async def peek_next_number() -> int:
+    """Siguiente número que se asignaría, sin reservarlo (para sugerencias)."""
+    doc = await db.db[COUNTERS].find_one({"_id": SEQUENCE_ID})
+    current = doc["value"] if doc is not None else await _max_existing_number()
+    return current + 1
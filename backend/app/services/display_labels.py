@@ -0,0 +1,195 @@
+# backend/app/services/display_labels.py
+
+"""
+Etiquetas de presentación desnormalizadas.
+
+Los listados muestran nombres y números que viven en otra colección. Para
+que las lecturas no necesiten joins, se copian al documento que los usa:
+
+    trading_accounts.nombre_kyc           ← kycs.name
+    tiros.leg1_accountNumber              ← accountNumber de la primera cuenta de leg1
+    tiros.leg2_accountNumber              ← accountNumber de la primera cuenta de leg2
+
+Se escriben al crear o editar la cuenta / el tiro con los documentos que
+la validación ya cargó. Si cambia el origen (update_kyc_record,
+update_trading_account, fix_account_numbers.py) se propaga después de
+responder, por lotes: cada lote relee los valores actuales del origen con
+un $in y solo reescribe (bulk_write) los documentos que difieren, así dos
+renombrados seguidos convergen al último.
+
+check_labels() recorre ambas colecciones con la misma lógica y repara lo
+que se haya desviado (escrituras que fallaron, datos anteriores a este
+campo). El primer arranque lo lanza en segundo plano y, al terminar, deja
+una marca en `migrations` para no volver a recorrer las colecciones.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from .. import database as db
+
+logger = logging.getLogger("gtfunds.labels")
+
+BATCH_SIZE = 1000
+MISSING = "N/A"
+MIGRATIONS = "migrations"
+BACKFILL_ID = "display_labels"
+
+_backfill_task: Optional[asyncio.Task] = None
+
+def _object_ids(ids: Iterable[str]) -> List[ObjectId]:
+    return [ObjectId(i) for i in set(ids) if i and ObjectId.is_valid(i)]
+
+def first_leg_account(leg: Optional[dict]) -> Optional[str]:
+    """Cuenta que etiqueta la pata: la primera (acepta la estructura antigua)."""
+    leg = leg or {}
+    if "accountId" in leg:
+        return leg["accountId"]
+    accounts = leg.get("accounts") or []
+    return accounts[0].get("accountId") if accounts else None
+
+def tiro_labels(tiro_doc: dict, account_numbers: Dict[str, str]) -> dict:
+    """leg1_accountNumber / leg2_accountNumber a partir de {accountId: accountNumber}."""
+    return {
+        f"{leg_name}_accountNumber": account_numbers.get(first_leg_account(tiro_doc.get(leg_name)), MISSING)
+        for leg_name in ("leg1", "leg2")
+    }
+
+# ------------------------------------------------------------
+# Sincronización por lotes
+# ------------------------------------------------------------
+
+async def _sync_accounts(query: dict, repair: bool = True) -> Tuple[int, int]:
+    """nombre_kyc de las cuentas del filtro. Devuelve (revisadas, desviadas)."""
+    checked = drifted = 0
+    last_id = None
+    while True:
+        page = dict(query) if last_id is None else {"$and": [query, {"_id": {"$gt": last_id}}]}
+        accounts = await db.db["trading_accounts"].find(page, {"kycId": 1, "nombre_kyc": 1}) \
+            .sort("_id", 1).limit(BATCH_SIZE).to_list(None)
+        if not accounts:
+            break
+        last_id = accounts[-1]["_id"]
+
+        names = {
+            str(kyc["_id"]): kyc.get("name", MISSING)
+            async for kyc in db.db["kycs"].find(
+                {"_id": {"$in": _object_ids(a.get("kycId") for a in accounts)}}, {"name": 1}
+            )
+        }
+        operations = []
+        for account in accounts:
+            expected = names.get(account.get("kycId"), MISSING)
+            if account.get("nombre_kyc") != expected:
+                operations.append(UpdateOne({"_id": account["_id"]}, {"$set": {"nombre_kyc": expected}}))
+        checked += len(accounts)
+        drifted += len(operations)
+        if repair and operations:
+            await db.db["trading_accounts"].bulk_write(operations, ordered=False)
+    return checked, drifted
+
+_TIRO_LABEL_PROJECTION = {
+    "leg1.accountId": 1, "leg1.accounts.accountId": 1,
+    "leg2.accountId": 1, "leg2.accounts.accountId": 1,
+    "leg1_accountNumber": 1, "leg2_accountNumber": 1,
+}
+
+async def _sync_tiros(query: dict, repair: bool = True) -> Tuple[int, int]:
+    """leg1/leg2_accountNumber de los tiros del filtro. Devuelve (revisados, desviados)."""
+    checked = drifted = 0
+    last_id = None
+    while True:
+        page = dict(query) if last_id is None else {"$and": [query, {"_id": {"$gt": last_id}}]}
+        tiros = await db.db["tiros"].find(page, _TIRO_LABEL_PROJECTION).sort("_id", 1).limit(BATCH_SIZE).to_list(None)
+        if not tiros:
+            break
+        last_id = tiros[-1]["_id"]
+
+        wanted = [first_leg_account(t.get(leg)) for t in tiros for leg in ("leg1", "leg2")]
+        numbers = {
+            str(acc["_id"]): acc.get("accountNumber", MISSING)
+            async for acc in db.db["trading_accounts"].find(
+                {"_id": {"$in": _object_ids(wanted)}}, {"accountNumber": 1}
+            )
+        }
+        operations = []
+        for tiro in tiros:
+            expected = tiro_labels(tiro, numbers)
+            if any(tiro.get(field) != value for field, value in expected.items()):
+                operations.append(UpdateOne({"_id": tiro["_id"]}, {"$set": expected}))
+        checked += len(tiros)
+        drifted += len(operations)
+        if repair and operations:
+            await db.db["tiros"].bulk_write(operations, ordered=False)
+    return checked, drifted
+
+# ------------------------------------------------------------
+# Propagación (en segundo plano tras la respuesta)
+# ------------------------------------------------------------
+
+async def propagate_kyc_name(kyc_id: str) -> int:
+    """Reescribe nombre_kyc en las cuentas del KYC. Devuelve cuántas cambiaron."""
+    try:
+        _, updated = await _sync_accounts({"kycId": kyc_id})
+        return updated
+    except Exception:
+        logger.exception("Failed to propagate KYC name %s; check_labels will repair it", kyc_id)
+        return 0
+
+async def propagate_account_numbers(account_ids: List[str]) -> int:
+    """Reescribe leg1/leg2_accountNumber en los tiros de esas cuentas (índice accountIds)."""
+    try:
+        _, updated = await _sync_tiros({"accountIds": {"$in": list(account_ids)}})
+        return updated
+    except Exception:
+        logger.exception("Failed to propagate account numbers for %d accounts; check_labels will repair it",
+                         len(account_ids))
+        return 0
+
+# ------------------------------------------------------------
+# Comprobación de consistencia
+# ------------------------------------------------------------
+
+async def check_labels(repair: bool = False) -> dict:
+    accounts_checked, accounts_drifted = await _sync_accounts({}, repair)
+    tiros_checked, tiros_drifted = await _sync_tiros({}, repair)
+    return {
+        "accountsChecked": accounts_checked,
+        "accountsDrifted": accounts_drifted,
+        "tirosChecked": tiros_checked,
+        "tirosDrifted": tiros_drifted,
+        "repaired": repair,
+    }
+
+async def _backfill():
+    try:
+        result = await check_labels(repair=True)
+        await db.db[MIGRATIONS].update_one(
+            {"_id": BACKFILL_ID}, {"$set": {"completedAt": datetime.utcnow(), **result}}, upsert=True
+        )
+        logger.info("Display labels backfilled: %s", result)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        logger.exception("Display label backfill failed")
+
+async def ensure_labels():
+    """Primer arranque: rellena las etiquetas en segundo plano (sin bloquear el startup)."""
+    global _backfill_task
+    if await db.db[MIGRATIONS].find_one({"_id": BACKFILL_ID}, {"_id": 1}) is None:
+        _backfill_task = asyncio.create_task(_backfill())
+
+async def stop():
+    global _backfill_task
+    if _backfill_task is not None:
+        _backfill_task.cancel()
+        try:
+            await _backfill_task
+        except asyncio.CancelledError:
+            pass
+        _backfill_task = None
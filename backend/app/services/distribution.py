@@ -0,0 +1,225 @@
+# backend/app/services/distribution.py
+
+"""
+Motor de distribución de profits a inversores.
+
+Para cada ciclo se calcula el P&L realizado:
+    pnl = resultado de tiros cerrados - costo de las cuentas + payouts
+
+y se reparte entre las inversiones del ciclo en proporción al capital
+aportado. Sobre la parte positiva se aplica el `profitPercentage` acordado;
+las pérdidas se asumen completas en proporción al capital.
+
+Todo se resuelve con una consulta por colección (no una por inversor) y un
+único cálculo vectorizado con NumPy, así que escala a miles de inversores
+y muchos ciclos a la vez.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from pymongo import UpdateOne, DeleteMany
+
+from .. import database as db
+
+async def _sum_by_cycle(collection: str, pipeline: list) -> Dict[str, float]:
+    """Ejecuta un pipeline que termina en {_id: cycleId, total} y lo devuelve como dict."""
+    totals = {}
+    async for row in db.db[collection].aggregate(pipeline):
+        totals[row["_id"]] = float(row.get("total") or 0.0)
+    return totals
+
+async def _tiro_results(cycle_ids: List[str]) -> Dict[str, float]:
+    return await _sum_by_cycle("tiros", [
+        {"$match": {"cycleId": {"$in": cycle_ids}, "status": "Cerrado", "result": {"$ne": None}}},
+        {"$group": {"_id": "$cycleId", "total": {"$sum": "$result"}}},
+    ])
+
+async def _account_costs(cycle_ids: List[str]) -> Dict[str, float]:
+    return await _sum_by_cycle("trading_accounts", [
+        {"$match": {"cycleId": {"$in": cycle_ids}}},
+        {"$group": {"_id": "$cycleId", "total": {"$sum": "$cost"}}},
+    ])
+
+def payout_cycle_stages() -> list:
+    """
+    Etapas que añaden `cycleId` a filas agrupadas por {kycId, accountId}: el
+    ciclo de la cuenta del payout y, si no tiene cuenta, el del KYC. Las
+    comparten la distribución y GET /payouts/analytics/by-cycle para que
+    ambos atribuyan los payouts igual.
+    """
+    return [
+        {"$lookup": {
+            "from": "trading_accounts",
+            "let": {"accountId": {"$convert": {"input": "$_id.accountId", "to": "objectId", "onError": None, "onNull": None}}},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$_id", "$$accountId"]}}},
+                {"$project": {"_id": 0, "cycleId": 1}},
+            ],
+            "as": "account",
+        }},
+        {"$lookup": {
+            "from": "kycs",
+            "let": {"kycId": {"$convert": {"input": "$_id.kycId", "to": "objectId", "onError": None, "onNull": None}}},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$_id", "$$kycId"]}}},
+                {"$project": {"_id": 0, "cycleId": 1}},
+            ],
+            "as": "kyc",
+        }},
+        {"$addFields": {"cycleId": {"$ifNull": [{"$first": "$account.cycleId"}, {"$first": "$kyc.cycleId"}]}}},
+    ]
+
+async def _payouts(cycle_ids: List[str]) -> Dict[str, float]:
+    # Candidatos: payouts de las cuentas o de los KYCs de los ciclos. Cada uno
+    # se atribuye después con payout_cycle_stages() y se queda solo si su
+    # ciclo es uno de los pedidos.
+    account_ids, kyc_ids = await asyncio.gather(
+        db.db["trading_accounts"].distinct("_id", {"cycleId": {"$in": cycle_ids}}),
+        db.db["kycs"].distinct("_id", {"cycleId": {"$in": cycle_ids}}),
+    )
+    return await _sum_by_cycle("payouts", [
+        {"$match": {"$or": [
+            {"accountId": {"$in": [str(i) for i in account_ids]}},
+            {"kycId": {"$in": [str(i) for i in kyc_ids]}},
+        ]}},
+        # Reducir a (kycId, accountId) antes de los lookups
+        {"$group": {"_id": {"kycId": "$kycId", "accountId": "$accountId"}, "total": {"$sum": "$amount"}}},
+        *payout_cycle_stages(),
+        {"$match": {"cycleId": {"$in": cycle_ids}}},
+        {"$group": {"_id": "$cycleId", "total": {"$sum": "$total"}}},
+    ])
+
+async def _investments(cycle_ids: List[str]) -> List[dict]:
+    """Todas las inversiones no canceladas de los ciclos (índice cycleId)."""
+    cursor = db.db["investments"].find(
+        {"cycleId": {"$in": cycle_ids}, "status": {"$ne": "Cancelled"}},
+        {"_id": 0, "investorId": 1, "cycleId": 1, "amount": 1, "profitPercentage": 1},
+    )
+    return [row async for row in cursor]
+
+async def compute_cycle_pnl(cycle_ids: List[str]) -> Dict[str, dict]:
+    """P&L realizado de varios ciclos con tres agregaciones concurrentes."""
+    tiros, costs, payouts = await asyncio.gather(
+        _tiro_results(cycle_ids),
+        _account_costs(cycle_ids),
+        _payouts(cycle_ids),
+    )
+    pnl = {}
+    for cycle_id in cycle_ids:
+        resultado = tiros.get(cycle_id, 0.0)
+        costo = costs.get(cycle_id, 0.0)
+        pagado = payouts.get(cycle_id, 0.0)
+        pnl[cycle_id] = {
+            "cycleId": cycle_id,
+            "resultadoTiros": round(resultado, 2),
+            "costoCuentas": round(costo, 2),
+            "totalPayouts": round(pagado, 2),
+            "pnl": round(resultado - costo + pagado, 2),
+        }
+    return pnl
+
+def distribute(cycle_pnl: Dict[str, dict], investments: List[dict]) -> List[dict]:
+    """
+    Reparte el P&L de cada ciclo entre sus inversiones en una sola pasada vectorizada.
+    Varias inversiones del mismo inversor en el mismo ciclo se consolidan en un registro.
+    """
+    if not investments:
+        return []
+
+    cycle_ids = list(cycle_pnl.keys())
+    cycle_index = {cycle_id: i for i, cycle_id in enumerate(cycle_ids)}
+    investor_ids = sorted({inv["investorId"] for inv in investments})
+    investor_index = {investor_id: i for i, investor_id in enumerate(investor_ids)}
+
+    cyc = np.fromiter((cycle_index[inv["cycleId"]] for inv in investments), dtype=np.int64, count=len(investments))
+    inv = np.fromiter((investor_index[i["investorId"]] for i in investments), dtype=np.int64, count=len(investments))
+    amount = np.fromiter((float(i.get("amount") or 0.0) for i in investments), dtype=np.float64, count=len(investments))
+    pct = np.fromiter((float(i.get("profitPercentage") or 0.0) for i in investments), dtype=np.float64, count=len(investments))
+    pnl = np.array([cycle_pnl[c]["pnl"] for c in cycle_ids], dtype=np.float64)
+
+    # Capital total por ciclo y participación de cada inversión
+    capital = np.bincount(cyc, weights=amount, minlength=len(cycle_ids))
+    row_capital = capital[cyc]
+    share = np.divide(amount, row_capital, out=np.zeros_like(amount), where=row_capital > 0)
+
+    gross = pnl[cyc] * share
+    profit = np.where(gross > 0, gross * pct / 100.0, gross)
+
+    # Consolidar por (ciclo, inversor)
+    keys = cyc * len(investor_ids) + inv
+    unique_keys, group = np.unique(keys, return_inverse=True)
+    g_amount = np.bincount(group, weights=amount)
+    g_share = np.bincount(group, weights=share)
+    g_gross = np.bincount(group, weights=gross)
+    g_profit = np.bincount(group, weights=profit)
+    g_pct = np.divide(
+        np.bincount(group, weights=amount * pct), g_amount,
+        out=np.zeros_like(g_amount), where=g_amount > 0
+    )
+
+    g_cyc = unique_keys // len(investor_ids)
+    g_inv = unique_keys % len(investor_ids)
+
+    return [
+        {
+            "cycleId": cycle_ids[g_cyc[i]],
+            "investorId": investor_ids[g_inv[i]],
+            "amountInvested": round(float(g_amount[i]), 2),
+            "capitalShare": round(float(g_share[i]), 6),
+            "profitPercentage": round(float(g_pct[i]), 4),
+            "grossPnl": round(float(g_gross[i]), 2),
+            "investorProfit": round(float(g_profit[i]), 2),
+            "cyclePnl": float(pnl[g_cyc[i]]),
+        }
+        for i in range(len(unique_keys))
+    ]
+
+async def run_distribution(cycle_ids: Optional[List[str]] = None, dry_run: bool = False) -> dict:
+    """
+    Calcula y persiste las distribuciones de los ciclos indicados
+    (por defecto, todos los ciclos completados).
+    """
+    if not cycle_ids:
+        cycle_ids = [
+            str(doc["_id"])
+            async for doc in db.db["cycles"].find({"status": "Completado"}, {"_id": 1})
+        ]
+
+    if not cycle_ids:
+        return {"cycles": [], "totalDistributions": 0, "upserted": 0, "modified": 0, "dryRun": dry_run}
+
+    cycle_pnl, investments = await asyncio.gather(
+        compute_cycle_pnl(cycle_ids),
+        _investments(cycle_ids),
+    )
+    records = distribute(cycle_pnl, investments)
+
+    result = {
+        "cycles": list(cycle_pnl.values()),
+        "totalDistributions": len(records),
+        "upserted": 0,
+        "modified": 0,
+        "dryRun": dry_run,
+    }
+    if dry_run:
+        return result
+
+    calculated_at = datetime.utcnow()
+    operations = [
+        UpdateOne(
+            {"cycleId": record["cycleId"], "investorId": record["investorId"]},
+            {"$set": {**record, "calculatedAt": calculated_at}},
+            upsert=True,
+        )
+        for record in records
+    ]
+    # Inversiones canceladas o eliminadas desde el último cálculo
+    operations.append(DeleteMany({"cycleId": {"$in": cycle_ids}, "calculatedAt": {"$lt": calculated_at}}))
+
+    bulk_result = await db.db["distributions"].bulk_write(operations, ordered=True)
+    result["upserted"] = bulk_result.upserted_count
+    result["modified"] = bulk_result.modified_count
+    return result
@@ -0,0 +1,210 @@
+# backend/app/services/exposure.py
+
+"""
+Índice de exposición neta, mantenido de forma incremental.
+
+La colección `exposures` guarda el volumen abierto en cada dirección:
+    - por cuenta y símbolo:  _id "account:<accountId>:<symbol>"
+    - por ciclo y símbolo:   _id "cycle:<cycleId>:<symbol>" (roll-up)
+con buyVolume, sellVolume, netVolume (= buy - sell) y openTiros.
+
+Cada escritura de un tiro (alta, edición, cierre, borrado) calcula lo que el
+tiro aportaba antes y lo que aporta después y aplica la diferencia con $inc
+en un único bulk_write, dentro de la misma transacción que el tiro cuando
+hay replica set. Así "¿cuánto EURUSD tiene abierto esta cuenta?" es un
+find_one por _id y nunca un recorrido de los tiros abiertos.
+
+Todas las altas de un mismo ciclo y símbolo hacen $inc sobre el mismo
+roll-up, así que dentro de la transacción ese documento es un punto de
+conflicto seguro. Se mantiene en la transacción (el roll-up nunca se
+desvía de sus cuentas) y se serializa con reintentos:
+database.run_in_transaction() repite la transacción ante un WriteConflict,
+de modo que las altas simultáneas esperan su turno en lugar de fallar.
+
+Como entre patas las direcciones son opuestas, un roll-up de ciclo con
+netVolume distinto de cero es una cobertura desbalanceada entre leg1 y leg2.
+`rebuild_exposures()` reconstruye todo desde los tiros abiertos: reemplaza
+cada clave con upsert y después borra las que ya no existen, así la
+colección nunca queda vacía ni a medias. Un tiro escrito durante la
+reconstrucción puede quedar pisado; basta con volver a lanzarla. Solo corre
+una a la vez (documento de bloqueo en `migrations`), también entre workers.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from .. import database as db
+from ..core.config import settings
+
+COLLECTION = "exposures"
+OPEN = "Abierto"
+MIGRATIONS = "migrations"
+REBUILD_LOCK_ID = "exposures_rebuild"
+REBUILD_LOCK_TTL = timedelta(minutes=10)  # un worker que muere con el bloqueo lo suelta al vencer
+
+def account_key(account_id: str, symbol: str) -> str:
+    return f"account:{account_id}:{symbol}"
+
+def cycle_key(cycle_id: str, symbol: str) -> str:
+    return f"cycle:{cycle_id}:{symbol}"
+
+def tiro_exposure(tiro_doc: Optional[dict]) -> Dict[str, Dict[str, float]]:
+    """
+    Volumen abierto que aporta un tiro, por cuenta: {accountId: {"buy", "sell"}}.
+    Un tiro cerrado no aporta nada; dentro de uno abierto, las operaciones con
+    exitPrice ya están cerradas. Acepta también la estructura antigua de patas.
+    """
+    exposure: Dict[str, Dict[str, float]] = {}
+    if not tiro_doc or tiro_doc.get("status") != OPEN:
+        return exposure
+
+    for leg_name in ("leg1", "leg2"):
+        leg = tiro_doc.get(leg_name) or {}
+        side = "buy" if leg.get("direction") == "BUY" else "sell"
+        if "accountId" in leg:
+            volumes = [(leg["accountId"], float(leg.get("volume") or 0.0))]
+        else:
+            volumes = [
+                (acc["accountId"], sum(float(op.get("volume") or 0.0) for op in acc.get("operations", [])
+                                       if op.get("exitPrice") is None))
+                for acc in leg.get("accounts", [])
+            ]
+        for account_id, volume in volumes:
+            entry = exposure.setdefault(account_id, {"buy": 0.0, "sell": 0.0})
+            entry[side] += volume
+    return exposure
+
+def _add(increments: Dict[str, dict], key: str, fields: dict, buy: float, sell: float, tiros: int):
+    entry = increments.setdefault(key, {"fields": fields, "inc": defaultdict(float)})
+    entry["inc"]["buyVolume"] += buy
+    entry["inc"]["sellVolume"] += sell
+    entry["inc"]["netVolume"] += buy - sell
+    entry["inc"]["openTiros"] += tiros
+
+def _accumulate(increments: Dict[str, dict], tiro_doc: Optional[dict], sign: int):
+    exposure = tiro_exposure(tiro_doc)
+    if not exposure:
+        return
+    cycle_id, symbol = tiro_doc.get("cycleId"), tiro_doc.get("symbol")
+    total_buy = total_sell = 0.0
+    for account_id, volume in exposure.items():
+        fields = {"scope": "account", "accountId": account_id, "cycleId": cycle_id, "symbol": symbol}
+        _add(increments, account_key(account_id, symbol), fields, sign * volume["buy"], sign * volume["sell"], sign)
+        total_buy += volume["buy"]
+        total_sell += volume["sell"]
+    fields = {"scope": "cycle", "cycleId": cycle_id, "symbol": symbol}
+    _add(increments, cycle_key(cycle_id, symbol), fields, sign * total_buy, sign * total_sell, sign)
+
+def _rounded(inc: dict) -> dict:
+    values = {name: round(value, 8) for name, value in inc.items()}
+    values["openTiros"] = int(inc["openTiros"])
+    return values
+
+def _operations(increments: Dict[str, dict]) -> List[UpdateOne]:
+    operations = []
+    for key, entry in increments.items():
+        inc = _rounded(entry["inc"])
+        if not any(inc.values()):
+            continue
+        operations.append(UpdateOne({"_id": key}, {"$inc": inc, "$setOnInsert": entry["fields"]}, upsert=True))
+    return operations
+
+async def apply_tiro_change(before: Optional[dict], after: Optional[dict], session=None):
+    """
+    Aplica la diferencia de exposición entre dos versiones de un tiro (None =
+    no existe). Con `session`, debe llamarse desde un callback de
+    database.run_in_transaction() para que los conflictos sobre el roll-up de
+    ciclo se reintenten.
+    """
+    increments: Dict[str, dict] = {}
+    _accumulate(increments, before, -1)
+    _accumulate(increments, after, +1)
+    operations = _operations(increments)
+    if operations:
+        await db.db[COLLECTION].bulk_write(operations, ordered=False, session=session)
+
+async def _acquire_rebuild_lock() -> bool:
+    """Toma el bloqueo si está libre o vencido; DuplicateKeyError = lo tiene otro."""
+    now = datetime.utcnow()
+    try:
+        await db.db[MIGRATIONS].update_one(
+            {"_id": REBUILD_LOCK_ID, "lockedUntil": {"$lt": now}},
+            {"$set": {"lockedUntil": now + REBUILD_LOCK_TTL}},
+            upsert=True,
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+async def _release_rebuild_lock():
+    await db.db[MIGRATIONS].delete_one({"_id": REBUILD_LOCK_ID})
+
+async def _rebuild() -> dict:
+    increments: Dict[str, dict] = {}
+    cursor = db.db["tiros"].find({"status": OPEN}, {"cycleId": 1, "symbol": 1, "status": 1, "leg1": 1, "leg2": 1})
+    tiros = 0
+    async for tiro in cursor:
+        _accumulate(increments, tiro, +1)
+        tiros += 1
+
+    operations = [
+        ReplaceOne({"_id": key}, {**entry["fields"], **_rounded(entry["inc"])}, upsert=True)
+        for key, entry in increments.items()
+    ]
+    if operations:
+        await db.db[COLLECTION].bulk_write(operations, ordered=False)
+    await db.db[COLLECTION].delete_many({"_id": {"$nin": list(increments)}})
+    return {"openTiros": tiros, "entries": len(operations)}
+
+async def rebuild_exposures() -> Optional[dict]:
+    """Recalcula la colección entera a partir de los tiros abiertos. None si ya hay otra en curso."""
+    if not await _acquire_rebuild_lock():
+        return None
+    try:
+        return await _rebuild()
+    finally:
+        await _release_rebuild_lock()
+
+async def ensure_exposures():
+    """
+    Primera puesta en marcha: construye el índice si está vacío y hay tiros
+    abiertos. Con varios workers arrancando a la vez, solo uno lo construye.
+    """
+    if await db.db[COLLECTION].find_one({}, {"_id": 1}) is not None:
+        return
+    if await db.db["tiros"].find_one({"status": OPEN}, {"_id": 1}) is not None:
+        await rebuild_exposures()
+
+# ------------------------------------------------------------
+# Lecturas
+# ------------------------------------------------------------
+
+def is_unbalanced(entry: dict) -> bool:
+    return abs(entry.get("netVolume", 0.0)) > settings.HEDGE_IMBALANCE_TOLERANCE
+
+def _active(entry: dict) -> bool:
+    # Los $inc de floats pueden dejar residuos como 1e-17 al cerrar todo
+    return entry.get("openTiros", 0) > 0 or abs(entry.get("buyVolume", 0.0)) > 1e-9 or abs(entry.get("sellVolume", 0.0)) > 1e-9
+
+async def account_exposure(account_id: str, symbol: Optional[str] = None) -> List[dict]:
+    if symbol is not None:
+        entry = await db.db[COLLECTION].find_one({"_id": account_key(account_id, symbol)})
+        return [entry] if entry and _active(entry) else []
+    entries = await db.db[COLLECTION].find({"accountId": account_id, "scope": "account"}).to_list(None)
+    return [e for e in entries if _active(e)]
+
+async def cycle_exposure(cycle_id: str) -> List[dict]:
+    entries = await db.db[COLLECTION].find({"cycleId": cycle_id}).to_list(None)
+    return [e for e in entries if _active(e)]
+
+async def unbalanced_hedges(cycle_id: Optional[str] = None) -> List[dict]:
+    """Roll-ups de ciclo cuyo volumen neto supera la tolerancia (consulta por índice sobre netVolume)."""
+    tolerance = settings.HEDGE_IMBALANCE_TOLERANCE
+    query = {"scope": "cycle", "$or": [{"netVolume": {"$gt": tolerance}}, {"netVolume": {"$lt": -tolerance}}]}
+    if cycle_id is not None:
+        query["cycleId"] = cycle_id
+    return await db.db[COLLECTION].find(query).to_list(None)
@@ -0,0 +1,269 @@
+# backend/app/services/mark_to_market.py
+
+"""
+Mark-to-market de los tiros abiertos.
+
+Las operaciones abiertas (tiros "Abierto", operaciones sin exitPrice) se
+cargan en un `PositionBook`: arrays paralelos de NumPy con símbolo, signo
+(BUY +1 / SELL -1), volumen, precio de entrada y a qué tiro, cuenta y ciclo
+pertenecen. El libro se recarga cada MTM_POSITIONS_REFRESH segundos o en
+cuanto este worker escribe un tiro (invalidate_positions()).
+
+Un feed (services/quotes.py) mantiene el último bid/ask por símbolo y cada
+MTM_INTERVAL segundos se revalúa el libro entero en una pasada vectorizada:
+
+    mark = bid si BUY, ask si SELL
+    pnl  = (mark - entryPrice) * volume * contractSize * signo * factor_usd
+
+y se agrega por tiro, cuenta y ciclo con np.bincount. factor_usd pasa el
+P&L de la divisa cotizada a USD con el propio par (USDJPY) o con el cruce
+contra USD (GBPUSD para EURGBP). Operaciones sin precio quedan fuera de los
+totales y se cuentan en `unpriced`.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .. import database as db
+from ..core.config import settings
+from .quotes import QuoteFeed
+
+logger = logging.getLogger("gtfunds.mtm")
+
+OPEN = "Abierto"
+
+class PositionBook:
+    """Operaciones abiertas como arrays paralelos (una fila por operación)."""
+
+    def __init__(self):
+        self.tiro_ids: List[str] = []
+        self.tiro_cycles: List[str] = []
+        self.account_ids: List[str] = []
+        self.account_cycles: List[str] = []
+        self.cycle_ids: List[str] = []
+        self.symbols: List[str] = []
+        self.symbol_idx = np.zeros(0, dtype=np.int32)
+        self.tiro_idx = np.zeros(0, dtype=np.int32)
+        self.account_idx = np.zeros(0, dtype=np.int32)
+        self.cycle_idx = np.zeros(0, dtype=np.int32)
+        self.sign = np.zeros(0)
+        self.volume = np.zeros(0)
+        self.entry = np.zeros(0)
+        self.contract = np.zeros(0)
+
+    def __len__(self) -> int:
+        return len(self.volume)
+
+    @classmethod
+    def from_tiros(cls, tiros: Iterable[dict]) -> "PositionBook":
+        book = cls()
+        codes: Dict[str, Dict[str, int]] = {"tiro": {}, "account": {}, "cycle": {}, "symbol": {}}
+
+        def code(kind: str, key: str, names: List[str]) -> int:
+            table = codes[kind]
+            if key not in table:
+                table[key] = len(names)
+                names.append(key)
+            return table[key]
+
+        rows: List[Tuple[int, int, int, int, float, float, float, float]] = []
+        for tiro in tiros:
+            tiro_id, cycle_id, symbol = str(tiro["_id"]), tiro.get("cycleId"), str(tiro.get("symbol", "")).upper()
+            contract = settings.MTM_CONTRACT_SIZES.get(symbol, settings.MTM_CONTRACT_SIZE)
+            for leg_name in ("leg1", "leg2"):
+                leg = tiro.get(leg_name) or {}
+                sign = 1.0 if leg.get("direction") == "BUY" else -1.0
+                # Los tiros con la estructura antigua no tienen precio de entrada
+                for account in leg.get("accounts", []):
+                    for op in account.get("operations", []):
+                        if op.get("exitPrice") is not None or not op.get("entryPrice"):
+                            continue
+                        t = code("tiro", tiro_id, book.tiro_ids)
+                        if t == len(book.tiro_cycles):
+                            book.tiro_cycles.append(cycle_id)
+                        a = code("account", account["accountId"], book.account_ids)
+                        if a == len(book.account_cycles):
+                            book.account_cycles.append(cycle_id)
+                        rows.append((
+                            code("symbol", symbol, book.symbols), t, a, code("cycle", cycle_id, book.cycle_ids),
+                            sign, float(op.get("volume") or 0.0), float(op["entryPrice"]), contract,
+                        ))
+
+        if rows:
+            columns = list(zip(*rows))
+            book.symbol_idx, book.tiro_idx, book.account_idx, book.cycle_idx = (
+                np.array(c, dtype=np.int32) for c in columns[:4]
+            )
+            book.sign, book.volume, book.entry, book.contract = (np.array(c, dtype=np.float64) for c in columns[4:])
+        return book
+
+def _mid(prices: Dict[str, Tuple[float, float]], symbol: str) -> float:
+    quote = prices.get(symbol)
+    return (quote[0] + quote[1]) / 2 if quote else math.nan
+
+def usd_factor(symbol: str, prices: Dict[str, Tuple[float, float]]) -> float:
+    """Multiplicador que pasa un P&L en la divisa cotizada de `symbol` a USD."""
+    if len(symbol) != 6 or not symbol.isalpha():
+        return 1.0  # índices, metales como XAUUSD ya cotizan en USD
+    base, quote = symbol[:3], symbol[3:]
+    if quote == "USD":
+        return 1.0
+    if base == "USD":
+        return 1.0 / _mid(prices, symbol)
+    if f"{quote}USD" in prices:
+        return _mid(prices, f"{quote}USD")
+    if f"USD{quote}" in prices:
+        return 1.0 / _mid(prices, f"USD{quote}")
+    return math.nan
+
+def revalue(book: PositionBook, prices: Dict[str, Tuple[float, float]]) -> dict:
+    """P&L no realizado de todo el libro en una pasada."""
+    # Arrays por símbolo (pocos), indexados luego por operación (muchas)
+    bid = np.array([prices.get(s, (math.nan, math.nan))[0] for s in book.symbols], dtype=np.float64)
+    ask = np.array([prices.get(s, (math.nan, math.nan))[1] for s in book.symbols], dtype=np.float64)
+    factor = np.array([usd_factor(s, prices) for s in book.symbols], dtype=np.float64)
+
+    mark = np.where(book.sign > 0, bid[book.symbol_idx], ask[book.symbol_idx])
+    pnl = (mark - book.entry) * book.volume * book.contract * book.sign * factor[book.symbol_idx]
+    priced = ~np.isnan(pnl)
+    pnl = np.where(priced, pnl, 0.0)
+
+    by_tiro = np.bincount(book.tiro_idx, weights=pnl, minlength=len(book.tiro_ids))
+    unpriced_tiro = np.bincount(book.tiro_idx, weights=~priced, minlength=len(book.tiro_ids)) > 0
+    by_account = np.bincount(book.account_idx, weights=pnl, minlength=len(book.account_ids))
+    by_cycle = np.bincount(book.cycle_idx, weights=pnl, minlength=len(book.cycle_ids))
+
+    return {
+        "asOf": datetime.utcnow(),
+        "positions": len(book),
+        "unpriced": int((~priced).sum()),
+        "tiros": {
+            tiro_id: {"cycleId": cycle_id, "unrealizedPnl": round(float(value), 2), "complete": not bool(missing)}
+            for tiro_id, cycle_id, value, missing in zip(book.tiro_ids, book.tiro_cycles, by_tiro, unpriced_tiro)
+        },
+        "accounts": {
+            account_id: {"cycleId": cycle_id, "unrealizedPnl": round(float(value), 2)}
+            for account_id, cycle_id, value in zip(book.account_ids, book.account_cycles, by_account)
+        },
+        "cycles": {cycle_id: round(float(value), 2) for cycle_id, value in zip(book.cycle_ids, by_cycle)},
+    }
+
+class MarkToMarketService:
+    """Consume el feed, mantiene el libro y publica snapshots de P&L no realizado."""
+
+    def __init__(self):
+        self.prices: Dict[str, Tuple[float, float]] = {}
+        self.book = PositionBook()
+        self.snapshot: Optional[dict] = None
+        self.quotes_received = 0
+        self.last_revalue_ms = 0.0
+        self._dirty = True
+        self._loaded_at = 0.0
+        self._priced_version = -1
+        self._tasks: List[asyncio.Task] = []
+        self._changed: Optional[asyncio.Event] = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self, feed: QuoteFeed):
+        self._changed = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._consume(feed)),
+            asyncio.create_task(self._revalue_loop()),
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        # Despierta a los clientes SSE en espera: running ya es False y salen del bucle
+        if self._changed is not None:
+            self._changed.set()
+
+    def invalidate_positions(self):
+        """Llamado tras escribir un tiro: el libro se recarga en la próxima pasada."""
+        self._dirty = True
+
+    async def _consume(self, feed: QuoteFeed):
+        while True:
+            try:
+                async for quote in feed.quotes():
+                    self.prices[quote.symbol] = (quote.bid, quote.ask)
+                    self.quotes_received += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Quote feed failed, restarting")
+                await asyncio.sleep(1.0)
+                continue
+
+            # Terminó sin error: un feed finito se respeta y uno vacío no puede
+            # relanzarse sin pausa (acapararía el event loop)
+            if not feed.restart_on_end:
+                logger.info("Quote feed finished")
+                return
+            logger.warning("Quote feed ended, restarting in 1s")
+            await asyncio.sleep(1.0)
+
+    async def _load_book(self):
+        tiros = await db.db["tiros"].find(
+            {"status": OPEN}, {"cycleId": 1, "symbol": 1, "leg1": 1, "leg2": 1}
+        ).to_list(None)
+        self.book = PositionBook.from_tiros(tiros)
+        self._loaded_at = time.monotonic()
+
+    async def _revalue_loop(self):
+        while True:
+            try:
+                reloaded = False
+                if self._dirty or time.monotonic() - self._loaded_at > settings.MTM_POSITIONS_REFRESH:
+                    self._dirty = False
+                    await self._load_book()
+                    reloaded = True
+
+                if reloaded or self.quotes_received != self._priced_version:
+                    self._priced_version = self.quotes_received
+                    started = time.perf_counter()
+                    self.snapshot = revalue(self.book, self.prices)
+                    self.last_revalue_ms = (time.perf_counter() - started) * 1000
+                    changed, self._changed = self._changed, asyncio.Event()
+                    changed.set()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Mark-to-market pass failed")
+            await asyncio.sleep(settings.MTM_INTERVAL)
+
+    async def updates(self) -> AsyncIterator[dict]:
+        """Un snapshot nuevo cada vez que cambia (para el stream SSE)."""
+        if self.snapshot is not None:
+            yield self.snapshot
+        while self.running:
+            await self._changed.wait()
+            if not self.running:
+                return
+            yield self.snapshot
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "symbols": len(self.prices),
+            "quotesReceived": self.quotes_received,
+            "positions": len(self.book),
+            "lastRevalueMs": round(self.last_revalue_ms, 3),
+        }
+
+mark_to_market = MarkToMarketService()
@@ -0,0 +1,263 @@
+# backend/app/services/prop_rules.py
+
+"""
+Motor de reglas de las prop firms.
+
+Cada prop firm define, por fase, el objetivo de profit y los límites de
+pérdida diaria y total (fracciones de accountSize). Para cada cuenta en
+fase1, fase2 o real se arma su serie de P&L diario realizado (resultados de
+las operaciones de tiros cerrados, por día de cierre) desde que empezó su
+fase actual (`phaseStartedAt`, lo fija update_trading_account al cambiar
+de fase): lo ganado o perdido en fase1 no cuenta para fase2. Todas las
+cuentas se evalúan a la vez sobre una matriz cuentas × días con NumPy:
+
+    equity        = accountSize + cumsum(pnl diario)
+    pérdida diaria = -min(pnl del día, 0) / accountSize
+    drawdown total = desde el balance inicial, o desde el máximo de equity
+                     si la firma usa drawdown "trailing"
+
+Solo se usan las columnas de días con actividad: la equity no cambia los
+demás días, así que el resultado es exacto y la matriz sigue siendo chica.
+Si el mark-to-market está activo, el P&L no realizado de la cuenta se suma
+al día de hoy.
+
+Cada cuenta sale con un estado:
+    breached             superó algún límite
+    near_breach          el día de hoy o el drawdown actual usan más de
+                         RULES_NEAR_BREACH del límite
+    ready_for_promotion  alcanzó el objetivo con los días mínimos (fase1 → fase2 → real)
+    ok
+El cambio de fase no se aplica: solo se señala. save_evaluations() guarda
+el resultado de la pasada nocturna en `rule_evaluations` (una fila por cuenta).
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from pymongo import ReplaceOne
+
+from .. import database as db
+from ..core.config import settings
+from .mark_to_market import mark_to_market
+
+@dataclass(frozen=True)
+class PhaseRules:
+    profit_target: Optional[float]  # None: sin objetivo (cuenta real)
+    max_daily_loss: float
+    max_total_loss: float
+    min_trading_days: int = 0
+    trailing: bool = False  # drawdown total desde el máximo de equity en vez del balance inicial
+
+def _challenge(phase1_target: float, daily: float, total: float, min_days: int = 0, trailing: bool = False):
+    return {
+        "fase1": PhaseRules(phase1_target, daily, total, min_days, trailing),
+        "fase2": PhaseRules(0.05, daily, total, min_days, trailing),
+        "real": PhaseRules(None, daily, total, 0, trailing),
+    }
+
+# Clave: nombre de la prop firm en minúsculas y sin espacios
+PROP_FIRM_RULES: Dict[str, Dict[str, PhaseRules]] = {
+    "default": _challenge(0.08, 0.05, 0.10),
+    "ftmo": _challenge(0.10, 0.05, 0.10, min_days=4),
+    "fundednext": _challenge(0.08, 0.05, 0.10),
+    "the5ers": _challenge(0.08, 0.05, 0.10),
+    "myforexfunds": _challenge(0.08, 0.05, 0.12),
+    "e8funding": _challenge(0.08, 0.05, 0.08, trailing=True),
+}
+
+COLLECTION = "rule_evaluations"
+EVALUATED_PHASES = ("fase1", "fase2", "real")
+NEXT_PHASE = {"fase1": "fase2", "fase2": "real"}
+
+def rules_for(prop_firm: Optional[str], phase: str) -> PhaseRules:
+    key = (prop_firm or "").lower().replace(" ", "")
+    return PROP_FIRM_RULES.get(key, PROP_FIRM_RULES["default"])[phase]
+
+# ------------------------------------------------------------
+# Datos
+# ------------------------------------------------------------
+
+async def _accounts(account_filter: dict) -> List[dict]:
+    query = {"phase": {"$in": list(EVALUATED_PHASES)}, "status": {"$ne": "Burned"}, **account_filter}
+    projection = {"accountNumber": 1, "propFirm": 1, "phase": 1, "accountSize": 1, "cycleId": 1, "phaseStartedAt": 1}
+    return await db.db["trading_accounts"].find(query, projection).to_list(None)
+
+async def backfill_phase_started_at() -> int:
+    """
+    Cuentas anteriores a `phaseStartedAt`: se toma la fecha de alta (el _id),
+    lo único que se sabe de ellas. Una sola actualización en el servidor.
+    """
+    result = await db.db["trading_accounts"].update_many(
+        {"phaseStartedAt": {"$exists": False}},
+        [{"$set": {"phaseStartedAt": {"$toDate": "$_id"}}}],
+    )
+    return result.modified_count
+
+async def daily_pnl(phase_starts: Dict[str, Optional[datetime]]) -> List[dict]:
+    """
+    [{accountId, day, pnl}] de los tiros cerrados de esas cuentas (índice
+    accountIds), solo los cerrados desde el inicio de la fase de cada cuenta.
+    El servidor suma las operaciones por cuenta y tiro; el corte por fecha,
+    distinto para cada cuenta, y el agrupado por día se hacen aquí.
+    """
+    account_ids = list(phase_starts)
+    starts = [s for s in phase_starts.values() if s is not None]
+    match = {"accountIds": {"$in": account_ids}, "status": "Cerrado"}
+    if starts and len(starts) == len(account_ids):
+        match["closeDate"] = {"$gte": min(starts)}
+    pipeline = [
+        {"$match": match},
+        {"$project": {
+            "closeDate": {"$ifNull": ["$closeDate", "$openDate"]},
+            "accounts": {"$concatArrays": [
+                {"$ifNull": ["$leg1.accounts", []]}, {"$ifNull": ["$leg2.accounts", []]},
+            ]},
+        }},
+        {"$unwind": "$accounts"},
+        {"$match": {"accounts.accountId": {"$in": account_ids}}},
+        {"$project": {
+            "_id": 0,
+            "accountId": "$accounts.accountId",
+            "closeDate": 1,
+            "pnl": {"$sum": "$accounts.operations.result"},
+        }},
+    ]
+    by_day: Dict[tuple, float] = {}
+    async for row in db.db["tiros"].aggregate(pipeline):
+        start = phase_starts.get(row["accountId"])
+        if row.get("closeDate") is None or (start is not None and row["closeDate"] < start):
+            continue
+        key = (row["accountId"], row["closeDate"].strftime("%Y-%m-%d"))
+        by_day[key] = by_day.get(key, 0.0) + float(row.get("pnl") or 0.0)
+    return [{"accountId": account_id, "day": day, "pnl": pnl} for (account_id, day), pnl in by_day.items()]
+
+# ------------------------------------------------------------
+# Evaluación vectorizada
+# ------------------------------------------------------------
+
+def evaluate(accounts: List[dict], rows: List[dict], unrealized: Optional[Dict[str, float]] = None,
+             today: Optional[str] = None) -> List[dict]:
+    """
+    Evalúa todas las cuentas a la vez. `rows` viene de daily_pnl(); los días
+    anteriores al phaseStartedAt de la cuenta se descartan también aquí.
+    """
+    if not accounts:
+        return []
+    today = today or datetime.utcnow().strftime("%Y-%m-%d")
+    unrealized = unrealized or {}
+
+    account_index = {str(acc["_id"]): i for i, acc in enumerate(accounts)}
+    first_day = {
+        str(acc["_id"]): acc["phaseStartedAt"].strftime("%Y-%m-%d")
+        for acc in accounts if acc.get("phaseStartedAt") is not None
+    }
+    known = [
+        row for row in rows
+        if row["accountId"] in account_index and row["day"] >= first_day.get(row["accountId"], "")
+    ]
+    days = sorted({row["day"] for row in known} | {today})
+    day_index = {day: j for j, day in enumerate(days)}
+
+    pnl = np.zeros((len(accounts), len(days)))
+    np.add.at(
+        pnl,
+        (np.fromiter((account_index[r["accountId"]] for r in known), dtype=np.int64, count=len(known)),
+         np.fromiter((day_index[r["day"]] for r in known), dtype=np.int64, count=len(known))),
+        np.fromiter((r["pnl"] for r in known), dtype=np.float64, count=len(known)),
+    )
+    traded = (pnl != 0).sum(axis=1)
+
+    # El P&L no realizado cuenta en el día de hoy (no como día operado)
+    pnl[:, day_index[today]] += np.array([unrealized.get(str(acc["_id"]), 0.0) for acc in accounts])
+
+    rules = [rules_for(acc.get("propFirm"), acc["phase"]) for acc in accounts]
+    size = np.array([float(acc.get("accountSize") or 0.0) for acc in accounts])
+    size = np.where(size > 0, size, np.nan)
+    daily_limit = np.array([r.max_daily_loss for r in rules])
+    total_limit = np.array([r.max_total_loss for r in rules])
+    target = np.array([r.profit_target if r.profit_target is not None else np.nan for r in rules])
+    min_days = np.array([r.min_trading_days for r in rules])
+    trailing = np.array([r.trailing for r in rules])
+
+    cum = np.cumsum(pnl, axis=1)
+    equity = size[:, None] + cum
+    start = np.concatenate([size[:, None], equity], axis=1)
+    peak = np.maximum.accumulate(start, axis=1)[:, 1:]
+    base = np.where(trailing[:, None], peak, size[:, None])
+    drawdown = np.maximum(base - equity, 0.0) / size[:, None]
+
+    daily_loss = np.maximum(-pnl, 0.0) / size[:, None]
+    worst_daily = daily_loss.max(axis=1)
+    worst_drawdown = drawdown.max(axis=1)
+    today_loss = daily_loss[:, day_index[today]]
+    current_drawdown = drawdown[:, -1]
+    profit = cum[:, -1] / size
+
+    breached = (worst_daily >= daily_limit) | (worst_drawdown >= total_limit)
+    near = (today_loss >= settings.RULES_NEAR_BREACH * daily_limit) | (
+        current_drawdown >= settings.RULES_NEAR_BREACH * total_limit
+    )
+    ready = ~np.isnan(target) & (profit >= np.nan_to_num(target, nan=np.inf)) & (traded >= min_days)
+
+    status = np.where(breached, "breached", np.where(near, "near_breach", np.where(ready, "ready_for_promotion", "ok")))
+    status = np.where(np.isnan(size), "ok", status)
+
+    results = []
+    for i, acc in enumerate(accounts):
+        reasons = []
+        if worst_daily[i] >= daily_limit[i]:
+            reasons.append(f"pérdida diaria {worst_daily[i]:.2%} ≥ {daily_limit[i]:.0%}")
+        if worst_drawdown[i] >= total_limit[i]:
+            reasons.append(f"drawdown {worst_drawdown[i]:.2%} ≥ {total_limit[i]:.0%}")
+        if status[i] == "near_breach":
+            reasons.append(f"hoy {today_loss[i]:.2%} de {daily_limit[i]:.0%}, drawdown actual {current_drawdown[i]:.2%} de {total_limit[i]:.0%}")
+        if status[i] == "ready_for_promotion":
+            reasons.append(f"profit {profit[i]:.2%} ≥ objetivo {target[i]:.0%} en {int(traded[i])} días")
+        results.append({
+            "accountId": str(acc["_id"]),
+            "accountNumber": acc.get("accountNumber"),
+            "propFirm": acc.get("propFirm"),
+            "phase": acc["phase"],
+            "cycleId": acc.get("cycleId"),
+            "accountSize": float(acc.get("accountSize") or 0.0),
+            "profitPct": round(float(np.nan_to_num(profit[i])) * 100, 3),
+            "worstDailyLossPct": round(float(np.nan_to_num(worst_daily[i])) * 100, 3),
+            "maxDrawdownPct": round(float(np.nan_to_num(worst_drawdown[i])) * 100, 3),
+            "currentDrawdownPct": round(float(np.nan_to_num(current_drawdown[i])) * 100, 3),
+            "tradingDays": int(traded[i]),
+            "status": str(status[i]),
+            "nextPhase": NEXT_PHASE.get(acc["phase"]) if status[i] == "ready_for_promotion" else None,
+            "reasons": reasons,
+        })
+    return results
+
+async def evaluate_accounts(account_filter: Optional[dict] = None) -> List[dict]:
+    """Carga cuentas y P&L diario (2 consultas) y evalúa todo en un lote."""
+    accounts = await _accounts(account_filter or {})
+    if not accounts:
+        return []
+    rows = await daily_pnl({str(acc["_id"]): acc.get("phaseStartedAt") for acc in accounts})
+    unrealized = {}
+    if mark_to_market.snapshot is not None:
+        unrealized = {k: v["unrealizedPnl"] for k, v in mark_to_market.snapshot["accounts"].items()}
+    return evaluate(accounts, rows, unrealized)
+
+async def save_evaluations(results: List[dict], full_run: bool = False) -> int:
+    """
+    Reemplaza la última evaluación de cada cuenta en un único bulk_write.
+    Con full_run (todas las cuentas, sin filtro) borra además las filas de
+    cuentas que ya no se evalúan: quemadas, Burned o eliminadas.
+    """
+    evaluated_at = datetime.utcnow()
+    operations = [
+        ReplaceOne({"_id": r["accountId"]}, {**r, "evaluatedAt": evaluated_at}, upsert=True)
+        for r in results
+    ]
+    if operations:
+        await db.db[COLLECTION].bulk_write(operations, ordered=False)
+    if full_run:
+        await db.db[COLLECTION].delete_many({"_id": {"$nin": [r["accountId"] for r in results]}})
+    return len(operations)
@@ -0,0 +1,186 @@
+# backend/app/services/quotes.py
+
+"""
+Feeds de cotizaciones para el mark-to-market.
+
+Un feed es un iterador asíncrono de `Quote`. Hay tres intercambiables,
+elegidos con MTM_FEED:
+
+    file:///ruta/quotes.log     sigue el fichero como `tail -f`
+    tcp://host:puerto           lee líneas de un socket (se reconecta)
+    replay:///ruta/quotes.csv   reproduce un fichero en bucle (desarrollo, demos)
+
+Cada línea es `SYMBOL,bid,ask[,timestamp]`, `SYMBOL,precio` o un objeto
+JSON {"symbol", "bid", "ask"} / {"symbol", "price"}. Las líneas que no se
+entienden se ignoran; un fichero de replay sin ninguna cotización válida es
+un error de configuración y se rechaza al arrancar.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger("gtfunds.mtm")
+
+@dataclass
+class Quote:
+    symbol: str
+    bid: float
+    ask: float
+    time: float  # epoch seconds
+
+def parse_quote(line: str) -> Optional[Quote]:
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    try:
+        if line.startswith("{"):
+            data = json.loads(line)
+            bid = float(data.get("bid", data.get("price")))
+            ask = float(data.get("ask", data.get("price")))
+            return Quote(str(data["symbol"]).upper(), bid, ask, float(data.get("time") or time.time()))
+
+        parts = [p.strip() for p in line.split(",")]
+        if len(parts) == 2:
+            price = float(parts[1])
+            return Quote(parts[0].upper(), price, price, time.time())
+        stamp = float(parts[3]) if len(parts) > 3 and parts[3] else time.time()
+        return Quote(parts[0].upper(), float(parts[1]), float(parts[2]), stamp)
+    except (ValueError, KeyError, TypeError, IndexError):
+        return None
+
+class QuoteFeed(ABC):
+    """Fuente de cotizaciones: `async for quote in feed.quotes()`."""
+
+    # False en los feeds finitos: cuando quotes() se agota, no se relanza
+    restart_on_end = True
+
+    @abstractmethod
+    def quotes(self) -> AsyncIterator[Quote]:
+        """Iterador asíncrono (async generator en las implementaciones)."""
+
+class FileTailFeed(QuoteFeed):
+    """
+    Lee las líneas nuevas de un fichero; si se rota o trunca, vuelve a abrirlo.
+
+    open/read/stat van a un hilo (asyncio.to_thread) y cada lectura trae como
+    mucho CHUNK_SIZE caracteres, así un atraso grande o un sistema de
+    ficheros lento no bloquea el event loop del worker.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, path: str, poll_interval: float = 0.05, from_start: bool = False):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.from_start = from_start
+
+    def _open(self, seek_end: bool):
+        """Abre el fichero (en un hilo); devuelve (fichero, inode)."""
+        f = open(self.path, "r", encoding="utf-8")
+        if seek_end:
+            f.seek(0, os.SEEK_END)
+        return f, os.fstat(f.fileno()).st_ino
+
+    async def quotes(self) -> AsyncIterator[Quote]:
+        while not await asyncio.to_thread(os.path.exists, self.path):
+            await asyncio.sleep(1.0)
+        f, inode = await asyncio.to_thread(self._open, not self.from_start)
+        try:
+            buffer = ""
+            while True:
+                chunk = await asyncio.to_thread(f.read, self.CHUNK_SIZE)
+                if chunk:
+                    buffer += chunk
+                    *lines, buffer = buffer.split("\n")
+                    for line in lines:
+                        quote = parse_quote(line)
+                        if quote is not None:
+                            yield quote
+                    continue
+
+                await asyncio.sleep(self.poll_interval)
+                try:
+                    stat = await asyncio.to_thread(os.stat, self.path)
+                except FileNotFoundError:
+                    continue
+                if stat.st_ino != inode or stat.st_size < f.tell():
+                    f.close()
+                    f, inode = await asyncio.to_thread(self._open, False)
+                    buffer = ""
+        finally:
+            f.close()
+
+class SocketFeed(QuoteFeed):
+    """Líneas de cotización por TCP; reconecta con espera creciente si se corta."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+
+    async def quotes(self) -> AsyncIterator[Quote]:
+        delay = 0.5
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError as e:
+                logger.warning("Quote socket %s:%s unavailable (%s), retrying in %.1fs", self.host, self.port, e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+                continue
+
+            delay = 0.5
+            try:
+                while True:
+                    raw = await reader.readline()
+                    if not raw:
+                        break
+                    quote = parse_quote(raw.decode("utf-8", "replace"))
+                    if quote is not None:
+                        yield quote
+            finally:
+                writer.close()
+
+class ReplayFeed(QuoteFeed):
+    """Reproduce una lista de cotizaciones en bucle, una cada `interval` segundos."""
+
+    def __init__(self, quotes: List[Quote], interval: float = 0.01, loop: bool = True):
+        self._quotes = quotes
+        self.interval = interval
+        self.loop = loop
+        self.restart_on_end = loop
+
+    @classmethod
+    def from_file(cls, path: str, interval: float = 0.01) -> "ReplayFeed":
+        with open(path, encoding="utf-8") as f:
+            quotes = [q for q in (parse_quote(line) for line in f) if q is not None]
+        if not quotes:
+            raise ValueError(f"El fichero de replay no tiene cotizaciones válidas: {path}")
+        return cls(quotes, interval)
+
+    async def quotes(self) -> AsyncIterator[Quote]:
+        while self._quotes:
+            for quote in self._quotes:
+                yield Quote(quote.symbol, quote.bid, quote.ask, time.time())
+                await asyncio.sleep(self.interval)
+            if not self.loop:
+                return
+
+def make_feed(url: str) -> Optional[QuoteFeed]:
+    """Feed a partir de MTM_FEED; None si está vacío."""
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme == "file":
+        return FileTailFeed(parsed.path)
+    if parsed.scheme == "tcp":
+        return SocketFeed(parsed.hostname or "localhost", parsed.port or 9009)
+    if parsed.scheme == "replay":
+        return ReplayFeed.from_file(parsed.path)
+    raise ValueError(f"MTM_FEED no soportado: {url}")
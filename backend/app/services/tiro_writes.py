@@ -0,0 +1,223 @@
+# backend/app/services/tiro_writes.py
+
+"""
+Camino de escritura de los tiros.
+
+Alta de un tiro en 2 round trips:
+    1. en paralelo: el ciclo, todas las cuentas de ambas patas con un solo
+       $in (existencia y pertenencia al ciclo) y el chequeo de conflictos
+       de exposición sobre el índice parcial de tiros abiertos;
+    2. el insert y la actualización del índice de exposición
+       (services/exposure.py), dentro de una transacción si el servidor es
+       un replica set (database.run_in_transaction()), así ambos confirman
+       o fallan juntos. Un conflicto de escritura con otra alta simultánea
+       (p. ej. sobre el mismo roll-up de ciclo) reintenta la transacción
+       entera en lugar de devolver un 500. Sin replica set se escriben uno
+       tras otro y POST /exposure/rebuild repara cualquier desfase.
+
+Ediciones y borrados obtienen la versión anterior del tiro en la misma
+operación de escritura (find_one_and_update / find_one_and_delete) para
+aplicar solo la diferencia de exposición.
+
+Cada tiro guarda `accountIds`, las cuentas de ambas patas, para que "¿en qué
+tiros abiertos de EURUSD está esta cuenta?" sea una búsqueda por índice, y
+las etiquetas leg1/leg2_accountNumber (services/display_labels.py) con las
+cuentas que la validación ya cargó.
+Un conflicto es una cuenta que ya participa en otro tiro abierto del mismo
+símbolo. El chequeo previo no sustituye a un bloqueo: dos altas simultáneas
+de la misma cuenta pueden pasar ambas.
+"""
+
+import asyncio
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+
+from .. import database as db
+from . import display_labels, exposure
+from .mark_to_market import mark_to_market
+
+OPEN = "Abierto"
+
+# Expresión de agregación equivalente a leg_account_ids(), para el backfill
+# (cubre también la estructura antigua leg1: {accountId, ...}).
+_ACCOUNT_IDS_EXPR = {"$setUnion": [
+    {"$ifNull": ["$leg1.accounts.accountId", []]},
+    {"$ifNull": ["$leg2.accounts.accountId", []]},
+    {"$filter": {"input": ["$leg1.accountId", "$leg2.accountId"], "cond": {"$ne": ["$$this", None]}}},
+]}
+
+def leg_account_ids(tiro_doc: dict) -> List[str]:
+    """IDs de cuenta de ambas patas, sin repetir y en orden."""
+    ids: List[str] = []
+    for leg_name in ("leg1", "leg2"):
+        leg = tiro_doc.get(leg_name) or {}
+        if "accountId" in leg:
+            candidates = [leg["accountId"]]
+        else:
+            candidates = [acc.get("accountId") for acc in leg.get("accounts", [])]
+        for account_id in candidates:
+            if account_id and account_id not in ids:
+                ids.append(account_id)
+    return ids
+
+async def backfill_account_ids() -> int:
+    """Rellena `accountIds` en los tiros anteriores a este campo (una sola actualización en el servidor)."""
+    result = await db.db["tiros"].update_many(
+        {"accountIds": {"$exists": False}},
+        [{"$set": {"accountIds": _ACCOUNT_IDS_EXPR}}],
+    )
+    return result.modified_count
+
+# ------------------------------------------------------------
+# Validación
+# ------------------------------------------------------------
+
+def _check_legs(leg1: dict, leg2: dict):
+    for name, leg in (("leg1", leg1), ("leg2", leg2)):
+        ids = [acc["accountId"] for acc in leg["accounts"]]
+        if len(ids) != len(set(ids)):
+            raise HTTPException(status_code=400, detail=f"No se pueden usar cuentas duplicadas en {name}")
+
+async def _find_conflict(symbol: str, account_ids: List[str], exclude_id: Optional[ObjectId]) -> Optional[dict]:
+    query = {"status": OPEN, "symbol": symbol, "accountIds": {"$in": account_ids}}
+    if exclude_id is not None:
+        query["_id"] = {"$ne": exclude_id}
+    return await db.db["tiros"].find_one(query, {"accountIds": 1})
+
+async def validate_tiro(
+    cycle_id: str,
+    symbol: str,
+    leg1: dict,
+    leg2: dict,
+    status: str,
+    exclude_id: Optional[ObjectId] = None,
+) -> Dict[str, dict]:
+    """
+    Valida ciclo, cuentas, pertenencia al ciclo y conflictos de exposición
+    con tres consultas concurrentes. Devuelve las cuentas por ID.
+    """
+    if not ObjectId.is_valid(cycle_id):
+        raise HTTPException(status_code=400, detail=f"ID de ciclo no válido: {cycle_id}")
+    _check_legs(leg1, leg2)
+
+    account_ids = leg_account_ids({"leg1": leg1, "leg2": leg2})
+    for account_id in account_ids:
+        if not ObjectId.is_valid(account_id):
+            raise HTTPException(status_code=400, detail=f"ID de cuenta no válido: {account_id}")
+
+    async def no_conflict():
+        return None
+
+    cycle, accounts, conflict = await asyncio.gather(
+        db.db["cycles"].find_one({"_id": ObjectId(cycle_id)}, {"_id": 1}),
+        db.db["trading_accounts"].find(
+            {"_id": {"$in": [ObjectId(a) for a in account_ids]}},
+            {"accountNumber": 1, "cycleId": 1, "kycId": 1},
+        ).to_list(None),
+        _find_conflict(symbol, account_ids, exclude_id) if status == OPEN else no_conflict(),
+    )
+
+    if not cycle:
+        raise HTTPException(status_code=404, detail=f"Ciclo no encontrado: {cycle_id}")
+
+    by_id = {str(acc["_id"]): acc for acc in accounts}
+    for account_id in account_ids:
+        account = by_id.get(account_id)
+        if account is None:
+            raise HTTPException(status_code=404, detail=f"Cuenta no encontrada: {account_id}")
+        if account.get("cycleId") != cycle_id:
+            raise HTTPException(
+                status_code=400,
+                detail=f"La cuenta {account.get('accountNumber', account_id)} no pertenece al ciclo {cycle_id}",
+            )
+
+    if conflict is not None:
+        busy = [a for a in account_ids if a in set(conflict.get("accountIds", []))]
+        numbers = ", ".join(by_id[a].get("accountNumber", a) for a in busy)
+        raise HTTPException(
+            status_code=409,
+            detail=f"La cuenta {numbers} ya está en el tiro abierto {conflict['_id']} de {symbol}",
+        )
+    return by_id
+
+# ------------------------------------------------------------
+# Escrituras
+# ------------------------------------------------------------
+
+def _account_numbers(accounts: Dict[str, dict]) -> Dict[str, str]:
+    return {account_id: acc.get("accountNumber", display_labels.MISSING) for account_id, acc in accounts.items()}
+
+async def create_tiro(tiro_dict: dict) -> dict:
+    """Valida e inserta un tiro; devuelve el documento insertado (sin releerlo)."""
+    accounts = await validate_tiro(
+        tiro_dict["cycleId"], tiro_dict["symbol"], tiro_dict["leg1"], tiro_dict["leg2"], tiro_dict["status"]
+    )
+    tiro_dict["accountIds"] = leg_account_ids(tiro_dict)
+    tiro_dict.update(display_labels.tiro_labels(tiro_dict, _account_numbers(accounts)))
+
+    async def write(session):
+        # En un reintento insert_one reutiliza el _id ya asignado: la
+        # transacción abortada no llegó a confirmarlo
+        await db.db["tiros"].insert_one(tiro_dict, session=session)
+        await exposure.apply_tiro_change(None, tiro_dict, session=session)
+
+    await db.run_in_transaction(write)
+    mark_to_market.invalidate_positions()
+    return tiro_dict
+
+async def update_tiro(tiro_id: ObjectId, update_data: dict) -> Optional[dict]:
+    """
+    Aplica una actualización parcial. Si cambian las patas o el tiro se
+    reabre, se revalida contra el documento actual. Devuelve el documento
+    actualizado o None si no existe.
+    """
+    needs_validation = "leg1" in update_data or "leg2" in update_data or update_data.get("status") == OPEN
+    if needs_validation:
+        current = await db.db["tiros"].find_one({"_id": tiro_id})
+        if current is None:
+            return None
+        merged = {**current, **update_data}
+        if "accountId" in merged.get("leg1", {}) or "accountId" in merged.get("leg2", {}):
+            raise HTTPException(status_code=400, detail="El tiro tiene la estructura antigua; envía ambas patas")
+        accounts = await validate_tiro(
+            merged["cycleId"], merged["symbol"], merged["leg1"], merged["leg2"], merged.get("status", OPEN),
+            exclude_id=tiro_id,
+        )
+        update_data["accountIds"] = leg_account_ids(merged)
+        update_data.update(display_labels.tiro_labels(merged, _account_numbers(accounts)))
+
+    async def write(session) -> Optional[dict]:
+        before = await db.db["tiros"].find_one_and_update(
+            {"_id": tiro_id},
+            {"$set": update_data},
+            return_document=ReturnDocument.BEFORE,
+            session=session,
+        )
+        if before is None:
+            return None
+        # $set sobre campos de primer nivel: el documento nuevo es la mezcla
+        after = {**before, **update_data}
+        await exposure.apply_tiro_change(before, after, session=session)
+        return after
+
+    after = await db.run_in_transaction(write)
+    if after is None:
+        return None
+    mark_to_market.invalidate_positions()
+    return after
+
+async def delete_tiro(tiro_id: ObjectId) -> bool:
+    async def write(session) -> bool:
+        before = await db.db["tiros"].find_one_and_delete({"_id": tiro_id}, session=session)
+        if before is None:
+            return False
+        await exposure.apply_tiro_change(before, None, session=session)
+        return True
+
+    if not await db.run_in_transaction(write):
+        return False
+    mark_to_market.invalidate_positions()
+    return True
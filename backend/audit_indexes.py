@@ -0,0 +1,201 @@
+"""
+Auditoría de índices: ejecuta explain() sobre las consultas de cada router y
+falla si alguna hace un COLLSCAN o si falta algún índice del registro
+(app.database.INDEXES).
+
+Ejecutar desde la carpeta backend:
+    python audit_indexes.py            # solo auditar
+    python audit_indexes.py --create   # crear antes los índices que falten
+
+Código de salida 1 si hay problemas, para poder usarlo en CI.
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+
+from app import database
+from app.core.slow_queries import summarize_explain
+
+SAMPLE_ID = "000000000000000000000000"
+SAMPLE_DATE = datetime(2024, 1, 1)
+
+# Formas de consulta de cada router con valores de ejemplo. Los listados sin
+# filtro (GET /tiros, GET /cycles...) recorren la colección entera a propósito
+# y no se incluyen.
+QUERY_SHAPES = {
+    "kycs": [
+        ("kycs", "búsqueda por nombre/email", {"find": "kycs", "filter": {"$or": [
+            {"name": {"$regex": "ana", "$options": "i"}},
+            {"email": {"$regex": "ana", "$options": "i"}},
+        ]}, "sort": {"_id": -1}}),
+        ("trading_accounts", "overview: cuentas del KYC", {"find": "trading_accounts", "filter": {"kycId": SAMPLE_ID}}),
+        ("payouts", "overview: payouts del KYC", {"find": "payouts", "filter": {"kycId": SAMPLE_ID}}),
+    ],
+    "trading_accounts": [
+        ("trading_accounts", "cuentas de un KYC", {"find": "trading_accounts", "filter": {"kycId": SAMPLE_ID}}),
+        ("trading_accounts", "listado por fase/estado", {
+            "find": "trading_accounts",
+            "filter": {"phase": {"$in": ["fase1", "fase2"]}, "status": {"$in": ["Active"]}},
+            "sort": {"_id": -1}, "limit": 101,
+        }),
+        ("trading_accounts", "listado por prop firm", {
+            "find": "trading_accounts", "filter": {"propFirm": {"$in": ["FTMO"]}}, "sort": {"_id": -1}, "limit": 101,
+        }),
+        ("trading_accounts", "listado por tamaño", {
+            "find": "trading_accounts", "filter": {"accountSize": {"$gte": 50000}},
+            "sort": {"accountSize": 1, "_id": 1}, "limit": 101,
+        }),
+        ("trading_accounts", "secuencia FT: siembra del contador", {
+            "find": "trading_accounts", "filter": {"accountNumber": {"$regex": r"^FT-\d+$"}},
+            "projection": {"_id": 0, "accountNumber": 1},
+        }),
+        ("trading_accounts", "reparación: números con forma de ObjectId", {
+            "find": "trading_accounts", "filter": {"accountNumber": {"$regex": "^[0-9a-fA-F]{24}$"}},
+            "sort": {"_id": 1}, "limit": 5000,
+        }),
+    ],
+    "payouts": [
+        ("payouts", "payouts de un KYC por fecha", {
+            "find": "payouts",
+            "filter": {"kycId": SAMPLE_ID, "payoutDate": {"$gte": SAMPLE_DATE}},
+            "sort": {"payoutDate": -1},
+        }),
+        ("payouts", "analytics por rango de fechas", {"aggregate": "payouts", "pipeline": [
+            {"$match": {"payoutDate": {"$gte": SAMPLE_DATE, "$lt": datetime(2025, 1, 1)}}},
+        ], "cursor": {}}),
+        ("payouts", "payouts de una cuenta", {"find": "payouts", "filter": {"accountId": SAMPLE_ID}}),
+    ],
+    "cycles": [
+        ("cycles", "ciclos completados", {"find": "cycles", "filter": {"status": "Completado"}}),
+        ("cycles", "ciclos recientes", {"find": "cycles", "filter": {}, "sort": {"startDate": -1}, "limit": 5}),
+        ("trading_accounts", "dashboard: cuentas del ciclo", {"find": "trading_accounts", "filter": {"cycleId": SAMPLE_ID}}),
+        ("tiros", "dashboard: tiros del ciclo", {"find": "tiros", "filter": {"cycleId": SAMPLE_ID}}),
+    ],
+    "tiros": [
+        ("tiros", "alta: conflicto de exposición", {"find": "tiros", "filter": {
+            "status": "Abierto", "symbol": "EURUSD", "accountIds": {"$in": [SAMPLE_ID]},
+        }, "limit": 1}),
+        ("tiros", "backfill de accountIds", {"find": "tiros", "filter": {"accountIds": {"$exists": False}}}),
+        ("tiros", "etiquetas: tiros de cuentas renumeradas", {
+            "find": "tiros", "filter": {"accountIds": {"$in": [SAMPLE_ID]}}, "sort": {"_id": 1}, "limit": 1000,
+        }),
+        ("tiros", "historial de una cuenta", {
+            "find": "tiros", "filter": {"accountIds": SAMPLE_ID}, "sort": {"openDate": -1, "_id": -1}, "limit": 51,
+        }),
+        ("tiros", "historial de una cuenta: totales", {"aggregate": "tiros", "pipeline": [
+            {"$match": {"accountIds": SAMPLE_ID}},
+        ], "cursor": {}}),
+    ],
+    "exposure": [
+        ("exposures", "exposición de una cuenta", {"find": "exposures", "filter": {"accountId": SAMPLE_ID, "scope": "account"}}),
+        ("exposures", "exposición de un ciclo", {"find": "exposures", "filter": {"cycleId": SAMPLE_ID}}),
+        ("exposures", "coberturas desbalanceadas", {"find": "exposures", "filter": {
+            "scope": "cycle", "$or": [{"netVolume": {"$gt": 0.001}}, {"netVolume": {"$lt": -0.001}}],
+        }}),
+    ],
+    "rules": [
+        ("trading_accounts", "cuentas evaluables", {"find": "trading_accounts", "filter": {
+            "phase": {"$in": ["fase1", "fase2", "real"]}, "status": {"$ne": "Burned"},
+        }}),
+        ("tiros", "P&L diario de las cuentas", {"aggregate": "tiros", "pipeline": [
+            {"$match": {"accountIds": {"$in": [SAMPLE_ID]}, "status": "Cerrado"}},
+        ], "cursor": {}}),
+        ("rule_evaluations", "cuentas señaladas", {
+            "find": "rule_evaluations", "filter": {"status": {"$ne": "ok"}}, "sort": {"accountNumber": 1},
+        }),
+        ("rule_evaluations", "cuentas señaladas de un ciclo", {
+            "find": "rule_evaluations", "filter": {"cycleId": SAMPLE_ID, "status": {"$ne": "ok"}},
+        }),
+    ],
+    "overview": [
+        ("trading_accounts", "cuentas por ciclo y fase", {"aggregate": "trading_accounts", "pipeline": [
+            {"$match": {"cycleId": {"$in": [SAMPLE_ID]}}},
+            {"$group": {"_id": {"cycleId": "$cycleId", "phase": "$phase"}, "count": {"$sum": 1}}},
+        ], "cursor": {}}),
+        ("tiros", "tiros por ciclo y estado", {"aggregate": "tiros", "pipeline": [
+            {"$match": {"cycleId": {"$in": [SAMPLE_ID]}}},
+            {"$group": {"_id": {"cycleId": "$cycleId", "status": "$status"}, "count": {"$sum": 1}}},
+        ], "cursor": {}}),
+    ],
+    "investors": [
+        ("investments", "inversiones de un inversor", {
+            "find": "investments", "filter": {"investorId": SAMPLE_ID}, "sort": {"investmentDate": -1},
+        }),
+        ("investments", "inversiones de un ciclo", {
+            "find": "investments", "filter": {"cycleId": SAMPLE_ID}, "sort": {"amount": -1},
+        }),
+    ],
+    "distributions": [
+        ("distributions", "distribuciones de un ciclo", {"find": "distributions", "filter": {"cycleId": SAMPLE_ID}}),
+        ("distributions", "distribuciones de un inversor", {
+            "find": "distributions", "filter": {"investorId": SAMPLE_ID}, "sort": {"calculatedAt": -1},
+        }),
+        ("tiros", "tiros cerrados de los ciclos", {"aggregate": "tiros", "pipeline": [
+            {"$match": {"cycleId": {"$in": [SAMPLE_ID]}, "status": "Cerrado", "result": {"$ne": None}}},
+        ], "cursor": {}}),
+        ("payouts", "payouts de las cuentas o KYCs de los ciclos", {"aggregate": "payouts", "pipeline": [
+            {"$match": {"$or": [{"accountId": {"$in": [SAMPLE_ID]}}, {"kycId": {"$in": [SAMPLE_ID]}}]}},
+        ], "cursor": {}}),
+    ],
+    "auth": [
+        ("users", "login por email", {"find": "users", "filter": {"email": "ana@example.com"}, "limit": 1}),
+    ],
+}
+
+async def audit(create: bool) -> int:
+    problems = 0
+    database.connect()
+
+    if create:
+        created = await database.init_indexes()
+        for collection, names in created.items():
+            print(f"🛠️  {collection}: creados {', '.join(names)}")
+
+    print("=" * 60)
+    print("📋 ÍNDICES DEL REGISTRO")
+    print("=" * 60)
+    missing = await asyncio.gather(*(database.missing_indexes(c) for c in database.INDEXES))
+    for collection, models in zip(database.INDEXES, missing):
+        for model in models:
+            problems += 1
+            print(f"❌ {collection}: falta {model.document['name']}")
+    if not any(missing):
+        print("✅ Todos los índices del registro existen")
+
+    # Índices que no están en el registro: los reemplazados cuestan una
+    # escritura por documento sin servir a ninguna consulta
+    unregistered = await asyncio.gather(*(database.unregistered_indexes(c) for c in database.INDEXES))
+    for collection, names in zip(database.INDEXES, unregistered):
+        for name in names:
+            if name in database.SUPERSEDED_INDEXES.get(collection, []):
+                problems += 1
+                print(f"❌ {collection}: sobra {name} (reemplazado; se borra con --create o al arrancar)")
+            else:
+                print(f"⚠️  {collection}: {name} no está en el registro")
+
+    print()
+    print("=" * 60)
+    print("🔍 PLANES DE CONSULTA")
+    print("=" * 60)
+    for router, shapes in QUERY_SHAPES.items():
+        for collection, description, command in shapes:
+            explain = await database.db.command({"explain": command, "verbosity": "queryPlanner"})
+            summary = summarize_explain(explain)
+            if summary["collscan"]:
+                problems += 1
+                print(f"❌ [{router}] {description}: {summary['plan']}")
+            else:
+                print(f"✅ [{router}] {description}: {summary['plan']}")
+
+    print()
+    print(f"{'❌' if problems else '✅'} {problems} problema(s) encontrados")
+    database.close()
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Audita los índices y planes de consulta de la API")
+    parser.add_argument("--create", action="store_true", help="Crear los índices que falten antes de auditar")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(audit(args.create)))
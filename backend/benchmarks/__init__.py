@@ -0,0 +1,8 @@
+"""
+Benchmarks de la API. Ejecutar desde la carpeta backend:
+
+    python -m benchmarks.dataset --scale small --drop     # sembrar la BD <DATABASE_NAME>_bench
+    python -m benchmarks.api --scale small                # medir endpoints contra mongod
+    python -m benchmarks.api --in-process                 # sin mongod (mongomock-motor)
+    python -m benchmarks.models                           # validación/serialización de modelos
+"""
@@ -0,0 +1,202 @@
+"""
+Benchmark de endpoints: levanta la app en proceso (httpx + ASGITransport),
+siembra el dataset sintético y mide p50/p95, throughput y consultas a Mongo
+por request del dashboard, listados y escrituras.
+
+    python -m benchmarks.api --scale small                 # contra mongod (BD <DATABASE_NAME>_bench)
+    python -m benchmarks.api --in-process                  # con mongomock-motor, sin mongod
+    python -m benchmarks.api --save-baseline               # guardar como referencia
+    python -m benchmarks.api --tolerance 0.25              # fallar si p95 empeora >25%
+
+Los resultados se comparan con benchmarks/baseline.json (una entrada por
+backend + escala). El proceso sale con código 1 si algún escenario empeora
+su p95 más allá de la tolerancia o hace más consultas que en la referencia.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from app import database
+from app.core.config import settings
+from .dataset import generate, seed, scale_from_args, add_scale_arguments
+
+BASELINE_FILE = Path(__file__).with_name("baseline.json")
+NOISE_FLOOR_MS = 2.0  # Diferencias de p95 por debajo de esto no cuentan como regresión
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    # Recibe el dataset y el número de iteración, devuelve (url, body)
+    request: Callable[[dict, int], tuple]
+
+def _active_cycle(data: dict) -> str:
+    return str(data["cycles"][-1]["_id"])
+
+def _account_update(data: dict, i: int) -> tuple:
+    """PUT /accounts/{id} recibe la cuenta completa (TradingAccountCreate)."""
+    account = data["trading_accounts"][i % len(data["trading_accounts"])]
+    body = {k: v for k, v in account.items() if k not in ("_id", "kycId")}
+    body["cost"] = 100.0 + i
+    return f"/api/v1/accounts/{account['_id']}", body
+
+SCENARIOS: List[Scenario] = [
+    Scenario("cycle_dashboard", "GET", lambda d, i: (f"/api/v1/cycles/{_active_cycle(d)}/dashboard", None)),
+    Scenario("historical_statistics", "GET", lambda d, i: ("/api/v1/cycles/statistics/historical", None)),
+    Scenario("overview", "GET", lambda d, i: ("/api/v1/overview/", None)),
+    Scenario("list_kycs", "GET", lambda d, i: ("/api/v1/kycs/?limit=100", None)),
+    Scenario("search_kycs", "GET", lambda d, i: ("/api/v1/kycs/?search=garc&limit=50", None)),
+    Scenario("kyc_overview", "GET", lambda d, i: (
+        f"/api/v1/kycs/{d['kycs'][i % len(d['kycs'])]['_id']}/overview", None)),
+    Scenario("cycle_tiros", "GET", lambda d, i: (f"/api/v1/tiros/cycle/{_active_cycle(d)}", None)),
+    Scenario("kyc_accounts", "GET", lambda d, i: (
+        f"/api/v1/kycs/{d['kycs'][i % len(d['kycs'])]['_id']}/accounts/", None)),
+    Scenario("investor_investments", "GET", lambda d, i: (
+        f"/api/v1/investors/{d['investors'][i % len(d['investors'])]['_id']}/investments", None)),
+    Scenario("create_payout", "POST", lambda d, i: (
+        f"/api/v1/kycs/{d['kycs'][i % len(d['kycs'])]['_id']}/payouts/", {"amount": 1000.0 + i})),
+    Scenario("update_account", "PUT", _account_update),
+]
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, data: dict,
+                       requests: int, concurrency: int, warmup: int) -> dict:
+    counter = iter(range(warmup + requests))
+
+    async def call() -> tuple:
+        url, body = scenario.request(data, next(counter))
+        started = time.perf_counter()
+        response = await client.request(scenario.method, url, json=body)
+        elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            raise RuntimeError(f"{scenario.name}: {response.status_code} {response.text[:200]}")
+        queries = response.headers.get("x-db-queries")
+        return elapsed, int(queries) if queries is not None else None
+
+    for _ in range(warmup):
+        await call()
+
+    results = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker():
+        async with semaphore:
+            results.append(await call())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(requests)))
+    wall = time.perf_counter() - started
+
+    latencies = np.array([r[0] for r in results]) * 1000
+    queries = [r[1] for r in results if r[1] is not None]
+    return {
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "throughput_rps": round(requests / wall, 1),
+        "queries": round(float(np.mean(queries)), 1) if queries else None,
+    }
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    regressions = []
+    for name, current in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        limit = reference["p95_ms"] * (1 + tolerance)
+        if current["p95_ms"] > limit and current["p95_ms"] - reference["p95_ms"] > NOISE_FLOOR_MS:
+            regressions.append(f"{name}: p95 {current['p95_ms']} ms > {limit:.2f} ms (referencia {reference['p95_ms']})")
+        if current["queries"] is not None and reference.get("queries") is not None and current["queries"] > reference["queries"]:
+            regressions.append(f"{name}: {current['queries']} consultas/request > {reference['queries']}")
+    return regressions
+
+async def setup_database(in_process: bool):
+    """Apunta app.database a la BD de benchmark (nunca a DATABASE_NAME)."""
+    if in_process:
+        from mongomock_motor import AsyncMongoMockClient  # pip install mongomock-motor
+        client = AsyncMongoMockClient()
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from app.core.metrics import event_listeners
+        client = AsyncIOMotorClient(settings.MONGO_URL, event_listeners=event_listeners())
+    database.client = client
+    database.db = client[f"{settings.DATABASE_NAME}_bench"]
+    return client
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de endpoints de la API")
+    add_scale_arguments(parser)
+    parser.add_argument("--in-process", action="store_true", help="Usar mongomock-motor en lugar de mongod")
+    parser.add_argument("--requests", type=int, default=50, help="Requests medidos por escenario")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="Ejecutar solo estos escenarios")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Empeoramiento de p95 permitido (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    # Sin rate limiting (mediría el limitador) y con cabecera de consultas por
+    # request. mongomock no emite eventos de comandos, así que ahí no se cuentan.
+    settings.RATE_LIMIT_ENABLED = False
+    settings.METRICS_QUERY_HEADER = not args.in_process
+    settings.PROFILING_ENABLED = False
+
+    scale = scale_from_args(args)
+    backend = "mongomock" if args.in_process else "mongod"
+    baseline_key = f"{backend}-{args.scale}-seed{args.seed}"
+
+    client = await setup_database(args.in_process)
+    data = generate(scale, args.seed)
+    await seed(database.db, data, drop=True)
+    await database.init_indexes()
+
+    from app.main import app
+
+    results: Dict[str, dict] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        print(f"{'escenario':<24}{'p50 ms':>10}{'p95 ms':>10}{'req/s':>10}{'consultas':>11}")
+        for scenario in SCENARIOS:
+            if args.only and scenario.name not in args.only:
+                continue
+            try:
+                result = await run_scenario(http, scenario, data, args.requests, args.concurrency, args.warmup)
+            except NotImplementedError as e:
+                # mongomock no implementa todas las etapas de agregación ($lookup con pipeline...)
+                print(f"{scenario.name:<24}  omitido: {e}")
+                continue
+            results[scenario.name] = result
+            queries = "-" if result["queries"] is None else result["queries"]
+            print(f"{scenario.name:<24}{result['p50_ms']:>10}{result['p95_ms']:>10}{result['throughput_rps']:>10}{queries:>11}")
+
+    client.close()
+
+    baselines = json.loads(BASELINE_FILE.read_text()) if BASELINE_FILE.exists() else {}
+    if args.save_baseline:
+        baselines[baseline_key] = results
+        BASELINE_FILE.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"\n💾 Referencia guardada en {BASELINE_FILE.name} [{baseline_key}]")
+        return 0
+
+    if baseline_key not in baselines:
+        print(f"\n⚠️  No hay referencia para {baseline_key}; usa --save-baseline para crearla")
+        return 0
+
+    regressions = compare(results, baselines[baseline_key], args.tolerance)
+    if regressions:
+        print("\n❌ Regresiones respecto a la referencia:")
+        for line in regressions:
+            print(f"   {line}")
+        return 1
+    print(f"\n✅ Sin regresiones respecto a {baseline_key}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
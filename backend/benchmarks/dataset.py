@@ -0,0 +1,279 @@
+"""
+Generador de datos sintéticos reproducibles (misma semilla -> mismos documentos).
+
+Produce ciclos, KYCs, cuentas de trading en todas las fases, tiros con la
+estructura de patas actual y con la antigua (leg1: {accountId, direction,
+volume}), payouts, inversores e inversiones.
+
+Los documentos llevan los campos que la API escribe y de los que dependen sus
+lecturas: `accountIds` de los tiros (tiro_writes.leg_account_ids) y las
+etiquetas desnormalizadas `nombre_kyc` / `leg*_accountNumber`
+(display_labels). Se calculan con las mismas funciones que la API, así que
+el dataset no se desvía si cambian.
+
+    python -m benchmarks.dataset --scale medium --seed 42 --drop
+"""
+
+import argparse
+import asyncio
+import random
+import struct
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from bson import ObjectId
+
+from app.core.config import settings
+from app.services.display_labels import tiro_labels
+from app.services.tiro_writes import leg_account_ids
+
+@dataclass(frozen=True)
+class Scale:
+    cycles: int
+    kycs: int
+    accounts_per_kyc: int
+    tiros_per_cycle: int
+    payouts_per_kyc: int
+    investors: int
+    investments_per_investor: int
+    legacy_tiro_ratio: float = 0.2  # Fracción de tiros con la estructura antigua
+
+SCALES = {
+    "small": Scale(cycles=3, kycs=60, accounts_per_kyc=3, tiros_per_cycle=40, payouts_per_kyc=2,
+                   investors=20, investments_per_investor=2),
+    "medium": Scale(cycles=6, kycs=600, accounts_per_kyc=4, tiros_per_cycle=400, payouts_per_kyc=3,
+                    investors=200, investments_per_investor=3),
+    "large": Scale(cycles=12, kycs=5000, accounts_per_kyc=4, tiros_per_cycle=2000, payouts_per_kyc=4,
+                   investors=1000, investments_per_investor=4),
+}
+
+PROP_FIRMS = ["FTMO", "FundedNext", "The5ers", "MyForexFunds", "E8 Funding"]
+ACCOUNT_SIZES = [10_000, 25_000, 50_000, 100_000, 200_000]
+SYMBOLS = ["EURUSD", "GBPUSD", "USDJPY", "XAUUSD", "US30", "NAS100"]
+PHASES = [("fase1", "Active", 0.45), ("fase2", "Active", 0.25), ("real", "Active", 0.1), ("quemada", "Burned", 0.2)]
+FIRST_NAMES = ["Ana", "Luis", "María", "Carlos", "Lucía", "Jorge", "Sofía", "Diego", "Valeria", "Andrés"]
+LAST_NAMES = ["García", "Rodríguez", "López", "Martínez", "Pérez", "Gómez", "Díaz", "Torres", "Ramírez", "Vargas"]
+
+BASE_DATE = datetime(2024, 1, 1)
+
+class _Ids:
+    """ObjectIds deterministas, crecientes en el tiempo como los reales."""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.counter = 0
+
+    def next(self) -> ObjectId:
+        self.counter += 1
+        timestamp = int(BASE_DATE.timestamp()) + self.counter
+        return ObjectId(struct.pack(">I", timestamp) + self.rng.randbytes(8))
+
+def _operation(rng: random.Random, closed: bool) -> dict:
+    entry = round(rng.uniform(1.0, 2.0), 5)
+    return {
+        "volume": rng.choice([0.5, 1.0, 2.0, 5.0]),
+        "entryPrice": entry,
+        "exitPrice": round(entry * rng.uniform(0.98, 1.02), 5) if closed else None,
+        "ticketId": str(rng.randint(10_000_000, 99_999_999)),
+        "result": round(rng.uniform(-3000, 3000), 2) if closed else None,
+    }
+
+def _tiro(rng: random.Random, ids: _Ids, cycle_id: str, cycle_start: datetime,
+          account_ids: List[str], legacy: bool) -> dict:
+    closed = rng.random() < 0.7
+    open_date = cycle_start + timedelta(hours=rng.randint(0, 24 * 60))
+    picked = rng.sample(account_ids, min(4, len(account_ids)))
+    leg1_direction = rng.choice(["BUY", "SELL"])
+    leg2_direction = "SELL" if leg1_direction == "BUY" else "BUY"
+
+    if legacy:
+        leg1 = {"accountId": picked[0], "direction": leg1_direction, "volume": 1.0, "ticketId": None}
+        leg2 = {"accountId": picked[-1], "direction": leg2_direction, "volume": 1.0, "ticketId": None}
+    else:
+        per_leg = max(1, min(2, len(picked) // 2))
+        leg1 = {"direction": leg1_direction, "accounts": [
+            {"accountId": acc, "operations": [_operation(rng, closed) for _ in range(rng.randint(1, 3))]}
+            for acc in picked[:per_leg]
+        ]}
+        leg2 = {"direction": leg2_direction, "accounts": [
+            {"accountId": acc, "operations": [_operation(rng, closed) for _ in range(rng.randint(1, 3))]}
+            for acc in picked[-per_leg:]
+        ]}
+
+    return {
+        "_id": ids.next(),
+        "cycleId": cycle_id,
+        "symbol": rng.choice(SYMBOLS),
+        "status": "Cerrado" if closed else "Abierto",
+        "leg1": leg1,
+        "leg2": leg2,
+        "result": round(rng.uniform(-5000, 8000), 2) if closed else None,
+        "notes": None,
+        "openDate": open_date,
+        "closeDate": open_date + timedelta(hours=rng.randint(1, 72)) if closed else None,
+    }
+
+def generate(scale: Scale, seed: int = 42) -> Dict[str, List[dict]]:
+    """Documentos por colección, listos para insert_many."""
+    rng = random.Random(seed)
+    ids = _Ids(rng)
+    data: Dict[str, List[dict]] = {name: [] for name in (
+        "cycles", "kycs", "trading_accounts", "tiros", "payouts", "investors", "investments",
+    )}
+
+    for i in range(scale.cycles):
+        # El último ciclo está activo, el resto completados
+        data["cycles"].append({
+            "_id": ids.next(),
+            "name": f"Ciclo {i + 1}",
+            "status": "Activo" if i == scale.cycles - 1 else "Completado",
+            "startDate": BASE_DATE + timedelta(days=60 * i),
+        })
+
+    accounts_by_cycle: Dict[str, List[str]] = {str(c["_id"]): [] for c in data["cycles"]}
+    account_number = 0
+
+    for i in range(scale.kycs):
+        cycle = data["cycles"][i % scale.cycles]
+        cycle_id = str(cycle["_id"])
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}"
+        kyc_id = ids.next()
+        data["kycs"].append({
+            "_id": kyc_id,
+            "name": name,
+            "phone": f"+57 300 {rng.randint(1_000_000, 9_999_999)}",
+            "email": f"kyc{i}@example.com",
+            "creditCard": None,
+            "address": f"Calle {rng.randint(1, 200)} # {rng.randint(1, 99)}-{rng.randint(1, 99)}",
+            "status": True,
+            "dashboardEnabled": rng.random() < 0.3,
+            "cycleId": cycle_id,
+            "submittedDate": cycle["startDate"] + timedelta(days=rng.randint(0, 10)),
+            "documents": [],
+        })
+
+        for _ in range(scale.accounts_per_kyc):
+            account_number += 1
+            roll, cumulative = rng.random(), 0.0
+            for phase, status, weight in PHASES:
+                cumulative += weight
+                if roll <= cumulative:
+                    break
+            size = rng.choice(ACCOUNT_SIZES)
+            account_id = ids.next()
+            data["trading_accounts"].append({
+                "_id": account_id,
+                "accountNumber": f"FT-{account_number:05d}",
+                "cost": round(size * rng.uniform(0.004, 0.006), 2),
+                "accountSize": float(size),
+                "propFirm": rng.choice(PROP_FIRMS),
+                "status": status,
+                "phase": phase,
+                "cycleId": cycle_id,
+                "login": str(rng.randint(1_000_000, 9_999_999)),
+                "password": "bench-password",
+                "server": "Bench-Server",
+                "kycId": str(kyc_id),
+                "nombre_kyc": name,
+            })
+            accounts_by_cycle[cycle_id].append(str(account_id))
+
+            if phase == "real":
+                for _ in range(scale.payouts_per_kyc):
+                    data["payouts"].append({
+                        "_id": ids.next(),
+                        "amount": round(rng.uniform(500, 15_000), 2),
+                        "payoutDate": cycle["startDate"] + timedelta(days=rng.randint(20, 90)),
+                        "accountId": str(account_id),
+                        "kycId": str(kyc_id),
+                    })
+
+    account_numbers = {str(acc["_id"]): acc["accountNumber"] for acc in data["trading_accounts"]}
+    for cycle in data["cycles"]:
+        cycle_id = str(cycle["_id"])
+        account_ids = accounts_by_cycle[cycle_id]
+        if len(account_ids) < 2:
+            continue
+        for _ in range(scale.tiros_per_cycle):
+            legacy = rng.random() < scale.legacy_tiro_ratio
+            tiro = _tiro(rng, ids, cycle_id, cycle["startDate"], account_ids, legacy)
+            tiro["accountIds"] = leg_account_ids(tiro)
+            tiro.update(tiro_labels(tiro, account_numbers))
+            data["tiros"].append(tiro)
+
+    for i in range(scale.investors):
+        investor_id = ids.next()
+        cycles = rng.sample(data["cycles"], min(scale.investments_per_investor, scale.cycles))
+        investments = [{
+            "_id": ids.next(),
+            "investorId": str(investor_id),
+            "cycleId": str(cycle["_id"]),
+            "amount": float(rng.choice([5_000, 10_000, 25_000, 50_000])),
+            "profitPercentage": rng.choice([30.0, 40.0, 50.0]),
+            "investmentDate": cycle["startDate"],
+            "status": "Active" if cycle["status"] == "Activo" else "Completed",
+        } for cycle in cycles]
+        data["investments"].extend(investments)
+        data["investors"].append({
+            "_id": investor_id,
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} Inv{i}",
+            "email": f"investor{i}@example.com",
+            "phone": None,
+            "identification": None,
+            "country": rng.choice(["CO", "MX", "ES", "AR"]),
+            "notes": None,
+            "registrationDate": BASE_DATE,
+            "totalInvested": sum(inv["amount"] for inv in investments),
+            "investmentCount": len(investments),
+            "activeInvestmentCount": sum(1 for inv in investments if inv["status"] == "Active"),
+        })
+
+    return data
+
+async def seed(database, data: Dict[str, List[dict]], drop: bool = False) -> Dict[str, int]:
+    """Inserta el dataset (opcionalmente vaciando antes cada colección)."""
+    async def load(name: str, docs: List[dict]) -> int:
+        if drop:
+            await database[name].delete_many({})
+        if docs:
+            # Copias: insert_many no debe mutar el dataset reutilizable
+            await database[name].insert_many([dict(doc) for doc in docs], ordered=False)
+        return len(docs)
+
+    counts = await asyncio.gather(*(load(name, docs) for name, docs in data.items()))
+    return dict(zip(data, counts))
+
+def scale_from_args(args) -> Scale:
+    scale = SCALES[args.scale]
+    overrides = {field: getattr(args, field) for field in scale.__dataclass_fields__ if getattr(args, field, None) is not None}
+    return replace(scale, **overrides)
+
+def add_scale_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    for field, value in SCALES["small"].__dict__.items():
+        parser.add_argument(f"--{field.replace('_', '-')}", dest=field, type=type(value), default=None)
+
+async def main():
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description="Siembra una BD de benchmark con datos sintéticos")
+    add_scale_arguments(parser)
+    parser.add_argument("--database", default=f"{settings.DATABASE_NAME}_bench",
+                        help="BD destino (por defecto <DATABASE_NAME>_bench, nunca la real)")
+    parser.add_argument("--drop", action="store_true", help="Vaciar las colecciones antes de insertar")
+    args = parser.parse_args()
+
+    scale = scale_from_args(args)
+    data = generate(scale, args.seed)
+    client = AsyncIOMotorClient(settings.MONGO_URL)
+    counts = await seed(client[args.database], data, drop=args.drop)
+    client.close()
+
+    print(f"✅ BD {args.database} sembrada (seed={args.seed}, {scale})")
+    for name, count in counts.items():
+        print(f"   {name}: {count}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+"""
+Micro-benchmarks de los modelos Pydantic en la ruta caliente de los listados:
+model_validate, model_dump, codificación JSON y la migración de tiros antiguos,
+sobre lotes de 1, 100 y 10.000 documentos realistas (benchmarks.dataset).
+
+    python -m benchmarks.models                      # comparar con la referencia
+    python -m benchmarks.models --save-baseline      # guardar la referencia
+    python -m benchmarks.models --batches 100 10000 --repeat 7
+
+Se reporta el mejor tiempo de `--repeat` ejecuciones en µs por documento. El
+proceso sale con código 1 si alguna medición empeora más de `--tolerance`
+respecto a benchmarks/models_baseline.json.
+"""
+
+import argparse
+import copy
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from app.api.cycles import migrate_old_tiro_structure
+from app.models.kyc import KycInDB
+from app.models.tiro import TiroInDB
+from app.models.trading_account import TradingAccountInDB
+from .dataset import SCALES, generate
+
+BASELINE_FILE = Path(__file__).with_name("models_baseline.json")
+NOISE_FLOOR_US = 0.5  # Diferencias por debajo de esto (µs/doc) no cuentan como regresión
+
+def _convert(doc: dict) -> dict:
+    """Lo mismo que convert_document en los routers: _id y ObjectIds a str."""
+    return {k: str(v) if isinstance(v, ObjectId) else v for k, v in doc.items()}
+
+def _batch(docs: List[dict], size: int) -> List[dict]:
+    return [copy.deepcopy(docs[i % len(docs)]) for i in range(size)]
+
+def _time(func: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def measure(batch_sizes: List[int], repeat: int) -> Dict[str, float]:
+    data = generate(SCALES["medium"], seed=42)
+    current_tiros = [_convert(t) for t in data["tiros"] if "accounts" in t["leg1"]]
+    legacy_tiros = [_convert(t) for t in data["tiros"] if "accountId" in t["leg1"]]
+    models = {
+        "tiro": (TiroInDB, current_tiros),
+        "account": (TradingAccountInDB, [_convert(a) for a in data["trading_accounts"]]),
+        "kyc": (KycInDB, [_convert(k) for k in data["kycs"]]),
+    }
+
+    results: Dict[str, float] = {}
+    for size in batch_sizes:
+        for name, (model, docs) in models.items():
+            batch = _batch(docs, size)
+            instances = [model.model_validate(doc) for doc in batch]
+
+            timings = {
+                "validate": _time(lambda: [model.model_validate(doc) for doc in batch], repeat),
+                "dump": _time(lambda: [obj.model_dump() for obj in instances], repeat),
+                "dump_json": _time(lambda: [obj.model_dump_json() for obj in instances], repeat),
+                # Lo que hace FastAPI con las respuestas Dict[str, Any] del dashboard
+                "jsonable_encoder": _time(lambda: json.dumps(jsonable_encoder(instances)), repeat),
+            }
+            for operation, seconds in timings.items():
+                results[f"{name}.{operation}[{size}]"] = seconds / size * 1e6
+
+        # La migración muta el documento: cada repetición trabaja sobre copias nuevas
+        copies = [_batch(legacy_tiros, size) for _ in range(repeat)]
+        best = float("inf")
+        for legacy_batch in copies:
+            started = time.perf_counter()
+            for doc in legacy_batch:
+                migrate_old_tiro_structure(doc)
+            best = min(best, time.perf_counter() - started)
+        results[f"tiro.migrate_legacy[{size}]"] = best / size * 1e6
+
+    return results
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> List[str]:
+    regressions = []
+    for key, current in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        if current > reference * (1 + tolerance) and current - reference > NOISE_FLOOR_US:
+            regressions.append(f"{key}: {current:.2f} µs/doc > {reference * (1 + tolerance):.2f} (referencia {reference:.2f})")
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de validación y serialización de modelos")
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 100, 10_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Empeoramiento permitido (0.3 = 30%%)")
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results = measure(args.batches, args.repeat)
+    print(f"{'medición':<36}{'µs/doc':>10}")
+    for key, value in results.items():
+        print(f"{key:<36}{value:>10.2f}")
+
+    if args.save_baseline:
+        BASELINE_FILE.write_text(json.dumps({k: round(v, 3) for k, v in results.items()}, indent=2) + "\n")
+        print(f"\n💾 Referencia guardada en {BASELINE_FILE.name}")
+        return 0
+    if not BASELINE_FILE.exists():
+        print("\n⚠️  No hay referencia; usa --save-baseline para crearla")
+        return 0
+
+    regressions = compare(results, json.loads(BASELINE_FILE.read_text()), args.tolerance)
+    if regressions:
+        print("\n❌ Regresiones respecto a la referencia:")
+        for line in regressions:
+            print(f"   {line}")
+        return 1
+    print("\n✅ Sin regresiones respecto a la referencia")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+"""
+Comprueba las etiquetas desnormalizadas (nombre_kyc en las cuentas,
+leg1/leg2_accountNumber en los tiros) contra kycs y trading_accounts.
+Ejecutar desde la carpeta backend:
+    python check_labels.py            # solo informa de las desviaciones
+    python check_labels.py --repair   # además las corrige
+
+Recorre ambas colecciones por lotes de _id (ver app/services/display_labels.py).
+Código de salida 1 si quedan desviaciones sin reparar, para poder usarlo en CI o cron.
+"""
+
+import argparse
+import asyncio
+import sys
+
+from app import database
+from app.services import display_labels
+
+async def main(repair: bool) -> int:
+    database.connect()
+    try:
+        result = await display_labels.check_labels(repair=repair)
+    finally:
+        database.close()
+
+    print(f"Cuentas: {result['accountsChecked']} revisadas, {result['accountsDrifted']} con nombre_kyc desviado")
+    print(f"Tiros:   {result['tirosChecked']} revisados, {result['tirosDrifted']} con leg1/leg2_accountNumber desviado")
+    drifted = result["accountsDrifted"] + result["tirosDrifted"]
+    if drifted and repair:
+        print(f"✅ {drifted} documentos reparados")
+        return 0
+    if drifted:
+        print("⚠️  Ejecuta con --repair para corregirlos")
+        return 1
+    print("✅ Sin desviaciones")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Comprueba y repara las etiquetas desnormalizadas")
+    parser.add_argument("--repair", action="store_true", help="corregir las desviaciones encontradas")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.repair)))
@@ -0,0 +1,45 @@
+"""
+Evaluación nocturna de las reglas de las prop firms (app/services/prop_rules.py).
+Ejecutar desde la carpeta backend (p. ej. desde cron):
+    python evaluate_rules.py            # evalúa y guarda en rule_evaluations
+    python evaluate_rules.py --dry-run  # solo muestra las cuentas señaladas
+
+Todas las cuentas se evalúan en un lote: una consulta de cuentas, una
+agregación del P&L diario y una pasada de NumPy.
+"""
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+from app import database
+from app.services import prop_rules
+
+async def main(dry_run: bool):
+    database.connect()
+    try:
+        started = time.perf_counter()
+        results = await prop_rules.evaluate_accounts()
+        elapsed = time.perf_counter() - started
+
+        for r in results:
+            if r["status"] != "ok":
+                print(f"{r['accountNumber'] or r['accountId']:<12} {r['propFirm']:<14} {r['phase']:<6} "
+                      f"{r['status']:<20} {'; '.join(r['reasons'])}")
+
+        counts = Counter(r["status"] for r in results)
+        print(f"\n{len(results)} cuentas evaluadas en {elapsed:.2f}s: "
+              + ", ".join(f"{status}={n}" for status, n in sorted(counts.items())))
+
+        if not dry_run:
+            saved = await prop_rules.save_evaluations(results, full_run=True)
+            print(f"{saved} evaluaciones guardadas en {prop_rules.COLLECTION}")
+    finally:
+        database.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evalúa las reglas de las prop firms para todas las cuentas")
+    parser.add_argument("--dry-run", action="store_true", help="no guarda el resultado")
+    args = parser.parse_args()
+    asyncio.run(main(args.dry_run))
@@ -0,0 +1,18 @@
+# backend/gunicorn.conf.py
+# gunicorn -c gunicorn.conf.py app.main:app   (desde la carpeta backend)
+
+from serve import default_workers, tune_worker_env
+
+bind = "0.0.0.0:8000"
+workers = default_workers()
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Sin preload: la app (y su cliente de Mongo, creado en el lifespan) se carga
+# en cada worker después del fork, nunca se comparte entre procesos.
+preload_app = False
+
+graceful_timeout = 30
+timeout = 60
+keepalive = 5
+
+tune_worker_env(workers)
@@ -0,0 +1,79 @@
+"""
+Script para mover las inversiones embebidas (investors.investments) a la colección `investments`
+Ejecutar desde la carpeta backend: python migrate_investments.py
+
+Es idempotente: solo procesa inversores que todavía tienen el array embebido,
+y recalcula totalInvested / investmentCount / activeInvestmentCount a partir
+de la colección.
+"""
+
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from app.core.config import settings
+
+async def migrate_investments():
+    """Copia las inversiones embebidas a su colección y recalcula los totales."""
+
+    client = AsyncIOMotorClient(settings.MONGO_URL)
+    db = client[settings.DATABASE_NAME]
+
+    print("=" * 60)
+    print("🔍 BUSCANDO INVERSORES CON INVERSIONES EMBEBIDAS...")
+    print("=" * 60)
+
+    inserts = []
+    investor_ids = {}
+    cursor = db["investors"].find({"investments.0": {"$exists": True}}, {"investments": 1})
+
+    async for investor in cursor:
+        investor_id = str(investor["_id"])
+        investor_ids[investor_id] = investor["_id"]
+        for inv in investor.get("investments", []):
+            # Upsert por (inversor, ciclo, fecha) para poder re-ejecutar si se interrumpe
+            key = {"investorId": investor_id, "cycleId": inv.get("cycleId"), "investmentDate": inv.get("investmentDate")}
+            inserts.append(UpdateOne(key, {"$setOnInsert": {**inv, **key}}, upsert=True))
+
+    if not investor_ids:
+        print("✅ No hay inversiones embebidas que migrar.")
+        client.close()
+        return
+
+    print(f"📦 {len(inserts)} inversiones de {len(investor_ids)} inversores")
+
+    if inserts:
+        await db["investments"].bulk_write(inserts, ordered=False)
+
+    # Recalcular totales desde la colección y quitar el array embebido
+    totals_pipeline = [
+        {"$match": {"investorId": {"$in": list(investor_ids)}}},
+        {"$group": {
+            "_id": "$investorId",
+            "totalInvested": {"$sum": "$amount"},
+            "investmentCount": {"$sum": 1},
+            "activeInvestmentCount": {"$sum": {"$cond": [{"$eq": ["$status", "Active"]}, 1, 0]}},
+        }},
+    ]
+    updates = []
+    async for row in db["investments"].aggregate(totals_pipeline):
+        updates.append(UpdateOne(
+            {"_id": investor_ids[row["_id"]]},
+            {
+                "$set": {
+                    "totalInvested": row["totalInvested"],
+                    "investmentCount": row["investmentCount"],
+                    "activeInvestmentCount": row["activeInvestmentCount"],
+                },
+                "$unset": {"investments": ""},
+            }
+        ))
+
+    if updates:
+        await db["investors"].bulk_write(updates, ordered=False)
+
+    print(f"✅ Migrados {len(updates)} inversores")
+    client.close()
+
+if __name__ == "__main__":
+    asyncio.run(migrate_investments())
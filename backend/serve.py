@@ -0,0 +1,73 @@
+"""
+Servidor de producción multi-worker (un proceso por núcleo).
+
+Ejecutar desde la carpeta backend:
+    python serve.py                       # workers = núcleos disponibles
+    python serve.py --workers 4 --port 8000
+    gunicorn -c gunicorn.conf.py app.main:app   # alternativa con gunicorn
+
+Cada worker crea su propio cliente de Mongo en el lifespan (después del fork),
+así que el pool total es workers x MONGO_MAX_POOL_SIZE. Si no se fijan por
+entorno, los tamaños por worker se reparten según los núcleos:
+    MONGO_MAX_POOL_SIZE   = max(10, MONGO_TOTAL_CONNECTIONS / workers)
+    PASSWORD_HASH_WORKERS = max(1, núcleos / workers)
+
+Los caches (tokens, overview) y el rate limiting en memoria son por proceso;
+con varios workers usa RATE_LIMIT_BACKEND=mongo para límites compartidos.
+"""
+
+import argparse
+import os
+
+DEFAULT_TOTAL_CONNECTIONS = 200
+
+def available_cores() -> int:
+    """Núcleos que este proceso puede usar (respeta cgroups/affinity en contenedores)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def default_workers() -> int:
+    return int(os.environ.get("WEB_CONCURRENCY", available_cores()))
+
+def tune_worker_env(workers: int):
+    """Valores por worker (vía entorno, que heredan los procesos hijos) salvo que ya estén fijados."""
+    cores = available_cores()
+    total = int(os.environ.get("MONGO_TOTAL_CONNECTIONS", DEFAULT_TOTAL_CONNECTIONS))
+    os.environ.setdefault("MONGO_MAX_POOL_SIZE", str(max(10, total // workers)))
+    os.environ.setdefault("PASSWORD_HASH_WORKERS", str(max(1, cores // workers)))
+
+    if workers > 1 and os.environ.get("RATE_LIMIT_BACKEND", "memory") == "memory":
+        print(
+            f"⚠️  RATE_LIMIT_BACKEND=memory con {workers} workers: cada proceso lleva sus propios "
+            "contadores. Usa RATE_LIMIT_BACKEND=mongo para límites globales."
+        )
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Servidor multi-worker de la API de GT Funds")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=default_workers())
+    args = parser.parse_args()
+
+    tune_worker_env(args.workers)
+    print(
+        f"🚀 {args.workers} workers en {args.host}:{args.port} "
+        f"(pool Mongo {os.environ['MONGO_MAX_POOL_SIZE']}/worker, "
+        f"bcrypt {os.environ['PASSWORD_HASH_WORKERS']} hilos/worker)"
+    )
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        lifespan="on",
+        proxy_headers=True,
+        timeout_graceful_shutdown=30,
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# backend/tests/test_prop_rules.py
+# Ejecutar desde la carpeta backend: python -m pytest -q
+
+from datetime import datetime
+
+from app.services import prop_rules
+
+TODAY = "2026-10-10"
+
+def account(phase, started, **extra):
+    return {
+        "_id": "acc1", "accountNumber": "FT-00001", "propFirm": "FTMO", "phase": phase,
+        "accountSize": 100_000.0, "cycleId": "c1", "phaseStartedAt": started, **extra,
+    }
+
+def rows(*days_pnl):
+    return [{"accountId": "acc1", "day": day, "pnl": pnl} for day, pnl in days_pnl]
+
+FASE1_HISTORY = rows(("2026-10-01", 3000.0), ("2026-10-02", 2600.0), ("2026-10-03", 2400.0), ("2026-10-04", 2400.0))
+
+def test_fase1_reaching_target_is_ready_for_promotion():
+    [result] = prop_rules.evaluate([account("fase1", datetime(2026, 9, 30))], FASE1_HISTORY, today=TODAY)
+    assert result["status"] == "ready_for_promotion"
+    assert result["nextPhase"] == "fase2"
+    assert result["profitPct"] == 10.4
+
+def test_promotion_resets_the_window():
+    # Recién promovida a fase2: el +10.4% de fase1 no cuenta para el objetivo de fase2
+    promoted = account("fase2", datetime(2026, 10, 5, 9, 30))
+    [result] = prop_rules.evaluate([promoted], FASE1_HISTORY, today=TODAY)
+    assert result["status"] == "ok"
+    assert result["nextPhase"] is None
+    assert result["profitPct"] == 0.0
+    assert result["tradingDays"] == 0
+
+    [result] = prop_rules.evaluate([promoted], FASE1_HISTORY + rows(("2026-10-06", 1500.0)), today=TODAY)
+    assert result["profitPct"] == 1.5
+    assert result["tradingDays"] == 1
+    assert result["status"] == "ok"
+
+def test_breach_in_previous_phase_does_not_carry_over():
+    history = rows(("2026-10-01", -6000.0), ("2026-10-02", 9000.0), ("2026-10-03", 9000.0))
+    [before] = prop_rules.evaluate([account("fase1", datetime(2026, 9, 30))], history, today=TODAY)
+    assert before["status"] == "breached"
+
+    [after] = prop_rules.evaluate([account("fase2", datetime(2026, 10, 4))], history, today=TODAY)
+    assert after["status"] == "ok"
+    assert after["worstDailyLossPct"] == 0.0
@@ -1,12 +1,15 @@
 // frontend/src/pages/AccountsPage.jsx
 
-import React, { useState } from 'react';
+import React, { useState, useEffect, useCallback } from 'react';
 import SearchBox from '../components/shared/SearchBox';
 import ConfirmDialog from '../components/shared/ConfirmDialog';
 import EmptyState, { NoSearchResultsEmptyState } from '../components/shared/EmptyState';
 import { Edit2, Trash2, Eye, EyeOff, CreditCard } from 'lucide-react';
 import { toast } from 'react-toastify';
 import axios from 'axios';
+import { accountsAPI } from '../services/api';
+
+const PAGE_SIZE = 200;
 
 function AccountsPage({ kycs, cycles, onDataChange }) {
   const [searchTerm, setSearchTerm] = useState('');
@@ -17,28 +20,55 @@ function AccountsPage({ kycs, cycles, onDataChange }) {
   const [showDeleteConfirm, setShowDeleteConfirm] = useState(false);
   const [accountToDelete, setAccountToDelete] = useState(null);
 
-  // Aplanar todas las cuentas de todos los KYCs
-  const allAccounts = kycs.flatMap(kyc => {
-    const accountsArray = Array.isArray(kyc.accounts) ? kyc.accounts : [];
-    return accountsArray.map(acc => ({
-      ...acc,
-      kycName: kyc.name,
-      kycEmail: kyc.email
-    }));
-  });
+  const [filters, setFilters] = useState({ phase: '', status: '', cycleId: '' });
+  const [accounts, setAccounts] = useState([]);
+  const [totals, setTotals] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loading, setLoading] = useState(false);
+
+  // Una consulta acotada por página: filtros y orden en el servidor
+  const loadAccounts = useCallback(async (cursor = null) => {
+    setLoading(true);
+    try {
+      const params = { limit: PAGE_SIZE, includeKyc: true, includeTotals: !cursor };
+      Object.entries(filters).forEach(([key, value]) => {
+        if (value) params[key] = value;
+      });
+      if (cursor) params.cursor = cursor;
+
+      const page = await accountsAPI.list(params);
+      setAccounts(prev => (cursor ? [...prev, ...page.data] : page.data));
+      if (page.totals) setTotals(page.totals);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error('Error al cargar cuentas:', error);
+      toast.error('Error al cargar las cuentas');
+    } finally {
+      setLoading(false);
+    }
+  }, [filters]);
 
-  // Filtrar cuentas
-  const filteredAccounts = allAccounts.filter(acc =>
+  useEffect(() => {
+    loadAccounts();
+  }, [loadAccounts, kycs]);
+
+  const updateFilter = (key, value) => {
+    setFilters(prev => ({ ...prev, [key]: value }));
+  };
+
+  // Búsqueda de texto sobre las cuentas ya cargadas
+  const filteredAccounts = accounts.filter(acc =>
     acc.accountNumber.toLowerCase().includes(searchTerm.toLowerCase()) ||
     acc.propFirm.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    acc.kycName.toLowerCase().includes(searchTerm.toLowerCase())
+    (acc.kycName || '').toLowerCase().includes(searchTerm.toLowerCase())
   );
 
-  // Calcular estadísticas
-  const totalAccountSize = filteredAccounts.reduce((sum, acc) => sum + (acc.accountSize || 0), 0);
-  const totalCost = filteredAccounts.reduce((sum, acc) => sum + (acc.cost || 0), 0);
-  const activeAccounts = filteredAccounts.filter(acc => acc.status === 'Active').length;
-  const realAccounts = filteredAccounts.filter(acc => acc.phase === 'real').length;
+  // Estadísticas del filtro completo (calculadas en el servidor)
+  const totalAccounts = totals?.count ?? filteredAccounts.length;
+  const totalAccountSize = totals?.totalAccountSize ?? 0;
+  const totalCost = totals?.totalCost ?? 0;
+  const activeAccounts = totals?.activeCount ?? 0;
+  const realAccounts = totals?.realCount ?? 0;
 
   // Handlers
   const handleEdit = (account) => {
@@ -119,7 +149,7 @@ function AccountsPage({ kycs, cycles, onDataChange }) {
       <div className="grid grid-cols-1 md:grid-cols-4 gap-6 mb-6">
         <div className="bg-white p-6 rounded-lg shadow">
           <p className="text-sm text-gray-600">Total Cuentas</p>
-          <p className="text-2xl font-bold text-gray-900 mt-1">{filteredAccounts.length}</p>
+          <p className="text-2xl font-bold text-gray-900 mt-1">{totalAccounts}</p>
         </div>
         <div className="bg-white p-6 rounded-lg shadow">
           <p className="text-sm text-gray-600">Cuentas Activas</p>
@@ -137,12 +167,33 @@ function AccountsPage({ kycs, cycles, onDataChange }) {
 
       {/* Tabla de cuentas */}
       <div className="bg-white rounded-lg shadow">
-        <div className="p-4 border-b">
-          <SearchBox
-            value={searchTerm}
-            onChange={setSearchTerm}
-            placeholder="Buscar por cuenta, prop firm o cliente..."
-          />
+        <div className="p-4 border-b flex flex-wrap gap-3 items-center">
+          <div className="flex-1 min-w-[240px]">
+            <SearchBox
+              value={searchTerm}
+              onChange={setSearchTerm}
+              placeholder="Buscar por cuenta, prop firm o cliente..."
+            />
+          </div>
+          <select value={filters.phase} onChange={(e) => updateFilter('phase', e.target.value)} aria-label="Filtrar por fase">
+            <option value="">Todas las fases</option>
+            <option value="fase1">Fase 1</option>
+            <option value="fase2">Fase 2</option>
+            <option value="real">Real</option>
+            <option value="quemada">Quemada</option>
+          </select>
+          <select value={filters.status} onChange={(e) => updateFilter('status', e.target.value)} aria-label="Filtrar por estado">
+            <option value="">Todos los estados</option>
+            <option value="Active">Active</option>
+            <option value="Pending">Pending</option>
+            <option value="Burned">Burned</option>
+          </select>
+          <select value={filters.cycleId} onChange={(e) => updateFilter('cycleId', e.target.value)} aria-label="Filtrar por ciclo">
+            <option value="">Todos los ciclos</option>
+            {cycles.map(cycle => (
+              <option key={cycle.id} value={cycle.id}>{cycle.name}</option>
+            ))}
+          </select>
         </div>
 
         <div className="overflow-x-auto">
@@ -262,6 +313,14 @@ function AccountsPage({ kycs, cycles, onDataChange }) {
             </tbody>
           </table>
         </div>
+
+        {nextCursor && (
+          <div className="p-4 border-t text-center">
+            <button onClick={() => loadAccounts(nextCursor)} className="btn-secondary" disabled={loading}>
+              {loading ? 'Cargando...' : `Cargar más (${accounts.length} de ${totalAccounts})`}
+            </button>
+          </div>
+        )}
       </div>
 
       {/* Modal de Edición */}
@@ -3,61 +3,41 @@
 import React, { useState, useEffect } from 'react';
 import { DollarSign, Users, Activity, TrendingUp, BarChart3, Target, ArrowRight } from 'lucide-react';
 import StatCard from '../components/shared/StatCard';
-import axios from 'axios';
+import { overviewAPI } from '../services/api';
 
 function Dashboard({ stats, kycs, cycles }) {
-  const [cyclesData, setCyclesData] = useState([]);
-  const { totalAUM, totalAccounts, totalKycs, totalCycles } = stats;
+  const [overview, setOverview] = useState(null);
 
-  // Calcular cuentas activas
-  const activeAccounts = kycs.reduce((sum, kyc) => {
-    const accountsArray = Array.isArray(kyc.accounts) ? kyc.accounts : [];
-    return sum + accountsArray.filter(acc => acc.status === 'Active').length;
-  }, 0);
-
-  // Calcular total de payouts
-  const totalPayouts = kycs.reduce((total, kyc) => {
-    const payoutsArray = Array.isArray(kyc.payouts) ? kyc.payouts : [];
-    const kycPayouts = payoutsArray.reduce((sum, p) => sum + (p.amount || 0), 0);
-    return total + kycPayouts;
-  }, 0);
-
-  // Obtener ciclos activos
-  const activeCycles = cycles.filter(c => c.status === 'Activo').length;
-
-  // Fetch enhanced cycle data
+  // Totales y resúmenes de ciclos calculados en el servidor (una sola llamada)
   useEffect(() => {
-    const fetchCyclesData = async () => {
+    const fetchOverview = async () => {
       try {
-        const enhancedData = await Promise.all(
-          cycles.slice(0, 5).map(async (cycle) => {
-            try {
-              const response = await axios.get(`http://127.0.0.1:8000/api/v1/cycles/${cycle.id}/dashboard`);
-              return {
-                ...cycle,
-                dashboard: response.data
-              };
-            } catch (error) {
-              console.error(`Error fetching dashboard for cycle ${cycle.id}:`, error);
-              return {
-                ...cycle,
-                dashboard: null
-              };
-            }
-          })
-        );
-        setCyclesData(enhancedData);
+        setOverview(await overviewAPI.get(5));
       } catch (error) {
-        console.error('Error fetching cycles data:', error);
-        setCyclesData(cycles.slice(0, 5).map(c => ({ ...c, dashboard: null })));
+        console.error('Error fetching overview:', error);
+        setOverview({ totals: null, recentCycles: [] });
       }
     };
 
-    if (cycles.length > 0) {
-      fetchCyclesData();
-    }
+    fetchOverview();
   }, [cycles]);
 
+  const totals = overview?.totals;
+  const totalAUM = totals?.totalAUM ?? stats.totalAUM;
+  const totalAccounts = totals?.totalAccounts ?? stats.totalAccounts;
+  const totalKycs = totals?.totalKycs ?? stats.totalKycs;
+  const totalCycles = totals?.totalCycles ?? stats.totalCycles;
+  const activeCycles = totals?.activeCycles ?? cycles.filter(c => c.status === 'Activo').length;
+  const activeAccounts = totals?.activeAccounts ?? 0;
+  const totalPayouts = totals?.totalPayouts ?? 0;
+  const totalCost = totals?.totalCost ?? 0;
+
+  const cyclesData = (overview?.recentCycles || []).map(({ metadata, resumen }) => ({
+    ...metadata,
+    id: metadata.id ?? metadata._id,
+    dashboard: { resumen }
+  }));
+
   return (
     <div>
       <h1 className="text-3xl font-bold text-gray-900 mb-8">Dashboard General</h1>
@@ -106,10 +86,7 @@ function Dashboard({ stats, kycs, cycles }) {
         />
         <StatCard
           title="Costo Total"
-          value={`$${kycs.reduce((total, kyc) => {
-            const accountsArray = Array.isArray(kyc.accounts) ? kyc.accounts : [];
-            return total + accountsArray.reduce((sum, acc) => sum + (acc.cost || 0), 0);
-          }, 0).toLocaleString()}`}
+          value={`$${totalCost.toLocaleString()}`}
           icon={<DollarSign className="w-10 h-10" />}
           iconColor="text-red-600"
         />
@@ -121,7 +121,7 @@ function InvestorsPage() {
   const totalInvestors = investors.length;
   const totalCapital = investors.reduce((sum, inv) => sum + (inv.totalInvested || 0), 0);
   const activeInvestments = investors.reduce((sum, inv) => {
-    return sum + (inv.investments?.filter(i => i.status === 'Active').length || 0);
+    return sum + (inv.activeInvestmentCount ?? inv.investments?.filter(i => i.status === 'Active').length ?? 0);
   }, 0);
 
   if (loading) {
@@ -185,7 +185,7 @@ function InvestorsPage() {
                       <p className="font-semibold text-gray-800">{investor.name}</p>
                       <p className="text-sm text-gray-500">{investor.email}</p>
                       <p className="text-xs text-gray-400 mt-1">
-                        {investor.investments?.length || 0} inversiones
+                        {investor.investmentCount ?? investor.investments?.length ?? 0} inversiones
                       </p>
                     </div>
                     <div className="text-right">
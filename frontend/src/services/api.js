@@ -17,6 +17,40 @@ const convertDocuments = (docs) => {
   return docs.map(convertDocument);
 };
 
+// Decodifica una tabla columnar ({length, columns, dictionaries}) a filas
+export const decodeColumnar = (table) => {
+  const fields = Object.keys(table.columns);
+  const rows = new Array(table.length);
+  for (let i = 0; i < table.length; i++) {
+    const row = {};
+    for (const field of fields) {
+      const value = table.columns[field][i];
+      const dictionary = table.dictionaries[field];
+      row[field] = dictionary ? dictionary[value] : value;
+    }
+    rows[i] = row;
+  }
+  return rows;
+};
+
+// Reconstruye los tiros (leg1/leg2 con cuentas y operaciones) desde las
+// tablas columnar `tiros` y `operations`
+export const decodeColumnarTiros = (tirosTable, operationsTable) => {
+  const tiros = decodeColumnar(tirosTable).map(({ leg1Direction, leg2Direction, ...tiro }) => ({
+    ...tiro,
+    leg1: { direction: leg1Direction, accounts: [] },
+    leg2: { direction: leg2Direction, accounts: [] },
+  }));
+  for (const { tiro, leg, account, accountId, ...operation } of decodeColumnar(operationsTable)) {
+    const accounts = tiros[tiro][`leg${leg}`].accounts;
+    if (!accounts[account]) {
+      accounts[account] = { accountId, operations: [] };
+    }
+    accounts[account].operations.push(operation);
+  }
+  return tiros;
+};
+
 // ============================================
 // KYC API
 // ============================================
@@ -33,6 +67,14 @@ export const kycAPI = {
     return convertDocument(response.data);
   },
 
+  // Perfil + cuentas + payouts + totales en una sola llamada
+  getOverview: async (id, fields = null) => {
+    const response = await axios.get(`${API_BASE_URL}/kycs/${id}/overview`, {
+      params: fields ? { fields } : {}
+    });
+    return response.data;
+  },
+
   create: async (kycData) => {
     const response = await axios.post(`${API_BASE_URL}/kycs/`, kycData);
     return convertDocument(response.data);
@@ -62,9 +104,20 @@ export const cyclesAPI = {
     return convertDocument(response.data);
   },
 
+  // Formato columnar: mucho más pequeño para ciclos con miles de cuentas
   getDashboard: async (id) => {
-    const response = await axios.get(`${API_BASE_URL}/cycles/${id}/dashboard`);
-    return response.data;
+    const response = await axios.get(`${API_BASE_URL}/cycles/${id}/dashboard`, {
+      params: { format: 'columnar' }
+    });
+    const { encoding, cuentas, tiros, operaciones, ...rest } = response.data;
+    if (encoding !== 'columnar') {
+      return response.data;
+    }
+    return {
+      ...rest,
+      cuentas: decodeColumnar(cuentas),
+      tiros: decodeColumnarTiros(tiros, operaciones),
+    };
   },
 
   create: async (cycleData) => {
@@ -91,6 +144,17 @@ export const cyclesAPI = {
 // Trading Accounts API
 // ============================================
 export const accountsAPI = {
+  // Listado global con filtros (status, phase, propFirm, cycleId, kycId,
+  // minCost/maxCost, minSize/maxSize), orden y paginación por cursor
+  list: async (params = {}) => {
+    const response = await axios.get(`${API_BASE_URL}/accounts/`, {
+      params,
+      // status/phase/propFirm pueden ser arrays: ?phase=fase1&phase=fase2
+      paramsSerializer: { indexes: null }
+    });
+    return response.data;
+  },
+
   // Obtener todas las cuentas de un KYC
   getAllByKyc: async (kycId) => {
     const response = await axios.get(`${API_BASE_URL}/kycs/${kycId}/accounts/`);
@@ -152,6 +216,34 @@ export const payoutsAPI = {
   // Eliminar payout
   delete: async (payoutId) => {
     await axios.delete(`${API_BASE_URL}/payouts/${payoutId}`);
+  },
+
+  // Analítica (calculada en la base de datos). params: { from, to, ... }
+  getSummary: async (params = {}) => {
+    const response = await axios.get(`${API_BASE_URL}/payouts/analytics/summary`, { params });
+    return response.data;
+  },
+
+  getTimeseries: async (granularity = 'month', params = {}) => {
+    const response = await axios.get(`${API_BASE_URL}/payouts/analytics/timeseries`, {
+      params: { granularity, ...params }
+    });
+    return response.data;
+  },
+
+  getByKyc: async (params = {}) => {
+    const response = await axios.get(`${API_BASE_URL}/payouts/analytics/by-kyc`, { params });
+    return response.data;
+  },
+
+  getByPropFirm: async (params = {}) => {
+    const response = await axios.get(`${API_BASE_URL}/payouts/analytics/by-prop-firm`, { params });
+    return response.data;
+  },
+
+  getByCycle: async (params = {}) => {
+    const response = await axios.get(`${API_BASE_URL}/payouts/analytics/by-cycle`, { params });
+    return response.data;
   }
 };
 
@@ -194,16 +286,13 @@ export const tirosAPI = {
 // ============================================
 export const loadKycWithRelations = async (kycId) => {
   try {
-    const [kyc, accounts, payouts] = await Promise.all([
-      kycAPI.getById(kycId),
-      accountsAPI.getAllByKyc(kycId),
-      payoutsAPI.getAllByKyc(kycId)
-    ]);
+    const overview = await kycAPI.getOverview(kycId);
 
     return {
-      ...kyc,
-      accounts,
-      payouts
+      ...convertDocument(overview.profile),
+      accounts: convertDocuments(overview.accounts),
+      payouts: convertDocuments(overview.payouts),
+      totals: overview.totals
     };
   } catch (error) {
     console.error(`Error loading KYC ${kycId} with relations:`, error);
@@ -221,11 +310,13 @@ export const loadAllKycsWithRelations = async () => {
     const kycsWithRelations = await Promise.all(
       kycs.map(async (kyc) => {
         try {
-          const [accounts, payouts] = await Promise.all([
-            accountsAPI.getAllByKyc(kyc.id),
-            payoutsAPI.getAllByKyc(kyc.id)
-          ]);
-          return { ...kyc, accounts, payouts };
+          const overview = await kycAPI.getOverview(kyc.id, 'accounts,payouts,totals');
+          return {
+            ...kyc,
+            accounts: convertDocuments(overview.accounts),
+            payouts: convertDocuments(overview.payouts),
+            totals: overview.totals
+          };
         } catch (error) {
           console.error(`Error loading relations for KYC ${kyc.id}:`, error);
           return { ...kyc, accounts: [], payouts: [] };
@@ -274,12 +365,62 @@ export const investorsAPI = {
     return convertDocument(response.data);
   },
 
-  getInvestments: async (investorId) => {
-    const response = await axios.get(`${API_BASE_URL}/investors/${investorId}/investments`);
+  getInvestments: async (investorId, params = {}) => {
+    const response = await axios.get(`${API_BASE_URL}/investors/${investorId}/investments`, { params });
+    // Handle paginated response - extract data array
+    const docs = response.data.data || response.data;
+    return convertDocuments(docs);
+  },
+
+  updateInvestment: async (investorId, investmentId, investmentData) => {
+    const response = await axios.put(`${API_BASE_URL}/investors/${investorId}/investments/${investmentId}`, investmentData);
+    return convertDocument(response.data);
+  },
+
+  getCycleInvestments: async (cycleId, params = {}) => {
+    const response = await axios.get(`${API_BASE_URL}/investors/cycle/${cycleId}/investments`, { params });
+    return { ...response.data, data: convertDocuments(response.data.data) };
+  }
+};
+
+// ============================================
+// Overview API
+// ============================================
+export const overviewAPI = {
+  // Totales de la plataforma + resumen de los N ciclos más recientes
+  get: async (cycles = 5) => {
+    const response = await axios.get(`${API_BASE_URL}/overview/`, { params: { cycles } });
     return response.data;
   }
 };
 
+// ============================================
+// Distributions API
+// ============================================
+export const distributionsAPI = {
+  run: async (cycleIds = null, dryRun = false) => {
+    const response = await axios.post(`${API_BASE_URL}/distributions/run`, { cycleIds, dryRun });
+    return response.data;
+  },
+
+  runForCycle: async (cycleId, dryRun = false) => {
+    const response = await axios.post(`${API_BASE_URL}/distributions/cycle/${cycleId}`, null, {
+      params: { dry_run: dryRun }
+    });
+    return response.data;
+  },
+
+  getByCycle: async (cycleId) => {
+    const response = await axios.get(`${API_BASE_URL}/distributions/cycle/${cycleId}`);
+    return convertDocuments(response.data);
+  },
+
+  getByInvestor: async (investorId) => {
+    const response = await axios.get(`${API_BASE_URL}/distributions/investor/${investorId}`);
+    return convertDocuments(response.data);
+  }
+};
+
 export default {
   kycAPI,
   cyclesAPI,
@@ -287,6 +428,8 @@ export default {
   payoutsAPI,
   tirosAPI,
   investorsAPI,
+  overviewAPI,
+  distributionsAPI,
   loadKycWithRelations,
   loadAllKycsWithRelations
 };
\ No newline at end of file
@@ -98,7 +98,9 @@ export interface Investor {
   email: string;
   phone: string;
   totalInvested: number;
-  investments: Investment[];
+  investmentCount?: number;
+  activeInvestmentCount?: number;
+  investments?: Investment[];
 }
 
 export interface InvestorCreate {